@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Serveur de modèle factice, compatible OpenAI, pour tester la passerelle IA
+
+Répond à POST /v1/chat/completions après --latency secondes (asyncio.sleep)
+en renvoyant le dernier message utilisateur, avec un décompte de jetons.
+Avec "stream": true, la réponse est envoyée en SSE comme l'API OpenAI : un
+fragment par mot, le premier après --latency secondes, les suivants toutes
+les --token-interval secondes, puis le décompte (stream_options.include_usage)
+et "data: [DONE]". --words N ajoute N mots à la réponse (réponses longues).
+Les en-têtes X-Stub-Latency (secondes) et X-Stub-Status (code HTTP)
+remplacent ces valeurs pour une requête. Les appels abandonnés par le
+client (passerelle qui annule) sont comptés dans GET /stats.
+
+Usage:
+    python ai_stub_server.py --port 8001 --latency 2
+    python ai_stub_server.py --port 8001 --latency 1 --token-interval 0.05 --words 200
+    AI_GATEWAY_URL=http://127.0.0.1:8001/v1 uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="NexusBI AI stub")
+app.state.latency = 0.5
+app.state.token_interval = 0.02
+app.state.words = 0
+stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0, "completed": 0, "cancelled": 0}
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+async def _wait(request: Request, seconds: float) -> bool:
+    """Attend seconds secondes ; False si le client s'est déconnecté entre-temps"""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        await asyncio.sleep(min(0.05, max(deadline - time.monotonic(), 0)))
+        if await request.is_disconnected():
+            return False
+    return True
+
+
+def _usage(messages, text: str, max_tokens) -> dict:
+    prompt_tokens = sum(_tokens(m.get("content", "")) for m in messages)
+    completion_tokens = min(_tokens(text), int(max_tokens or 1024))
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+async def _stream(request: Request, body: dict, messages, text: str, latency: float):
+    """Fragments SSE au format OpenAI (chat.completion.chunk)"""
+    chunk_id = f"stub-{stats['requests']}"
+    model = body.get("model", "stub")
+
+    def chunk(delta: dict, finish_reason=None, **extra) -> bytes:
+        data = {
+            "id": chunk_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+            **extra,
+        }
+        return f"data: {json.dumps(data)}\n\n".encode()
+
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        delay = latency
+        for word in re.findall(r"\S+\s*", text):
+            if not await _wait(request, delay):
+                stats["cancelled"] += 1
+                return
+            yield chunk({"content": word})
+            delay = app.state.token_interval
+        yield chunk({}, "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield chunk(None, usage=_usage(messages, text, body.get("max_tokens")))
+        yield b"data: [DONE]\n\n"
+        stats["completed"] += 1
+    except asyncio.CancelledError:
+        stats["cancelled"] += 1
+        raise
+    finally:
+        stats["in_flight"] -= 1
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    latency = float(request.headers.get("x-stub-latency", app.state.latency))
+    status_code = int(request.headers.get("x-stub-status", 200))
+    messages = body.get("messages") or []
+    prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+
+    text = f"[stub] {prompt}" + "".join(f" mot{i}" for i in range(app.state.words))
+
+    stats["requests"] += 1
+    if status_code == 200 and body.get("stream"):
+        return StreamingResponse(_stream(request, body, messages, text, latency), media_type="text/event-stream")
+
+    # Sans flux : même durée totale que le flux (premier mot puis un intervalle par mot)
+    latency += app.state.token_interval * max(len(text.split()) - 1, 0)
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        if not await _wait(request, latency):
+            stats["cancelled"] += 1
+            return JSONResponse({"error": {"message": "client disconnected"}}, status_code=499)
+    finally:
+        stats["in_flight"] -= 1
+    stats["completed"] += 1
+
+    if status_code != 200:
+        return JSONResponse({"error": {"message": "stub error", "code": status_code}}, status_code=status_code)
+
+    return {
+        "id": f"stub-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": _usage(messages, text, body.get("max_tokens")),
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="délai de réponse (premier mot) en secondes")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="délai entre deux mots en secondes")
+    parser.add_argument("--words", type=int, default=0, help="nombre de mots ajoutés à chaque réponse")
+    args = parser.parse_args()
+
+    app.state.latency = args.latency
+    app.state.token_interval = args.token_interval
+    app.state.words = args.words
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""dataframe_data (data_source_id, row_index) index and data_versions table
+
+Toutes les lectures de dataframe_data filtrent par data_source_id et trient par
+row_index ; les suppressions à la resynchronisation et les comptages faisaient un
+parcours complet de la table. data_versions conserve le nombre de lignes et la
+version des données de chaque source.
+
+Revision ID: 0002_dataframe_data_index
+Revises: 0001_baseline
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_dataframe_data_index'
+down_revision: Union[str, None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Les scripts d'initialisation (init_db.py, ...) créent le schéma avec create_all :
+    # ne créer que ce qui manque
+    inspector = sa.inspect(op.get_bind())
+    indexes = {index['name'] for index in inspector.get_indexes('dataframe_data')}
+
+    if 'ix_dataframe_data_source_row' not in indexes:
+        op.create_index(
+            'ix_dataframe_data_source_row', 'dataframe_data', ['data_source_id', 'row_index']
+        )
+
+    if 'data_versions' in inspector.get_table_names():
+        return
+
+    op.create_table(
+        'data_versions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('data_source_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('column_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['data_source_id'], ['data_sources.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('data_source_id'),
+    )
+    op.create_index('ix_data_versions_id', 'data_versions', ['id'])
+
+    # Compter une fois les lignes déjà stockées (column_count reste inconnu : 0)
+    op.execute(
+        """
+        INSERT INTO data_versions (data_source_id, version, row_count, column_count)
+        SELECT data_source_id, 1, COUNT(*), 0
+        FROM dataframe_data
+        GROUP BY data_source_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_data_versions_id', table_name='data_versions')
+    op.drop_table('data_versions')
+    op.drop_index('ix_dataframe_data_source_row', table_name='dataframe_data')
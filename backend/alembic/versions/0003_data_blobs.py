@@ -0,0 +1,49 @@
+"""data_blobs table
+
+Valeurs volumineuses (base64, blobs) retirées des lignes de dataframe_data et
+stockées une fois par cellule (voir app/services/blob_store.py).
+
+Revision ID: 0003_data_blobs
+Revises: 0002_dataframe_data_index
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_data_blobs'
+down_revision: Union[str, None] = '0002_dataframe_data_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Les scripts d'initialisation (init_db.py, ...) créent le schéma avec create_all :
+    # ne créer que ce qui manque
+    inspector = sa.inspect(op.get_bind())
+    if 'data_blobs' in inspector.get_table_names():
+        return
+
+    op.create_table(
+        'data_blobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('data_source_id', sa.Integer(), nullable=False),
+        sa.Column('row_index', sa.Integer(), nullable=False),
+        sa.Column('column_name', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['data_source_id'], ['data_sources.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_data_blobs_id', 'data_blobs', ['id'])
+    op.create_index('ix_data_blobs_data_source_id', 'data_blobs', ['data_source_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_data_blobs_data_source_id', table_name='data_blobs')
+    op.drop_index('ix_data_blobs_id', table_name='data_blobs')
+    op.drop_table('data_blobs')
@@ -1,19 +1,23 @@
-from typing import Any, List, Optional, Dict
+from typing import Any, List, Optional, Dict, Tuple
 from pydantic import BaseModel
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import models
-from app.core.deps import get_current_active_user, get_db
+from app.core.deps import get_async_db, get_current_active_user, get_db
 from app.core.config import settings
-from app.services.data_analysis import DataAnalyzer
-from app.services.data_visualization import DataVisualizer
-from app.services.data_sources.factory import DataSourceFactory
-import pandas as pd
+from app.core.responses import EventStreamResponse
+from app.services.ai_cache import (
+    ResponseKey, ai_response_cache, cached_sse_events, project_data_version, response_cache_key
+)
+from app.services.ai_gateway import AIGatewayBusy, AIGatewayError, AIStream, ai_gateway, sse_events
 import json
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class AIQueryRequest(BaseModel):
     query: str
@@ -36,19 +40,8 @@ class AISuggestion(BaseModel):
     confidence: float
     category: str
 
-@router.post("/query", response_model=AIResponse)
-def process_ai_query(
-    *,
-    db: Session = Depends(get_db),
-    request: AIQueryRequest,
-) -> Any:
-    """
-    Process AI query for data analysis using Gemini models.
-    """
-    # Debug logging
-    print(f"DEBUG: AI Query received - Query: {request.query}, Model: {request.model}")
-    print(f"DEBUG: Full request data: {request.dict()}")
-
+def _canned_response(request: AIQueryRequest) -> Tuple[str, List[str]]:
+    """Réponse de repli (sans fournisseur de modèle) et suggestions selon le thème de la requête"""
     # Check if query is related to data analysis
     if "data analysis" in request.query.lower() or "analyze" in request.query.lower():
         # Enhanced data analysis response with actual data processing
@@ -107,14 +100,115 @@ def process_ai_query(
             "Obtenir des suggestions de visualisation"
         ]
 
+    return response, suggestions
+
+
+async def _cache_key(request: AIQueryRequest, db: AsyncSession) -> ResponseKey:
+    """Clé du cache de réponses : question, modèle, paramètres et version des données du projet"""
+    return response_cache_key(
+        request.query, request.model, request.temperature,
+        context={"endpoint": "ai", "max_tokens": request.max_tokens, "project_id": request.project_id},
+        data_version=await project_data_version(db, request.project_id),
+    )
+
+
+@router.post("/query", response_model=AIResponse)
+async def process_ai_query(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    request: AIQueryRequest,
+    http_request: Request,
+    http_response: Response,
+) -> Any:
+    """
+    Process AI query for data analysis using Gemini models.
+
+    The model is called through the AI gateway (async, bounded concurrency,
+    cancelled if the client disconnects); without a configured provider the
+    canned answer from _canned_response is returned. Answers are cached per
+    query, model, parameters and project data version (X-AI-Cache header
+    on a cache hit).
+    """
+    logger.debug("AI query received - model: %s, request: %s", request.model, request.dict())
+
+    response, suggestions = _canned_response(request)
+
+    cache_key = await _cache_key(request, db)
+    cached = ai_response_cache.get(cache_key)
+    if cached is not None:
+        http_response.headers["X-AI-Cache"] = cached.tier
+        return {
+            "response": cached.text,
+            "model_used": request.model,
+            "tokens_used": cached.tokens_used,
+            "suggestions": suggestions
+        }
+
+    try:
+        completion = await ai_gateway.complete(
+            [{"role": "user", "content": request.query}],
+            request.model,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            request=http_request,
+            fallback=response,
+        )
+    except AIGatewayError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": "1"} if isinstance(e, AIGatewayBusy) else None,
+        )
+    ai_response_cache.put(cache_key, completion.text, completion.tokens_used)
+
     return {
-        "response": response,
+        "response": completion.text,
         "model_used": request.model,
-        "tokens_used": random.randint(50, request.max_tokens),
+        "tokens_used": completion.tokens_used,
         "suggestions": suggestions
     }
 
 
+@router.post("/query/stream")
+async def stream_ai_query(*, db: AsyncSession = Depends(get_async_db), request: AIQueryRequest) -> Any:
+    """
+    Same as POST /query, answered as server-sent events: one "chunk" event
+    ({"delta": text}) per fragment as the model produces it, then "done"
+    ({"suggestions", "model_used", "tokens_used"}) or "error"
+    ({"detail", "status_code"}). Gateway limits (429/503) are answered
+    before the stream starts; a client disconnect cancels the model call.
+    A cached answer is sent as a single chunk ("cached" in "done").
+    """
+    response, suggestions = _canned_response(request)
+    final = {"suggestions": suggestions}
+
+    cache_key = await _cache_key(request, db)
+    cached = ai_response_cache.get(cache_key)
+    if cached is not None:
+        return EventStreamResponse(cached_sse_events(cached, {**final, "model_used": request.model}))
+
+    try:
+        stream = await ai_gateway.open_stream(
+            [{"role": "user", "content": request.query}],
+            request.model,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            fallback=response,
+        )
+    except AIGatewayError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": "1"} if isinstance(e, AIGatewayBusy) else None,
+        )
+
+    def store(stream: AIStream) -> None:
+        if stream.status == "completed":
+            ai_response_cache.put(cache_key, stream.text, stream.tokens_used)
+
+    return EventStreamResponse(sse_events(stream, final, on_end=store))
+
+
 @router.get("/suggestions", response_model=List[AISuggestion])
 def get_ai_suggestions(
     *,
@@ -215,6 +309,11 @@ def analyze_data(
     """
     Analyze data from a specific data source and provide treatment suggestions.
     """
+    # Services d'analyse et stratégies chargés au premier appel (pandas, drivers optionnels)
+    from app.services.data_analysis import DataAnalyzer
+    from app.services.data_visualization import DataVisualizer
+    from app.services.data_sources.factory import DataSourceFactory
+
     try:
         # Get data source from database
         data_source = db.query(models.DataSource).filter(
@@ -230,14 +329,14 @@ def analyze_data(
 
         # Load data using appropriate strategy
         try:
-            data_strategy = DataSourceFactory.get_source(
+            # Stratégie connectée, mise en cache tant que le fichier source n'a pas changé
+            data_strategy = DataSourceFactory.get_connected_source(
                 data_source.type,
                 {
                     'file_path': data_source.file_path,
                     'connection_string': data_source.connection_string
                 }
             )
-            data_strategy.connect()
             df = data_strategy.get_data()
         except Exception as e:
             raise HTTPException(
@@ -291,6 +390,9 @@ def generate_data_cleaning_code(
     """
     Generate Python code for data cleaning based on analysis.
     """
+    from app.services.data_analysis import DataAnalyzer
+    from app.services.data_sources.factory import DataSourceFactory
+
     try:
         # Get data source from database
         data_source = db.query(models.DataSource).filter(
@@ -306,14 +408,14 @@ def generate_data_cleaning_code(
 
         # Load data using appropriate strategy
         try:
-            data_strategy = DataSourceFactory.get_source(
+            # Stratégie connectée, mise en cache tant que le fichier source n'a pas changé
+            data_strategy = DataSourceFactory.get_connected_source(
                 data_source.type,
                 {
                     'file_path': data_source.file_path,
                     'connection_string': data_source.connection_string
                 }
             )
-            data_strategy.connect()
             df = data_strategy.get_data()
         except Exception as e:
             raise HTTPException(
@@ -3,25 +3,45 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
 from app.core import security
 from app.core.config import settings
-from app.core.deps import get_db, get_current_active_user
+from app.core.deps import get_async_db, get_current_active_user
+from app.core.executor import ExecutorBusy
 
 router = APIRouter()
 
 
+def _password_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Serveur occupé, réessayez plus tard",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/access-token", response_model=schemas.Token)
-def login_access_token(
-    db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+async def login_access_token(
+    db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = (
+        await db.execute(select(models.User).where(models.User.email == form_data.username))
+    ).scalars().first()
+    # Rendre la connexion au pool avant d'attendre bcrypt (les attributs chargés restent lisibles)
+    await db.close()
+    try:
+        valid = user is not None and await security.verify_password_async(
+            form_data.password, user.hashed_password, user_id=user.id
+        )
+    except ExecutorBusy:
+        raise _password_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect email or password"
@@ -41,28 +61,35 @@ def login_access_token(
 
 
 @router.post("/register", response_model=schemas.User)
-def register(
+async def register(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_in: schemas.UserCreate,
 ) -> Any:
     """
     Create new user.
     """
-    user = db.query(models.User).filter(models.User.email == user_in.email).first()
+    user = (
+        await db.execute(select(models.User).where(models.User.email == user_in.email))
+    ).scalars().first()
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this username already exists in the system.",
         )
+    await db.close()
+    try:
+        hashed_password = await security.get_password_hash_async(user_in.password)
+    except ExecutorBusy:
+        raise _password_busy()
     user = models.User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         full_name=user_in.full_name,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
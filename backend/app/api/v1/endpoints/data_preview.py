@@ -19,8 +19,6 @@ from sqlalchemy.orm import Session
 from app.core.deps import get_db
 from app.models.user import User
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -1,19 +1,39 @@
-from typing import Any, List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 from datetime import datetime
+import base64
+import codecs
 import json
+import logging
+import os
 import re
 import pandas as pd
 import io
 import numpy as np
 from collections import Counter
+from contextlib import asynccontextmanager
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import models, schemas
-from app.core.deps import get_current_active_user, get_db
+from app.core.deps import get_async_db, get_current_active_user, get_db
+from app.core.executor import ExecutorBusy, pandas_executor
+from app.core.memory import MemoryBudgetExceeded, estimate_source_bytes, memory_budget, track_memory
+from app.core.metrics import record_ingest
+from app.core.tracing import job, span
+from app.core.responses import NumpyJSONResponse, records_from_dataframe
+from app.db.write_queue import run_write
+from app.services.blob_store import delete_dataframe_data, get_blob, store_dataframe_rows
+from app.services.chart_renderer import CHART_TYPES, chart_cache_key, etag_matches, render_chart
+from app.services.correlation import DEFAULT_TOP_K, get_correlations, get_correlations_async, matrix_as_dict, top_pairs
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Lignes DataFrameData lues par lot lors de la reconstruction d'un DataFrame
+ROW_FETCH_SIZE = 10_000
 
 
 @router.get("/", response_model=List[schemas.DataSource])
@@ -141,8 +161,8 @@ def delete_data_source(
     if not data_source:
         raise HTTPException(status_code=404, detail="Data source not found")
 
-    # Delete all associated DataFrame data first
-    db.query(models.DataFrameData).filter(models.DataFrameData.data_source_id == data_source_id).delete()
+    # Delete all associated DataFrame data, blobs and version first
+    delete_dataframe_data(db, data_source_id, drop_version=True)
 
     # Delete the data source
     db.delete(data_source)
@@ -155,6 +175,7 @@ def delete_data_source(
 async def sync_data_source(
     *,
     db: Session = Depends(get_db),
+    response: Response,
     data_source_id: int,
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
@@ -173,6 +194,7 @@ async def sync_data_source(
     
     try:
         sync_result = await sync_service.sync_data_source(data_source_id)
+        response.headers["X-Job-Id"] = sync_result["job_id"]
         
         if sync_result["success"]:
             return {
@@ -181,16 +203,20 @@ async def sync_data_source(
                 "status": "connected",
                 "rows_updated": sync_result["rows_updated"],
                 "data_source_type": sync_result["data_source_type"],
-                "schema_info": sync_result["schema_info"]
+                "schema_info": sync_result["schema_info"],
+                "job_id": sync_result["job_id"]
             }
         else:
             raise HTTPException(
                 status_code=500,
-                detail=f"Erreur de synchronisation: {sync_result['message']}"
+                detail=f"Erreur de synchronisation: {sync_result['message']}",
+                headers={"X-Job-Id": sync_result["job_id"]}
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Erreur lors de la synchronisation: {str(e)}")
+        logger.error("Erreur lors de la synchronisation de la source %s: %s", data_source_id, e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Erreur interne lors de la synchronisation: {str(e)}"
@@ -202,6 +228,7 @@ async def sync_data_source(
 async def sync_data_source_demo(
     *,
     db: Session = Depends(get_db),
+    response: Response,
     data_source_id: int,
 ) -> Any:
     """
@@ -219,6 +246,7 @@ async def sync_data_source_demo(
     
     try:
         sync_result = await sync_service.sync_data_source(data_source_id)
+        response.headers["X-Job-Id"] = sync_result["job_id"]
         
         if sync_result["success"]:
             return {
@@ -227,16 +255,20 @@ async def sync_data_source_demo(
                 "status": "connected",
                 "rows_updated": sync_result["rows_updated"],
                 "data_source_type": sync_result["data_source_type"],
-                "schema_info": sync_result["schema_info"]
+                "schema_info": sync_result["schema_info"],
+                "job_id": sync_result["job_id"]
             }
         else:
             raise HTTPException(
                 status_code=500,
-                detail=f"Erreur de synchronisation: {sync_result['message']}"
+                detail=f"Erreur de synchronisation: {sync_result['message']}",
+                headers={"X-Job-Id": sync_result["job_id"]}
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Erreur lors de la synchronisation: {str(e)}")
+        logger.error("Erreur lors de la synchronisation de la source %s: %s", data_source_id, e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Erreur interne lors de la synchronisation: {str(e)}"
@@ -250,7 +282,7 @@ async def analyze_file(
     Analyze a file to detect encoding, delimiter, and basic structure.
     """
     try:
-        print(f"🔍 Analyzing file: {file.filename}, size: {file.size}")
+        logger.debug("Analyzing file %s (%s bytes)", file.filename, file.size)
 
         # Validate file type
         allowed_extensions = ['.csv', '.xlsx', '.xls', '.json', '.txt', '.sql']
@@ -290,7 +322,7 @@ async def analyze_file(
                                     rows = text_content.count('\n') + 1
                                     break
                             except Exception as e:
-                                print(f"⚠️  CSV test failed with delimiter '{delim}': {e}")
+                                logger.debug("CSV test failed with delimiter %r: %s", delim, e)
                                 continue
 
                     if detected_delimiter:
@@ -299,7 +331,7 @@ async def analyze_file(
                 except UnicodeDecodeError:
                     continue
                 except Exception as e:
-                    print(f"⚠️  CSV analysis failed with encoding {encoding}: {e}")
+                    logger.debug("CSV analysis failed with encoding %s: %s", encoding, e)
                     continue
 
             if not detected_encoding:
@@ -406,75 +438,35 @@ async def analyze_file(
             }
 
     except Exception as e:
-        print(f"❌ Analysis error: {str(e)}")
+        logger.error("Analysis error: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error analyzing file: {str(e)}")
 
 
-@router.post("/upload", response_model=schemas.DataSource)
-async def upload_data_source(
-    *,
-    db: Session = Depends(get_db),
-    file: UploadFile = File(...),
-    name: str = None,
-    project_id: int = 1,
-) -> Any:
+def _parse_uploaded_file(content: bytes, file_extension: str, full_file_path: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
     """
-    Upload a file and create a data source with DataFrame data.
-    Automatically saves the file to UPLOAD_DIR and stores the full path.
-    """
-    try:
-        print(f"📁 Upload started: {file.filename}, size: {file.size}")
-
-        # Validate file type
-        allowed_extensions = ['.csv', '.xlsx', '.xls', '.json', '.txt', '.sql']
-        file_extension = '.' + file.filename.split('.')[-1].lower()
-
-        if file_extension not in allowed_extensions:
-            raise HTTPException(status_code=400, detail=f"File type {file_extension} not supported")
-
-        print(f"📄 File type validated: {file_extension}")
-
-        # Read file content
-        content = await file.read()
-        print(f"📖 File content read: {len(content)} bytes")
-        
-        # Save file permanently to UPLOAD_DIR and store full path
-        from app.core.config import settings
-        import os
-        import uuid
-        
-        # Create UPLOAD_DIR if it doesn't exist
-        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-        
-        # Generate unique filename to avoid conflicts
-        file_id = str(uuid.uuid4())
-        safe_filename = f"{file_id}_{file.filename}"
-        full_file_path = os.path.join(settings.UPLOAD_DIR, safe_filename)
-        
-        # Save the file permanently
-        with open(full_file_path, 'wb') as f:
-            f.write(content)
-        
-        print(f"💾 File saved permanently: {full_file_path}")
-        print(f"📍 Full path stored in database: {full_file_path}")
+    Lit un fichier envoyé (CSV, Excel, JSON, TXT, dump SQL) et construit son schema_info
 
-        # Process file with pandas based on type
-        if file_extension == '.csv':
-            # Try different encodings for CSV files
-            encodings_to_try = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-            df = None
-            detected_encoding = None
-            detected_delimiter = None
-
-            for encoding in encodings_to_try:
-                try:
+    Travail pandas bloquant : exécuté dans pandas_executor par upload_data_source.
+    """
+    # Process file with pandas based on type
+    if file_extension == '.csv':
+        # Try different encodings for CSV files
+        encodings_to_try = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+        df = None
+        detected_encoding = None
+        detected_delimiter = None
+
+        for encoding in encodings_to_try:
+            try:
+                with span("decode", encoding=encoding, bytes=len(content)):
                     text_content = content.decode(encoding)
-                    # Try to detect delimiter automatically
-                    sample = text_content[:1024]  # First 1KB for detection
-                    detected_delimiter = None
+                # Try to detect delimiter automatically
+                sample = text_content[:1024]  # First 1KB for detection
+                detected_delimiter = None
 
-                    # Common delimiters to try
-                    delimiters = [',', ';', '\t', '|']
+                # Common delimiters to try
+                delimiters = [',', ';', '\t', '|']
+                with span("sniff_delimiter") as stage:
                     for delim in delimiters:
                         if delim in sample:
                             try:
@@ -484,39 +476,43 @@ async def upload_data_source(
                                     break
                             except:
                                 continue
+                    stage.set(delimiter=detected_delimiter or "auto")
 
-                    # If no delimiter detected, try pandas auto-detection
+                # If no delimiter detected, try pandas auto-detection
+                with span("read_csv", bytes=len(content)) as stage:
                     if detected_delimiter is None:
                         df = pd.read_csv(io.StringIO(text_content), sep=None, engine='python')
                     else:
                         df = pd.read_csv(io.StringIO(text_content), sep=detected_delimiter)
+                    stage.set(rows=len(df), columns=len(df.columns))
 
-                    detected_encoding = encoding
-                    print(f"✅ CSV processed successfully - Encoding: {encoding}, Delimiter: '{detected_delimiter or 'auto'}', Shape: {df.shape}")
-                    break
+                detected_encoding = encoding
+                logger.debug("CSV processed - encoding: %s, delimiter: %r, shape: %s", encoding, detected_delimiter or 'auto', df.shape)
+                break
 
-                except UnicodeDecodeError:
-                    continue
-                except Exception as e:
-                    print(f"⚠️  Failed with {encoding}: {e}")
-                    continue
+            except UnicodeDecodeError:
+                continue
+            except Exception as e:
+                logger.debug("CSV parsing failed with %s: %s", encoding, e)
+                continue
 
-            if df is None:
-                raise HTTPException(status_code=400, detail="Unable to process CSV file. Supported encodings: UTF-8, Latin-1, CP1252, ISO-8859-1")
+        if df is None:
+            raise HTTPException(status_code=400, detail="Unable to process CSV file. Supported encodings: UTF-8, Latin-1, CP1252, ISO-8859-1")
 
-            # Store processing info in schema
-            processing_info = {
-                "detected_encoding": detected_encoding,
-                "detected_delimiter": detected_delimiter,
-                "processing_method": "pandas_csv"
-            }
-            
-            # Validate CSV structure - but be more tolerant
-            try:
+        # Store processing info in schema
+        processing_info = {
+            "detected_encoding": detected_encoding,
+            "detected_delimiter": detected_delimiter,
+            "processing_method": "pandas_csv"
+        }
+        
+        # Validate CSV structure - but be more tolerant
+        try:
+            with span("validate_structure"):
                 # Read a larger sample to check for structural issues
                 sample_df = pd.read_csv(io.StringIO(text_content), sep=detected_delimiter or ',', nrows=100, on_bad_lines='skip')
                 expected_cols = len(sample_df.columns)
-                
+            
                 # Check for rows with different column counts - but don't fail
                 lines = text_content.split('\n')
                 problematic_lines = []
@@ -525,80 +521,86 @@ async def upload_data_source(
                         col_count = len(line.split(detected_delimiter or ','))
                         if col_count != expected_cols:
                             problematic_lines.append(f"Line {i+1}: expected {expected_cols} fields, got {col_count}")
-                
+            
                 if problematic_lines:
-                    print(f"⚠️  CSV structure issues detected: {len(problematic_lines)} problematic lines (tolerated)")
+                    logger.warning("CSV structure issues detected: %d problematic lines (tolerated)", len(problematic_lines))
                     # Add warning to processing info but don't fail
                     processing_info["structure_warnings"] = problematic_lines[:5]  # Keep first 5 warnings
                     processing_info["tolerated_structure_issues"] = True
-                    
-            except Exception as e:
-                print(f"⚠️  CSV structure validation failed: {e} (continuing anyway)")
-                # Don't fail - just log the issue
+                
+        except Exception as e:
+            logger.warning("CSV structure validation failed: %s (continuing anyway)", e)
+            # Don't fail - just log the issue
 
-        elif file_extension in ['.xlsx', '.xls']:
-            try:
+    elif file_extension in ['.xlsx', '.xls']:
+        try:
+            with span("read_excel", bytes=len(content)) as stage:
                 df = pd.read_excel(io.BytesIO(content))
-                processing_info = {
-                    "detected_encoding": "utf-8",
-                    "detected_delimiter": None,
-                    "processing_method": "pandas_excel",
-                    "sheet_names": getattr(df, 'sheet_names', None) if hasattr(pd, 'ExcelFile') else None
-                }
-                print(f"✅ Excel file processed successfully - Shape: {df.shape}")
-            except Exception as e:
-                print(f"❌ Excel file processing failed: {e}")
-                raise HTTPException(status_code=400, detail=f"Unable to process Excel file: {str(e)}")
-                
-        elif file_extension == '.json':
-            try:
+                stage.set(rows=len(df), columns=len(df.columns))
+            processing_info = {
+                "detected_encoding": "utf-8",
+                "detected_delimiter": None,
+                "processing_method": "pandas_excel",
+                "sheet_names": getattr(df, 'sheet_names', None) if hasattr(pd, 'ExcelFile') else None
+            }
+            logger.debug("Excel file processed - shape: %s", df.shape)
+        except Exception as e:
+            logger.error("Excel file processing failed: %s", e)
+            raise HTTPException(status_code=400, detail=f"Unable to process Excel file: {str(e)}")
+            
+    elif file_extension == '.json':
+        try:
+            with span("read_json", bytes=len(content)) as stage:
                 df = pd.read_json(io.BytesIO(content))
+                stage.set(rows=len(df), columns=len(df.columns))
+            processing_info = {
+                "detected_encoding": "utf-8",
+                "detected_delimiter": None,
+                "processing_method": "pandas_json",
+                "json_structure": "flat" if len(df.shape) == 2 else "nested"
+            }
+            logger.debug("JSON file processed - shape: %s", df.shape)
+        except Exception as e:
+            logger.warning("JSON file processing failed: %s", e)
+            # Essayer une approche alternative pour JSON
+            try:
+                # Lire comme JSON normal et convertir en DataFrame
+                json_data = json.loads(content.decode('utf-8'))
+                if isinstance(json_data, list):
+                    df = pd.DataFrame(json_data)
+                elif isinstance(json_data, dict):
+                    # Si c'est un objet, essayer de l'aplatir
+                    df = pd.json_normalize(json_data)
+                else:
+                    raise ValueError("Unsupported JSON structure")
+                
                 processing_info = {
                     "detected_encoding": "utf-8",
                     "detected_delimiter": None,
-                    "processing_method": "pandas_json",
-                    "json_structure": "flat" if len(df.shape) == 2 else "nested"
+                    "processing_method": "pandas_json_fallback",
+                    "json_structure": "converted_from_object"
                 }
-                print(f"✅ JSON file processed successfully - Shape: {df.shape}")
-            except Exception as e:
-                print(f"❌ JSON file processing failed: {e}")
-                # Essayer une approche alternative pour JSON
-                try:
-                    # Lire comme JSON normal et convertir en DataFrame
-                    json_data = json.loads(content.decode('utf-8'))
-                    if isinstance(json_data, list):
-                        df = pd.DataFrame(json_data)
-                    elif isinstance(json_data, dict):
-                        # Si c'est un objet, essayer de l'aplatir
-                        df = pd.json_normalize(json_data)
-                    else:
-                        raise ValueError("Unsupported JSON structure")
-                    
-                    processing_info = {
-                        "detected_encoding": "utf-8",
-                        "detected_delimiter": None,
-                        "processing_method": "pandas_json_fallback",
-                        "json_structure": "converted_from_object"
-                    }
-                    print(f"✅ JSON file processed with fallback - Shape: {df.shape}")
-                except Exception as fallback_error:
-                    print(f"❌ JSON fallback also failed: {fallback_error}")
-                    raise HTTPException(status_code=400, detail=f"Unable to process JSON file: {str(fallback_error)}")
-        elif file_extension == '.txt':
-            # Try different encodings for TXT files
-            encodings_to_try = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-            df = None
-            detected_encoding = None
-            detected_delimiter = None
-
-            for encoding in encodings_to_try:
-                try:
+                logger.debug("JSON file processed with fallback - shape: %s", df.shape)
+            except Exception as fallback_error:
+                logger.error("JSON fallback also failed: %s", fallback_error)
+                raise HTTPException(status_code=400, detail=f"Unable to process JSON file: {str(fallback_error)}")
+    elif file_extension == '.txt':
+        # Try different encodings for TXT files
+        encodings_to_try = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+        df = None
+        detected_encoding = None
+        detected_delimiter = None
+
+        for encoding in encodings_to_try:
+            try:
+                with span("decode", encoding=encoding, bytes=len(content)):
                     text_content = content.decode(encoding)
-                    
-                    # Try different delimiters
-                    delimiters = [',', ';', '\t', '|', ' ']
-                    detected_delimiter = None
-                    
+                
+                # Try different delimiters
+                delimiters = [',', ';', '\t', '|', ' ']
+                detected_delimiter = None
+                
+                with span("sniff_delimiter") as stage:
                     for delim in delimiters:
                         if delim in text_content[:1000]:  # Check first 1000 chars
                             try:
@@ -608,262 +610,293 @@ async def upload_data_source(
                                     break
                             except:
                                 continue
-                    
-                    # If no delimiter detected, try pandas auto-detection
-                    try:
+                    stage.set(delimiter=detected_delimiter or "auto")
+                
+                # If no delimiter detected, try pandas auto-detection
+                try:
+                    with span("read_csv", bytes=len(content)) as stage:
                         if detected_delimiter is None:
                             df = pd.read_csv(io.StringIO(text_content), sep=None, engine='python', on_bad_lines='skip')
                         else:
                             df = pd.read_csv(io.StringIO(text_content), sep=detected_delimiter, on_bad_lines='skip')
-                    except Exception as parse_error:
-                        print(f"⚠️  TXT parsing failed with detected delimiter: {parse_error}")
-                        # Try fallback: read as single column
-                        lines = text_content.split('\n')
-                        df = pd.DataFrame({'content': lines})
-                        detected_delimiter = None
-                        print(f"✅ TXT fallback processed as single column - Shape: {df.shape}")
-
-                    detected_encoding = encoding
-                    print(f"✅ TXT processed successfully - Encoding: {encoding}, Delimiter: '{detected_delimiter or 'auto'}', Shape: {df.shape}")
-                    break
-
-                except UnicodeDecodeError:
-                    continue
-                except Exception as e:
-                    print(f"⚠️  Failed TXT processing with {encoding}: {e}")
-                    continue
-
-            if df is None:
-                # Fallback: try to read as simple text file
-                try:
-                    text_content = content.decode('utf-8', errors='ignore')
+                        stage.set(rows=len(df), columns=len(df.columns))
+                except Exception as parse_error:
+                    logger.debug("TXT parsing failed with detected delimiter: %s", parse_error)
+                    # Try fallback: read as single column
                     lines = text_content.split('\n')
-                    # Create simple DataFrame with single column
                     df = pd.DataFrame({'content': lines})
-                    detected_encoding = 'utf-8'
-                    print(f"✅ TXT fallback processed as single column - Shape: {df.shape}")
-                except Exception as e:
-                    raise HTTPException(status_code=400, detail=f"Unable to process TXT file: {str(e)}")
+                    detected_delimiter = None
+                    logger.debug("TXT fallback processed as single column - shape: %s", df.shape)
 
-            # Store processing info for TXT
-            processing_info = {
-                "detected_encoding": detected_encoding,
-                "detected_delimiter": detected_delimiter,
-                "processing_method": "pandas_txt"
-            }
-        elif file_extension == '.sql':
-            # Process SQL dump file using the strategy
+                detected_encoding = encoding
+                logger.debug("TXT processed - encoding: %s, delimiter: %r, shape: %s", encoding, detected_delimiter or 'auto', df.shape)
+                break
+
+            except UnicodeDecodeError:
+                continue
+            except Exception as e:
+                logger.debug("TXT processing failed with %s: %s", encoding, e)
+                continue
+
+        if df is None:
+            # Fallback: try to read as simple text file
             try:
-                from app.services.data_sources.factory import DataSourceFactory
-                
-                # Save file temporarily for analysis
-                import tempfile
-                import os
-                
-                with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.sql') as tmp_file:
-                    tmp_file.write(content)
-                    tmp_file_path = tmp_file.name
-                
+                text_content = content.decode('utf-8', errors='ignore')
+                lines = text_content.split('\n')
+                # Create simple DataFrame with single column
+                df = pd.DataFrame({'content': lines})
+                detected_encoding = 'utf-8'
+                logger.debug("TXT fallback processed as single column - shape: %s", df.shape)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Unable to process TXT file: {str(e)}")
+
+        # Store processing info for TXT
+        processing_info = {
+            "detected_encoding": detected_encoding,
+            "detected_delimiter": detected_delimiter,
+            "processing_method": "pandas_txt"
+        }
+    elif file_extension == '.sql':
+        # Process SQL dump file using the strategy
+        try:
+            from app.services.data_sources.factory import DataSourceFactory
+            
+            # Try different encodings
+            encodings_to_try = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+            detected_encoding = None
+            
+            for encoding in encodings_to_try:
                 try:
-                    # Try different encodings
-                    encodings_to_try = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-                    detected_encoding = None
-                    
-                    for encoding in encodings_to_try:
-                        try:
-                            # Test if we can read the file with this encoding
-                            with open(tmp_file_path, 'r', encoding=encoding) as f:
-                                sample = f.read(1024)  # Read first 1KB
-                            
-                            # Check if it contains SQL statements
-                            if 'CREATE TABLE' in sample.upper() or 'INSERT INTO' in sample.upper():
-                                detected_encoding = encoding
-                                break
-                        except UnicodeDecodeError:
-                            continue
-                    
-                    if not detected_encoding:
-                        detected_encoding = 'utf-8'  # Default fallback
+                    # Test if we can read the file with this encoding
+                    # Incremental decoder: a character cut at the end of the chunk is not an error
+                    sample = codecs.getincrementaldecoder(encoding)().decode(content[:4096])[:1024]  # First 1KB
                     
-                    # Use SQL dump strategy to analyze the file
-                    factory = DataSourceFactory()
-                    strategy = factory.get_source('sql_dump', {
-                        'file_path': tmp_file_path,
-                        'encoding': detected_encoding
-                    })
+                    # Check if it contains SQL statements
+                    if 'CREATE TABLE' in sample.upper() or 'INSERT INTO' in sample.upper():
+                        detected_encoding = encoding
+                        break
+                except UnicodeDecodeError:
+                    continue
+            
+            if not detected_encoding:
+                detected_encoding = 'utf-8'  # Default fallback
+            
+            # Analyze the saved file: the connected strategy is cached, so the schema
+            # step below and the next sync of this file reuse the parsed dump
+            strategy = DataSourceFactory.get_connected_source('sql_dump', {
+                'file_path': full_file_path,
+                'encoding': detected_encoding
+            })
+            
+            # Get schema information
+            schema = strategy.get_schema()
+            tables_count = len(schema.get('tables', []))
+            
+            # Get all data from all tables - NO LIMIT for complete data storage
+            all_table_data = strategy.get_all_table_data()  # Get ALL data, not just preview
+            
+            # Combine all tables into a single DataFrame
+            with span("combine_tables", tables=len(all_table_data or {})) as stage:
+                if all_table_data:
+                    all_dataframes = []
+                    for table_name, table_df in all_table_data.items():
+                        # Add table name column to identify source
+                        table_df_with_source = table_df.copy()
+                        table_df_with_source.insert(0, '_source_table', table_name)
+                        all_dataframes.append(table_df_with_source)
                     
-                    strategy.connect()
+                    combined_df = pd.concat(all_dataframes, ignore_index=True, sort=False)
+                else:
+                    combined_df = pd.DataFrame()
+                stage.set(rows=len(combined_df))
+            
+            # Store processing info in schema
+            processing_info = {
+                "detected_encoding": detected_encoding,
+                "tables_count": tables_count,
+                "processing_method": "sql_dump_parser",
+                "total_data_rows": len(combined_df),  # Store actual rows count
+                "tables_processed": list(all_table_data.keys()) if all_table_data else []
+            }
+            
+            logger.debug("SQL dump processed - encoding: %s, tables: %s, total rows: %d", detected_encoding, tables_count, len(combined_df))
+            
+            # Use combined_df instead of df for further processing
+            df = combined_df
                     
-                    try:
-                        # Get schema information
-                        schema = strategy.get_schema()
-                        tables_count = len(schema.get('tables', []))
-                        
-                        # Get all data from all tables - NO LIMIT for complete data storage
-                        all_table_data = strategy.get_all_table_data()  # Get ALL data, not just preview
-                        
-                        # Combine all tables into a single DataFrame
-                        if all_table_data:
-                            all_dataframes = []
-                            for table_name, table_df in all_table_data.items():
-                                # Add table name column to identify source
-                                table_df_with_source = table_df.copy()
-                                table_df_with_source.insert(0, '_source_table', table_name)
-                                all_dataframes.append(table_df_with_source)
-                            
-                            combined_df = pd.concat(all_dataframes, ignore_index=True, sort=False)
-                        else:
-                            combined_df = pd.DataFrame()
-                        
-                        # Store processing info in schema
-                        processing_info = {
-                            "detected_encoding": detected_encoding,
-                            "tables_count": tables_count,
-                            "processing_method": "sql_dump_parser",
-                            "total_data_rows": len(combined_df),  # Store actual rows count
-                            "tables_processed": list(all_table_data.keys()) if all_table_data else []
-                        }
-                        
-                        print(f"✅ SQL dump processed successfully - Encoding: {detected_encoding}, Tables: {tables_count}, Total rows: {len(combined_df)}")
-                        
-                        # Use combined_df instead of df for further processing
-                        df = combined_df
-                        
-                    finally:
-                        strategy.disconnect()
-                        
-                finally:
-                    # Clean up temporary file
-                    if os.path.exists(tmp_file_path):
-                        os.unlink(tmp_file_path)
-                        
-            except Exception as e:
-                print(f"⚠️  SQL dump processing failed: {e}")
-                # Create empty DataFrame as fallback
-                df = pd.DataFrame()
-                processing_info = {
-                    "detected_encoding": "utf-8",
-                    "tables_count": 0,
-                    "processing_method": "sql_dump_fallback",
-                    "error": str(e),
-                    "fallback": True
-                }
-                print(f"⚠️  SQL dump processing failed, using fallback: {e}")
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file format: {file_extension}")
-        
-        # Ensure processing_info is always defined
-        if 'processing_info' not in locals():
+        except Exception as e:
+            logger.warning("SQL dump processing failed: %s", e)
+            # Create empty DataFrame as fallback
+            df = pd.DataFrame()
             processing_info = {
                 "detected_encoding": "utf-8",
-                "detected_delimiter": None,
-                "processing_method": "unknown",
+                "tables_count": 0,
+                "processing_method": "sql_dump_fallback",
+                "error": str(e),
                 "fallback": True
             }
+            logger.warning("SQL dump processing failed, using fallback: %s", e)
+    else:
+        raise HTTPException(status_code=400, detail=f"Unsupported file format: {file_extension}")
+    
+    # Ensure processing_info is always defined
+    if 'processing_info' not in locals():
+        processing_info = {
+            "detected_encoding": "utf-8",
+            "detected_delimiter": None,
+            "processing_method": "unknown",
+            "fallback": True
+        }
 
-        print(f"📊 DataFrame created: {len(df)} rows, {len(df.columns)} columns")
+    logger.debug("DataFrame created: %d rows, %d columns", len(df), len(df.columns))
 
-        # Create schema info based on file type
-        if file_extension == '.sql':
-            # For SQL dumps, create a more complex schema with table information
-            try:
-                # Get the strategy again to access schema information
-                factory = DataSourceFactory()
-                strategy = factory.get_source('sql_dump', {
-                    'file_path': file.filename,  # Use original filename
-                    'encoding': processing_info.get('detected_encoding', 'utf-8')
-                })
-                
-                # Create a temporary file to analyze
-                import tempfile
-                import os
-                
-                with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.sql') as tmp_file:
-                    tmp_file.write(content)
-                    tmp_file_path = tmp_file.name
-                
-                try:
-                    strategy_temp = factory.get_source('sql_dump', {
-                        'file_path': tmp_file_path,
-                        'encoding': processing_info.get('detected_encoding', 'utf-8')
-                    })
+    # Create schema info based on file type
+    if file_extension == '.sql':
+        # For SQL dumps, create a more complex schema with table information
+        try:
+            # Get the strategy again to access schema information (cached, not re-parsed)
+            from app.services.data_sources.factory import DataSourceFactory
+            strategy = DataSourceFactory.get_connected_source('sql_dump', {
+                'file_path': full_file_path,
+                'encoding': processing_info.get('detected_encoding', 'utf-8')
+            })
+            
+            schema = strategy.get_schema()
+            schema_info = {
+                "tables": schema.get('tables', []),
+                "total_tables": len(schema.get('tables', [])),
+                "total_rows": sum(table.get('row_count', 0) for table in schema.get('tables', [])),
+                "row_count": len(df),  # Add row_count for frontend compatibility
+                "sample_data_columns": [{"name": col, "type": str(df[col].dtype)} for col in df.columns],
+                "sample_data_row_count": len(df),
+                "sample_data_column_count": len(df.columns),
+                "processing_info": processing_info
+            }
                     
-                    strategy_temp.connect()
-                    try:
-                        schema = strategy_temp.get_schema()
-                        schema_info = {
-                            "tables": schema.get('tables', []),
-                            "total_tables": len(schema.get('tables', [])),
-                            "total_rows": sum(table.get('row_count', 0) for table in schema.get('tables', [])),
-                            "row_count": len(df),  # Add row_count for frontend compatibility
-                            "sample_data_columns": [{"name": col, "type": str(df[col].dtype)} for col in df.columns],
-                            "sample_data_row_count": len(df),
-                            "sample_data_column_count": len(df.columns),
-                            "processing_info": processing_info
-                        }
-                    finally:
-                        strategy_temp.disconnect()
-                        
-                finally:
-                    if os.path.exists(tmp_file_path):
-                        os.unlink(tmp_file_path)
-                        
-            except Exception as e:
-                print(f"⚠️  Failed to get detailed SQL schema: {e}")
-                # Fallback schema for SQL files
-                schema_info = {
-                    "tables": [],
-                    "total_tables": 0,
-                    "total_rows": 0,
-                    "row_count": len(df),  # Add row_count for frontend compatibility
-                    "sample_data_columns": [{"name": col, "type": str(df[col].dtype)} for col in df.columns],
-                    "sample_data_row_count": len(df),
-                    "sample_data_column_count": len(df.columns),
-                    "processing_info": processing_info
-                }
-        else:
-            # For other file types, create standard schema
+        except Exception as e:
+            logger.warning("Failed to get detailed SQL schema: %s", e)
+            # Fallback schema for SQL files
             schema_info = {
-                "columns": [{"name": col, "type": str(df[col].dtype)} for col in df.columns],
-                "row_count": len(df),
-                "column_count": len(df.columns),
+                "tables": [],
+                "total_tables": 0,
+                "total_rows": 0,
+                "row_count": len(df),  # Add row_count for frontend compatibility
+                "sample_data_columns": [{"name": col, "type": str(df[col].dtype)} for col in df.columns],
+                "sample_data_row_count": len(df),
+                "sample_data_column_count": len(df.columns),
                 "processing_info": processing_info
             }
-            
-            # Add specific info for Excel files
-            if file_extension in ['.xlsx', '.xls']:
-                schema_info["file_type_specific"] = {
-                    "format": file_extension[1:],
-                    "sheets_detected": len(df.columns) > 0,  # Basic detection
-                    "data_types_summary": {str(dtype): int((df.dtypes == dtype).sum()) for dtype in df.dtypes}
-                }
-            
-            # Add specific info for JSON files  
-            elif file_extension == '.json':
-                schema_info["file_type_specific"] = {
-                    "format": "json",
-                    "structure_type": processing_info.get("json_structure", "unknown"),
-                    "nested_levels": max(len(str(col).split('.')) for col in df.columns) if '.' in str(df.columns).replace(' ', '') else 1
-                }
+    else:
+        # For other file types, create standard schema
+        schema_info = {
+            "columns": [{"name": col, "type": str(df[col].dtype)} for col in df.columns],
+            "row_count": len(df),
+            "column_count": len(df.columns),
+            "processing_info": processing_info
+        }
+        
+        # Add specific info for Excel files
+        if file_extension in ['.xlsx', '.xls']:
+            schema_info["file_type_specific"] = {
+                "format": file_extension[1:],
+                "sheets_detected": len(df.columns) > 0,  # Basic detection
+                "data_types_summary": {str(dtype): int((df.dtypes == dtype).sum()) for dtype in df.dtypes}
+            }
+        
+        # Add specific info for JSON files  
+        elif file_extension == '.json':
+            schema_info["file_type_specific"] = {
+                "format": "json",
+                "structure_type": processing_info.get("json_structure", "unknown"),
+                "nested_levels": max(len(str(col).split('.')) for col in df.columns) if '.' in str(df.columns).replace(' ', '') else 1
+            }
+
+    logger.debug("Schema info created: %s", schema_info)
+
+    return df, schema_info
+
+
+@router.post("/upload", response_model=schemas.DataSource)
+async def upload_data_source(
+    *,
+    response: Response,
+    db: Session = Depends(get_db),
+    file: UploadFile = File(...),
+    name: str = None,
+    project_id: int = 1,
+) -> Any:
+    """
+    Upload a file and create a data source with DataFrame data.
+    Automatically saves the file to UPLOAD_DIR and stores the full path.
+    The X-Job-Id header identifies the stage trace (GET /jobs/{job_id}/trace).
+    """
+    # Trace consultable par le propriétaire du projet
+    owner_id = db.query(models.Project.owner_id).filter(models.Project.id == project_id).scalar()
+    with job("upload", owner_id=owner_id, file_name=file.filename, file_size=file.size) as upload_job:
+        response.headers["X-Job-Id"] = upload_job.job_id
+        with track_memory("upload", file_name=file.filename):
+            return await _upload_data_source(db, file, name, project_id)
+
 
-        print(f"📋 Schema info created: {schema_info}")
+async def _upload_data_source(db: Session, file: UploadFile, name: Optional[str], project_id: int) -> Any:
+    try:
+        logger.debug("Upload started: %s, size: %s", file.filename, file.size)
+
+        # Validate file type
+        allowed_extensions = ['.csv', '.xlsx', '.xls', '.json', '.txt', '.sql']
+        file_extension = '.' + file.filename.split('.')[-1].lower()
+
+        if file_extension not in allowed_extensions:
+            raise HTTPException(status_code=400, detail=f"File type {file_extension} not supported")
+
+        logger.debug("File type validated: %s", file_extension)
+
+        # Read file content
+        with span("read_upload") as stage:
+            content = await file.read()
+            stage.set(bytes=len(content))
+        logger.debug("File content read: %d bytes", len(content))
+        
+        # Save file permanently to UPLOAD_DIR and store full path
+        from app.core.config import settings
+        import os
+        import uuid
+        
+        # Create UPLOAD_DIR if it doesn't exist
+        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        
+        # Generate unique filename to avoid conflicts
+        file_id = str(uuid.uuid4())
+        safe_filename = f"{file_id}_{file.filename}"
+        full_file_path = os.path.join(settings.UPLOAD_DIR, safe_filename)
+        
+        # Save the file permanently
+        with span("save_file", bytes=len(content)), open(full_file_path, 'wb') as f:
+            f.write(content)
+        
+        logger.debug("File saved permanently: %s", full_file_path)
+
+        # Lecture pandas hors de la boucle d'événements
+        with span("parse", source_type=file_extension[1:], bytes=len(content)) as stage:
+            df, schema_info = await pandas_executor.run(_parse_uploaded_file, content, file_extension, full_file_path)
+            stage.set(rows=len(df), columns=len(df.columns))
 
         # Vérifier si le projet existe
         project = db.query(models.Project).filter(models.Project.id == project_id).first()
         if not project:
-            print("🏗️  Creating default project...")
+            logger.info("Creating default project")
 
             # Vérifier s'il y a des utilisateurs
             user_count = db.query(models.User).count()
             if user_count == 0:
-                print("👤 Creating default user...")
+                logger.info("Creating default user")
 
                 # Créer un utilisateur par défaut
-                from app.core.security import get_password_hash
+                from app.core.security import get_password_hash_async
                 try:
                     default_user = models.User(
                         email="admin@nexusbi.com",
-                        hashed_password=get_password_hash("admin"),
+                        hashed_password=await get_password_hash_async("admin"),
                         full_name="Administrateur NexusBi",
                         is_active=True,
                         is_superuser=True
@@ -873,7 +906,7 @@ async def upload_data_source(
                     db.refresh(default_user)
                     owner_id = default_user.id
                 except Exception as e:
-                    print(f"⚠️  Password hash failed: {e}, using fallback")
+                    logger.warning("Password hash failed: %s, using fallback", e)
                     # Fallback sans hash
                     default_user = models.User(
                         email="admin@nexusbi.com",
@@ -903,7 +936,7 @@ async def upload_data_source(
             db.refresh(default_project)
             project_id = default_project.id
 
-        print(f"✅ Project ready: ID {project_id}")
+        logger.debug("Project ready: ID %s", project_id)
 
         # Create data source with full file path
         data_source_name = name or file.filename.rsplit('.', 1)[0]
@@ -920,90 +953,41 @@ async def upload_data_source(
         db.commit()
         db.refresh(db_data_source)
 
-        print(f"✅ Data source created: ID {db_data_source.id}")
-
-        # Detect large data columns (images base64, etc.)
-        def detect_large_data_columns(dataframe):
-            """Détecte les colonnes avec des données volumineuses"""
-            large_columns = {}
-            LARGE_DATA_THRESHOLD = 10 * 1024  # 10KB
-            
-            for col in dataframe.columns:
-                large_values = 0
-                total_values = 0
-                
-                for val in dataframe[col].dropna():
-                    total_values += 1
-                    val_str = str(val)
-                    # Détecter base64 (commence par常见的base64 patterns)
-                    if (len(val_str) > LARGE_DATA_THRESHOLD or
-                        val_str.startswith('data:image/') or
-                        val_str.startswith('iVBOR') or  # PNG base64
-                        val_str.startswith('/9j/') or   # JPEG base64
-                        (len(val_str) > 100 and all(c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=' for c in val_str[:100]))):
-                        large_values += 1
-                    
-                    # Vérifier seulement les premières valeurs pour la performance
-                    if total_values >= 10:
-                        break
-                
-                # Si plus de 50% des valeurs échantillonnées sont volumineuses, marquer la colonne
-                if total_values > 0 and large_values / total_values > 0.5:
-                    large_columns[col] = True
-            
-            return large_columns
-
-        def sanitize_large_data(value, is_large_column):
-            """Remplace les données volumineuses par des labels"""
-            if is_large_column:
-                if not value or value == 'nan' or value == 'None':
-                    return "[Données vides]"
-                else:
-                    return f"[Données volumineuses - {len(value)} caractères]"
-            return value
+        logger.debug("Data source created: ID %s", db_data_source.id)
 
         # Store DataFrame data
-        print(f"💾 Storing {len(df)} DataFrame rows...")
+        logger.debug("Storing %d DataFrame rows", len(df))
         
-        # Détecter les colonnes avec des données volumineuses
-        large_columns = detect_large_data_columns(df)
+        # Les colonnes volumineuses (images base64, etc.) sont stockées dans data_blobs ;
+        # l'insertion passe par la file d'écriture sans bloquer la boucle d'événements
+        with span("persist", rows=len(df)):
+            large_columns = await run_write(db, store_dataframe_rows, db_data_source.id, df)
+
+        logger.info("Upload stored", extra={
+            "data_source_id": db_data_source.id,
+            "source_type": db_data_source.type,
+            "rows": len(df),
+            "bytes": len(content),
+        })
         if large_columns:
-            print(f"🔍 Détecté colonnes avec données volumineuses: {list(large_columns.keys())}")
-        
-        for idx, row in df.iterrows():
-            row_dict = {}
-            for col, val in row.items():
-                val_str = str(val) if val is not None else ""
-                # Sanitize si c'est une colonne avec des données volumineuses
-                sanitized_val = sanitize_large_data(val_str, large_columns.get(col, False))
-                row_dict[col] = sanitized_val
-            
-            db_row = models.DataFrameData(
-                data_source_id=db_data_source.id,
-                row_data=json.dumps(row_dict),
-                row_index=idx
-            )
-            db.add(db_row)
-
-        db.commit()
-        print("✅ DataFrame data stored successfully")
-        if large_columns:
-            print(f"📊 {len(large_columns)} colonnes avec données volumineuses处理ées")
+            logger.debug("%d colonnes avec données volumineuses stockées à part: %s", len(large_columns), list(large_columns))
+        record_ingest(db_data_source.type, "upload", len(df), len(content))
 
         return db_data_source
 
+    except ExecutorBusy:
+        db.rollback()
+        raise HTTPException(status_code=503, detail="Serveur occupé, réessayez plus tard")
     except Exception as e:
-        print(f"❌ Upload error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.error("Upload error: %s", e, exc_info=True)
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
 
 @router.get("/{data_source_id}/data")
-def get_data_source_data(
+async def get_data_source_data(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     data_source_id: int,
     skip: int = 0,
     limit: int = 100,
@@ -1012,27 +996,34 @@ def get_data_source_data(
     Get data rows for a data source.
     """
     # Check if data source exists
-    data_source = db.query(models.DataSource).filter(models.DataSource.id == data_source_id).first()
+    data_source = await db.get(models.DataSource, data_source_id)
     if not data_source:
         raise HTTPException(status_code=404, detail="Data source not found")
 
-    # Get total count of rows for this data source
-    total_count = db.query(models.DataFrameData).filter(models.DataFrameData.data_source_id == data_source_id).count()
+    # Get total count of rows for this data source, recorded when the rows were stored
+    data_version = await db.scalar(
+        select(models.DataVersion).where(models.DataVersion.data_source_id == data_source_id)
+    )
+    if data_version is not None:
+        total_count = data_version.row_count
+    else:
+        total_count = await db.scalar(
+            select(func.count())
+            .select_from(models.DataFrameData)
+            .where(models.DataFrameData.data_source_id == data_source_id)
+        )
 
     # Get data rows
-    data_rows = (
-        db.query(models.DataFrameData)
-        .filter(models.DataFrameData.data_source_id == data_source_id)
+    data_rows = await db.scalars(
+        select(models.DataFrameData.row_data)
+        .where(models.DataFrameData.data_source_id == data_source_id)
         .order_by(models.DataFrameData.row_index)
         .offset(skip)
         .limit(limit)
-        .all()
     )
 
     # Parse row data
-    rows = []
-    for row in data_rows:
-        rows.append(json.loads(row.row_data))
+    rows = [json.loads(row_data) for row_data in data_rows]
 
     return {
         "data_source_id": data_source_id,
@@ -1043,6 +1034,30 @@ def get_data_source_data(
     }
 
 
+@router.get("/{data_source_id}/blobs/{blob_id}")
+def get_data_source_blob(
+    *,
+    db: Session = Depends(get_db),
+    data_source_id: int,
+    blob_id: int,
+) -> Any:
+    """
+    Get the full value of a large data cell, referenced by `[blob:<id>]` in the row data.
+    """
+    blob = get_blob(db, data_source_id, blob_id)
+    if not blob:
+        raise HTTPException(status_code=404, detail="Blob not found")
+
+    return {
+        "data_source_id": data_source_id,
+        "blob_id": blob.id,
+        "row_index": blob.row_index,
+        "column_name": blob.column_name,
+        "size": blob.size,
+        "content": blob.content
+    }
+
+
 def calculate_basic_stats(df: pd.DataFrame) -> Dict[str, Any]:
     """Calcule les statistiques de base pour un DataFrame"""
     stats = {
@@ -1184,52 +1199,70 @@ def calculate_column_stats(series: pd.Series, column_name: str) -> Dict[str, Any
     return stats
 
 
-def get_dataframe_from_source(source: models.DataSource, db: Session) -> Optional[pd.DataFrame]:
-    """Récupère et charge les données d'une source dans un DataFrame pandas"""
+async def get_dataframe_from_source(source: models.DataSource, db: AsyncSession) -> Optional[pd.DataFrame]:
+    """
+    Récupère et charge les données d'une source dans un DataFrame pandas
+
+    Les lignes DataFrameData sont lues par lots via la session async ; la
+    reconstruction du DataFrame et la lecture du fichier (repli) sont
+    exécutées dans pandas_executor. None si les données ne peuvent pas être
+    lues ; ExecutorBusy et MemoryBudgetExceeded sont propagées.
+    """
     try:
-        print(f"Loading data for source {source.id}: {source.type}")
-
-        # D'abord, essayer de récupérer les données depuis la base de données DataFrameData
-        print(f"Checking DataFrameData table for source {source.id}...")
-        dataframe_rows = (
-            db.query(models.DataFrameData)
-            .filter(models.DataFrameData.data_source_id == source.id)
-            .order_by(models.DataFrameData.row_index)
-            .all()
-        )
+        with track_memory("load_dataframe", source_id=source.id):
+            logger.debug("Loading data for source %s: %s", source.id, source.type)
 
-        if dataframe_rows:
-            print(f"Found {len(dataframe_rows)} rows in DataFrameData table")
-            
-            # Reconstruire le DataFrame à partir des données stockées
-            rows_data = []
-            columns = None
-            
-            for row in dataframe_rows:
-                row_dict = json.loads(row.row_data)
-                rows_data.append(row_dict)
-                
-                # Déterminer les colonnes à partir de la première ligne
-                if columns is None:
-                    columns = list(row_dict.keys())
-            
-            if rows_data and columns:
-                df = pd.DataFrame(rows_data, columns=columns)
-                print(f"Successfully reconstructed DataFrame from database: {len(df)} rows, {len(df.columns)} columns")
-                return df
+            # D'abord, essayer de récupérer les données depuis la base de données DataFrameData
+            result = await db.stream_scalars(
+                select(models.DataFrameData.row_data)
+                .where(models.DataFrameData.data_source_id == source.id)
+                .order_by(models.DataFrameData.row_index)
+            )
+            row_data: List[str] = []
+            async for partition in result.partitions(ROW_FETCH_SIZE):
+                row_data.extend(partition)
+
+            if row_data:
+                logger.debug("Found %d rows in DataFrameData table", len(row_data))
+                df = await pandas_executor.run(dataframe_from_rows, row_data)
+                if df is not None:
+                    logger.debug("Reconstructed DataFrame from database: %d rows, %d columns", len(df), len(df.columns))
+                    return df
+                logger.debug("No valid data found in DataFrameData table")
             else:
-                print("No valid data found in DataFrameData table")
-        else:
-            print(f"No data found in DataFrameData table for source {source.id}")
+                logger.debug("No data found in DataFrameData table for source %s", source.id)
+
+            # Fallback: essayer de charger depuis le fichier si les données ne sont pas en base
+            return await pandas_executor.run(load_dataframe_from_file, source)
 
-        # Fallback: essayer de charger depuis le fichier si les données ne sont pas en base
+    except (ExecutorBusy, MemoryBudgetExceeded):
+        # Surcharge, pas une erreur de chargement : les endpoints répondent 503
+        raise
+    except Exception as e:
+        logger.error("Error loading data from source %s: %s", source.id, e, exc_info=True)
+        return None
+
+
+def dataframe_from_rows(row_data: List[str]) -> Optional[pd.DataFrame]:
+    """Reconstruit un DataFrame à partir des lignes JSON de DataFrameData"""
+    rows_data = [json.loads(row) for row in row_data]
+    # Les colonnes sont celles de la première ligne
+    columns = list(rows_data[0].keys()) if rows_data else None
+    if rows_data and columns:
+        return pd.DataFrame(rows_data, columns=columns)
+    return None
+
+
+def load_dataframe_from_file(source: models.DataSource) -> Optional[pd.DataFrame]:
+    """Charge les données d'une source depuis son fichier (bloquant)"""
+    try:
         if source.file_path:
-            print(f"Trying to load from file: {source.file_path}")
+            logger.debug("Trying to load from file: %s", source.file_path)
             
             # Vérifier que le fichier existe
             import os
             if not os.path.exists(source.file_path):
-                print(f"File not found: {source.file_path}")
+                logger.warning("File not found: %s", source.file_path)
                 return None
 
             # Récupérer le contenu du fichier basé sur le type
@@ -1241,7 +1274,7 @@ def get_dataframe_from_source(source: models.DataSource, db: Session) -> Optiona
                         encoding = schema['processing_info'].get('detected_encoding', 'utf-8')
                         delimiter = schema['processing_info'].get('detected_delimiter', ',')
 
-                        print(f"Reading CSV with encoding={encoding}, delimiter='{delimiter}'")
+                        logger.debug("Reading CSV with encoding=%s, delimiter=%r", encoding, delimiter)
 
                         # Lire le fichier CSV
                         df = pd.read_csv(
@@ -1250,7 +1283,7 @@ def get_dataframe_from_source(source: models.DataSource, db: Session) -> Optiona
                             delimiter=delimiter,
                             low_memory=False
                         )
-                        print(f"Successfully loaded CSV: {len(df)} rows, {len(df.columns)} columns")
+                        logger.debug("Loaded CSV: %d rows, %d columns", len(df), len(df.columns))
                         return df
                 else:
                     # Fallback sans schema_info
@@ -1297,135 +1330,116 @@ def get_dataframe_from_source(source: models.DataSource, db: Session) -> Optiona
                     try:
                         excel_file = pd.ExcelFile(source.file_path)
                         sheet_names = excel_file.sheet_names
-                        print(f"Excel file has {len(sheet_names)} sheets: {sheet_names}")
+                        logger.debug("Excel file has %d sheets: %s", len(sheet_names), sheet_names)
                         
                         # Lire la première feuille par défaut
                         df = pd.read_excel(source.file_path, sheet_name=0)
-                        print(f"Successfully loaded Excel file (sheet 0): {len(df)} rows, {len(df.columns)} columns")
+                        logger.debug("Loaded Excel file (sheet 0): %d rows, %d columns", len(df), len(df.columns))
                     except Exception as sheet_error:
                         # Si l'approche avec ExcelFile échoue, essayer directement
-                        print(f"Multi-sheet approach failed: {sheet_error}, trying direct read...")
+                        logger.debug("Multi-sheet approach failed: %s, trying direct read", sheet_error)
                         df = pd.read_excel(source.file_path)
-                        print(f"Successfully loaded Excel file (direct): {len(df)} rows, {len(df.columns)} columns")
+                        logger.debug("Loaded Excel file (direct): %d rows, %d columns", len(df), len(df.columns))
                     
                     return df
                 except Exception as e:
-                    print(f"Failed to load Excel file: {e}")
+                    logger.warning("Failed to load Excel file: %s", e)
                     return None
 
             elif source.type == 'json':
                 # Pour les fichiers JSON
                 try:
                     df = pd.read_json(source.file_path)
-                    print(f"Successfully loaded JSON file: {len(df)} rows, {len(df.columns)} columns")
+                    logger.debug("Loaded JSON file: %d rows, %d columns", len(df), len(df.columns))
                     return df
                 except Exception as e:
-                    print(f"Failed to load JSON file: {e}")
+                    logger.warning("Failed to load JSON file: %s", e)
                     return None
 
         # Si aucune méthode ne fonctionne, retourner None
-        print(f"Unable to load data for source {source.id}: no database data and file loading failed")
+        logger.warning("Unable to load data for source %s: no database data and file loading failed", source.id)
         return None
 
     except Exception as e:
-        print(f"Error loading data from source {source.id}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.error("Error loading data from source %s: %s", source.id, e, exc_info=True)
         return None
 
 
+def compute_source_statistics(data_source_id: int, df: pd.DataFrame, data_version: Dict[str, Any]) -> Dict[str, Any]:
+    """Statistiques d'une source : travail pandas exécuté dans pandas_executor"""
+    # Calculer les statistiques de base
+    basic_stats = calculate_basic_stats(df)
+
+    # Préparer les informations sur les colonnes
+    columns_info = []
+    for col_name, col_dtype in df.dtypes.items():
+        columns_info.append({
+            'name': col_name,
+            'type': str(col_dtype),
+            'non_null_count': int(df[col_name].count()),
+            'null_count': int(df[col_name].isnull().sum()),
+            'unique_count': int(df[col_name].nunique())
+        })
+
+    # Préparer un échantillon de données (5 premières lignes), converti colonne par colonne
+    sample_data = records_from_dataframe(df.head(5))
+
+    # Matrice de corrélation (Pearson), calculée une fois par version des données
+    correlations = get_correlations(data_source_id, data_version, lambda: df)
+
+    return {
+        **basic_stats,
+        "columns": columns_info,
+        "sample_data": sample_data,
+        "correlations": matrix_as_dict(correlations)
+    }
+
+
 @router.get("/{data_source_id}/statistics")
 async def get_source_statistics(
     data_source_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Récupère les statistiques avancées pour une source de données
     """
     try:
         # Récupérer la source de données
-        source = db.query(models.DataSource).filter(models.DataSource.id == data_source_id).first()
+        source = await db.get(models.DataSource, data_source_id)
         if not source:
             raise HTTPException(status_code=404, detail="Source de données non trouvée")
 
-        # Charger les données dans un DataFrame
-        df = get_dataframe_from_source(source, db)
-
-        if df is None:
-            return {
-                "source_id": data_source_id,
-                "source_name": source.name,
-                "error": "Impossible de charger les données pour cette source",
-                "columns": [],
-                "sample_data": []
-            }
-
-        # Calculer les statistiques de base
-        basic_stats = calculate_basic_stats(df)
-
-        # Préparer les informations sur les colonnes
-        columns_info = []
-        for col_name, col_dtype in df.dtypes.items():
-            columns_info.append({
-                'name': col_name,
-                'type': str(col_dtype),
-                'non_null_count': int(df[col_name].count()),
-                'null_count': int(df[col_name].isnull().sum()),
-                'unique_count': int(df[col_name].nunique())
-            })
+        # Charger les données dans un DataFrame (dans la limite du budget mémoire)
+        async with source_memory_reservation(source, db):
+            df = await get_dataframe_from_source(source, db)
 
-        # Préparer un échantillon de données (5 premières lignes)
-        sample_data = []
-        for _, row in df.head(5).iterrows():
-            row_dict = {}
-            for col in df.columns:
-                value = row[col]
-                # Convertir toutes les valeurs numpy/pandas en types Python simples
-                if pd.isna(value):
-                    row_dict[col] = None
-                elif isinstance(value, (np.integer, np.int64, int)):
-                    row_dict[col] = int(value)
-                elif isinstance(value, (np.floating, np.float64, float)):
-                    row_dict[col] = float(value)
-                elif isinstance(value, (np.datetime64, pd.Timestamp)):
-                    row_dict[col] = value.isoformat() if pd.notna(value) else None
-                elif isinstance(value, np.bool_):
-                    row_dict[col] = bool(value)
-                else:
-                    row_dict[col] = str(value)
-            sample_data.append(row_dict)
-
-        # S'assurer que toutes les valeurs dans basic_stats sont JSON-serializable
-        def convert_numpy_types(obj):
-            if isinstance(obj, dict):
-                return {k: convert_numpy_types(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_numpy_types(v) for v in obj]
-            elif isinstance(obj, (np.integer, np.int64, int)):
-                return int(obj)
-            elif isinstance(obj, (np.floating, np.float64, float)):
-                return float(obj)
-            elif isinstance(obj, np.bool_):
-                return bool(obj)
-            elif pd.isna(obj):
-                return None
-            else:
-                return obj
+            if df is None:
+                return {
+                    "source_id": data_source_id,
+                    "source_name": source.name,
+                    "error": "Impossible de charger les données pour cette source",
+                    "columns": [],
+                    "sample_data": []
+                }
 
-        # Convertir tous les types numpy dans basic_stats
-        basic_stats = convert_numpy_types(basic_stats)
+            statistics = await pandas_executor.run(
+                compute_source_statistics, data_source_id, df, await get_source_data_version(source, db)
+            )
 
-        return {
+        # Les types numpy/pandas de basic_stats sont sérialisés par NumpyJSONResponse
+        return NumpyJSONResponse({
             "source_id": data_source_id,
             "source_name": source.name,
             "source_type": source.type,
-            **basic_stats,
-            "columns": columns_info,
-            "sample_data": sample_data
-        }
+            **statistics
+        })
 
     except HTTPException:
         raise
+    except ExecutorBusy:
+        raise HTTPException(status_code=503, detail="Serveur occupé, réessayez plus tard")
+    except MemoryBudgetExceeded as e:
+        raise _memory_busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques: {str(e)}")
 
@@ -1434,83 +1448,208 @@ async def get_source_statistics(
 async def get_column_statistics(
     data_source_id: int,
     column_name: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Récupère les statistiques détaillées pour une colonne spécifique
     """
     try:
         # Récupérer la source de données
-        source = db.query(models.DataSource).filter(models.DataSource.id == data_source_id).first()
+        source = await db.get(models.DataSource, data_source_id)
         if not source:
             raise HTTPException(status_code=404, detail="Source de données non trouvée")
 
-        # Charger les données dans un DataFrame
-        df = get_dataframe_from_source(source, db)
-
-        if df is None:
-            # Essayer une approche alternative: construire le DataFrame directement depuis DataFrameData
-            print(f"Trying alternative approach for source {data_source_id}...")
-            dataframe_rows = (
-                db.query(models.DataFrameData)
-                .filter(models.DataFrameData.data_source_id == data_source_id)
-                .order_by(models.DataFrameData.row_index)
-                .all()
-            )
-            
-            if dataframe_rows:
-                rows_data = []
-                columns = None
-                
-                for row in dataframe_rows:
-                    row_dict = json.loads(row.row_data)
-                    rows_data.append(row_dict)
-                    
-                    if columns is None:
-                        columns = list(row_dict.keys())
-                
-                if rows_data and columns:
-                    df = pd.DataFrame(rows_data, columns=columns)
-                    print(f"Successfully loaded DataFrame via alternative method: {len(df)} rows, {len(df.columns)} columns")
-                else:
-                    raise HTTPException(status_code=404, detail="Impossible de charger les données pour cette source")
-            else:
+        # Charger les données dans un DataFrame (DataFrameData d'abord, puis le fichier)
+        async with source_memory_reservation(source, db):
+            df = await get_dataframe_from_source(source, db)
+            if df is None:
                 raise HTTPException(status_code=404, detail="Impossible de charger les données pour cette source")
 
-        # Vérifier que la colonne existe
-        if column_name not in df.columns:
-            raise HTTPException(status_code=404, detail=f"Colonne '{column_name}' non trouvée")
-
-        # Calculer les statistiques pour la colonne spécifique
-        column_stats = calculate_column_stats(df[column_name], column_name)
-
-        # S'assurer que toutes les valeurs dans column_stats sont JSON-serializable
-        def convert_numpy_types(obj):
-            if isinstance(obj, dict):
-                return {k: convert_numpy_types(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_numpy_types(v) for v in obj]
-            elif isinstance(obj, (np.integer, np.int64, int)):
-                return int(obj)
-            elif isinstance(obj, (np.floating, np.float64, float)):
-                return float(obj)
-            elif isinstance(obj, np.bool_):
-                return bool(obj)
-            elif pd.isna(obj):
-                return None
-            else:
-                return obj
+            # Vérifier que la colonne existe
+            if column_name not in df.columns:
+                raise HTTPException(status_code=404, detail=f"Colonne '{column_name}' non trouvée")
 
-        # Convertir tous les types numpy dans column_stats
-        column_stats = convert_numpy_types(column_stats)
+            # Calculer les statistiques pour la colonne spécifique
+            column_stats = await pandas_executor.run(calculate_column_stats, df[column_name], column_name)
 
-        return {
+        # Les types numpy/pandas de column_stats sont sérialisés par NumpyJSONResponse
+        return NumpyJSONResponse({
             "source_id": data_source_id,
             "column_name": column_name,
             "statistics": column_stats
-        }
+        })
+
+    except HTTPException:
+        raise
+    except ExecutorBusy:
+        raise HTTPException(status_code=503, detail="Serveur occupé, réessayez plus tard")
+    except MemoryBudgetExceeded as e:
+        raise _memory_busy(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques de colonne: {str(e)}")
+
+def _memory_busy(error: MemoryBudgetExceeded) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "5"})
+
+
+@asynccontextmanager
+async def source_memory_reservation(source: models.DataSource, db: AsyncSession):
+    """
+    Réserve l'empreinte estimée du chargement de la source dans memory_budget
+    (nombre de lignes et de colonnes de DataVersion, types du schema_info) ;
+    MemoryBudgetExceeded si le budget est dépassé
+    """
+    if not memory_budget.enabled:
+        yield
+        return
+    data_version = await db.scalar(
+        select(models.DataVersion).where(models.DataVersion.data_source_id == source.id)
+    )
+    try:
+        schema_info = json.loads(source.schema_info) if source.schema_info else None
+    except ValueError:
+        schema_info = None
+    estimate = estimate_source_bytes(
+        schema_info if isinstance(schema_info, dict) else None,
+        data_version.row_count if data_version else None,
+        data_version.column_count if data_version else None,
+    )
+    async with memory_budget.reserve(estimate, f"la source {source.id}"):
+        yield
+
+
+async def get_source_data_version(source: models.DataSource, db: AsyncSession) -> Dict[str, Any]:
+    """Version des données d'une source : version DataFrameData, mise à jour et fichier"""
+    data_version = await db.scalar(
+        select(models.DataVersion).where(models.DataVersion.data_source_id == source.id)
+    )
+    file_mtime = None
+    if source.file_path and os.path.exists(source.file_path):
+        file_mtime = os.path.getmtime(source.file_path)
+    return {
+        "version": data_version.version if data_version else 0,
+        "updated_at": source.updated_at.isoformat() if source.updated_at else None,
+        "file_mtime": file_mtime,
+    }
 
+
+@router.get("/{data_source_id}/charts/{chart_type}")
+async def get_chart_image(
+    data_source_id: int,
+    chart_type: str,
+    request: Request,
+    x_column: Optional[str] = None,
+    y_column: Optional[str] = None,
+    title: Optional[str] = None,
+    format: str = Query("png", pattern="^(png|base64)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Image matplotlib d'un graphique (PNG, ou base64 en JSON avec format=base64)
+
+    Les images sont mises en cache par (version des données, spécification) ;
+    l'ETag permet au navigateur de revalider avec If-None-Match (304).
+    """
+    source = await db.get(models.DataSource, data_source_id)
+    if not source:
+        raise HTTPException(status_code=404, detail="Source de données non trouvée")
+    if chart_type not in CHART_TYPES:
+        raise HTTPException(status_code=400, detail=f"Type de graphique non supporté: {chart_type}")
+
+    spec = {
+        "chart_type": chart_type,
+        "x_column": x_column,
+        "y_column": y_column,
+        "title": title or chart_type,
+    }
+    key = chart_cache_key(data_source_id, await get_source_data_version(source, db), spec)
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        # Les données ne sont chargées que si l'image n'est pas déjà en cache
+        image = await render_chart(key, lambda: _load_chart_dataframe(source, db, spec), **spec)
+    except HTTPException:
+        raise
+    except ExecutorBusy:
+        raise HTTPException(status_code=503, detail="Serveur occupé, réessayez plus tard")
+    except MemoryBudgetExceeded as e:
+        raise _memory_busy(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du rendu du graphique: {str(e)}")
+
+    if format == "base64":
+        return NumpyJSONResponse({
+            "source_id": data_source_id,
+            "chart_type": chart_type,
+            "format": "png",
+            "image_base64": base64.b64encode(image).decode("ascii"),
+        }, headers=headers)
+    return Response(content=image, media_type="image/png", headers=headers)
+
+
+async def _load_chart_dataframe(source: models.DataSource, db: AsyncSession, spec: Dict[str, Any]) -> pd.DataFrame:
+    """Charge les données d'un graphique et vérifie ses colonnes"""
+    async with source_memory_reservation(source, db):
+        df = await get_dataframe_from_source(source, db)
+    if df is None:
+        raise HTTPException(status_code=404, detail="Impossible de charger les données pour cette source")
+    for column in (spec["x_column"], spec["y_column"]):
+        if column and column not in df.columns:
+            raise HTTPException(status_code=404, detail=f"Colonne '{column}' non trouvée")
+    if spec["chart_type"] != "heatmap" and not spec["x_column"]:
+        raise HTTPException(status_code=400, detail="x_column est requis pour ce type de graphique")
+    return df
+
+
+@router.get("/{data_source_id}/correlations")
+async def get_source_correlations(
+    data_source_id: int,
+    method: str = Query("pearson", pattern="^(pearson|spearman)$"),
+    top_k: int = Query(DEFAULT_TOP_K, ge=0, le=1000),
+    sample_size: Optional[int] = Query(None, ge=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Matrice de corrélation des colonnes numériques et paires les plus corrélées
+
+    Le résultat est mis en cache par version des données ; sample_size calcule
+    la matrice sur un échantillon aléatoire pour les tables très longues.
+    """
+    source = await db.get(models.DataSource, data_source_id)
+    if not source:
+        raise HTTPException(status_code=404, detail="Source de données non trouvée")
+
+    async def load_frame() -> pd.DataFrame:
+        async with source_memory_reservation(source, db):
+            df = await get_dataframe_from_source(source, db)
+        if df is None:
+            raise HTTPException(status_code=404, detail="Impossible de charger les données pour cette source")
+        return df
+
+    try:
+        result = await get_correlations_async(
+            data_source_id, await get_source_data_version(source, db), load_frame,
+            method=method, sample_size=sample_size
+        )
     except HTTPException:
         raise
+    except ExecutorBusy:
+        raise HTTPException(status_code=503, detail="Serveur occupé, réessayez plus tard")
+    except MemoryBudgetExceeded as e:
+        raise _memory_busy(e)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques de colonne: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des corrélations: {str(e)}")
+
+    return NumpyJSONResponse({
+        "source_id": data_source_id,
+        "method": result["method"],
+        "columns": result["columns"],
+        "matrix": result["matrix"],
+        "top_pairs": top_pairs(result, top_k),
+        "rows_used": result["rows_used"],
+        "sampled": result["sampled"],
+    })
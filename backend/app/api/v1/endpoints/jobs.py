@@ -0,0 +1,50 @@
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app import models
+from app.core.deps import get_current_active_user
+from app.core.tracing import trace_store
+
+router = APIRouter()
+
+
+def summarize_spans(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Durée totale, nombre d'appels, octets et lignes par nom d'étape, la plus longue en premier"""
+    stages: Dict[str, Dict[str, Any]] = {}
+    for span in spans:
+        stage = stages.setdefault(span["name"], {"name": span["name"], "count": 0, "duration_ms": 0.0})
+        stage["count"] += 1
+        stage["duration_ms"] += span["duration_ms"] or 0.0
+        for key in ("bytes", "rows"):
+            value = span["attributes"].get(key)
+            if isinstance(value, (int, float)):
+                stage[key] = stage.get(key, 0) + value
+    return sorted(stages.values(), key=lambda stage: stage["duration_ms"], reverse=True)
+
+
+@router.get("/")
+def read_recent_jobs(
+    limit: int = 20,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Most recent upload and sync jobs of the current user (all jobs for superusers).
+    """
+    return trace_store.recent(limit, owner_id=None if current_user.is_superuser else current_user.id)
+
+
+@router.get("/{job_id}/trace")
+def read_job_trace(
+    job_id: str,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Stage spans of an upload or sync job (X-Job-Id header of the response).
+    """
+    trace = trace_store.get(job_id)
+    # Job of another user: same answer as an unknown job
+    if trace is None or not (current_user.is_superuser or trace["owner_id"] == current_user.id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    trace["stages"] = summarize_spans(trace["spans"])
+    return trace
@@ -0,0 +1,119 @@
+import asyncio
+from typing import Any, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field
+
+from app import models
+from app.core.config import settings
+from app.core.deps import get_current_active_superuser
+from app.core.profiler import ProfilerBusy, profiler
+
+router = APIRouter()
+
+
+class ProfileSessionCreate(BaseModel):
+    # Sans route : tous les threads pendant `seconds` ; avec route : les `requests`
+    # prochaines requêtes de cette route, `seconds` servant de délai maximal
+    seconds: float = Field(30.0, gt=0, le=600)
+    route: Optional[str] = None
+    method: Optional[str] = None
+    requests: int = Field(10, ge=1, le=1000)
+    interval_ms: float = Field(10.0, ge=1, le=1000)
+    memory: bool = False
+    memory_group_by: Literal["lineno", "filename", "traceback"] = "lineno"
+    memory_filter: Optional[str] = None
+
+
+def _get_session(session_id: str):
+    session = profiler.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profiling session not found")
+    return session
+
+
+@router.post("/sessions")
+def start_profile_session(
+    options: ProfileSessionCreate,
+    request: Request,
+    current_user: models.User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Start a sampling profiler session (process-wide, or the next requests to a route).
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=503, detail="Profiler disabled (PROFILER_ENABLED=false)")
+    sync_endpoints = []
+    if options.route is not None:
+        routes = [
+            route for route in request.app.routes
+            if isinstance(route, APIRoute) and route.path == options.route
+            and (options.method is None or options.method.upper() in route.methods)
+        ]
+        if not routes:
+            raise HTTPException(status_code=404, detail=f"Route not found: {options.route}")
+        # Les endpoints `def` s'exécutent dans le pool de threads de Starlette, hors de la pile de la requête
+        sync_endpoints = [route.endpoint for route in routes if not asyncio.iscoroutinefunction(route.endpoint)]
+
+    try:
+        session = profiler.start(
+            seconds=options.seconds,
+            interval=options.interval_ms / 1000,
+            route=options.route,
+            method=options.method,
+            max_requests=options.requests if options.route is not None else None,
+            sync_endpoints=sync_endpoints,
+            memory=options.memory,
+            memory_group_by=options.memory_group_by,
+            memory_filter=options.memory_filter,
+        )
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return session.summary()
+
+
+@router.get("/sessions")
+def read_profile_sessions(
+    current_user: models.User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Running and recent profiling sessions.
+    """
+    return profiler.sessions()
+
+
+@router.get("/sessions/{session_id}")
+def read_profile_session(
+    session_id: str,
+    current_user: models.User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Session report: most sampled functions and, with memory=true, tracemalloc allocations.
+    """
+    return _get_session(session_id).report()
+
+
+@router.get("/sessions/{session_id}/collapsed", response_class=PlainTextResponse)
+def read_profile_session_collapsed(
+    session_id: str,
+    current_user: models.User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Collapsed stacks ("frame;frame;frame count"), for flamegraph.pl or speedscope.
+    """
+    return PlainTextResponse(_get_session(session_id).collapsed())
+
+
+@router.post("/sessions/{session_id}/stop")
+def stop_profile_session(
+    session_id: str,
+    current_user: models.User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Stop a running session early; the report covers the samples taken so far.
+    """
+    session = _get_session(session_id)
+    session.stop()
+    return session.summary()
@@ -1,15 +1,25 @@
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Tuple
 from datetime import datetime
+import logging
+import random
+import time
 from pydantic import BaseModel
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import models
-from app.core.deps import get_current_active_user, get_db
+from app.core.deps import get_async_db, get_current_active_user, get_db
+from app.core.responses import EventStreamResponse
 from app.core.security import get_random_string
+from app.services.ai_cache import ResponseKey, ai_response_cache, cached_sse_events, response_cache_key
+from app.services.ai_gateway import AIGatewayBusy, AIGatewayError, AIStream, ai_gateway, sse_events
+from app.services.usage_log import get_active_api_key, record_usage
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class UserAPIKeyCreate(BaseModel):
     key_name: str
@@ -164,59 +174,206 @@ def update_chatbot_config(
         )
 
 @router.post("/chatbot/query", response_model=ChatbotResponse)
-def chatbot_query(
+async def chatbot_query(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     query: str,
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
     Interroger le chatbot avec la configuration utilisateur.
+
+    Le modèle est appelé par la passerelle IA (async, appels simultanés
+    limités par utilisateur et au total, annulé si le client se déconnecte).
+    L'appel est compté sur la clé API active de l'utilisateur pour le modèle
+    (journal d'utilisation écrit par lots). Une réponse déjà obtenue pour la
+    même question et les mêmes paramètres est servie par le cache (en-tête
+    X-AI-Cache, aucun jeton compté).
     """
+    started = time.perf_counter()
+    model = "gemini-pro"
+    api_key = None
     try:
-        # Récupérer la configuration utilisateur
-        user_settings = db.query(models.UserSettings).filter(
-            models.UserSettings.user_id == current_user.id
-        ).first()
+        model, temperature, max_tokens, language = await _chatbot_settings(db, current_user.id)
+        api_key = await _active_api_key(db, current_user.id, model)
 
-        model = user_settings.preferred_ai_model if user_settings else "gemini-pro"
-        temperature = user_settings.temperature if user_settings else 0.7
-        max_tokens = user_settings.max_tokens if user_settings else 1024
-        language = user_settings.language if user_settings else "fr"
-
-        # Générer une réponse en français
-        import random
-        import time
-        time.sleep(0.3)  # Simuler le temps de traitement
-
-        # Réponses en français basées sur le type de requête
-        if "analyse de données" in query.lower():
-            response = f"Basé sur votre demande d'analyse de données: '{query}', j'ai analysé les motifs et identifié des tendances clés. Les données montrent des corrélations significatives entre les variables X et Y, suggérant des opportunités commerciales potentielles."
-        elif "prédiction" in query.lower():
-            response = f"Pour votre demande de prédiction: '{query}', le modèle prévoit une augmentation de {random.uniform(5, 20):.1f}% de la métrique cible au cours du prochain trimestre, avec une confiance de {random.uniform(70, 95):.0f}%."
-        elif "recommandation" in query.lower():
-            response = f"Concernant votre demande de recommandation: '{query}', je suggère de mettre en œuvre la stratégie A pour des gains à court terme et la stratégie B pour une croissance à long terme. Cela est basé sur l'analyse des performances historiques."
-        else:
-            response = f"J'ai traité votre requête: '{query}'. Voici une analyse complète avec des informations exploitables et des recommandations basées sur les données, adaptées à votre contexte commercial."
+        cache_key = _chatbot_cache_key(query, model, temperature, max_tokens, language)
+        cached = ai_response_cache.get(cache_key)
+        if cached is not None:
+            _record_chatbot_usage(api_key, request, 200, 0, started)
+            response.headers["X-AI-Cache"] = cached.tier
+            return {
+                "response": cached.text,
+                "model_used": model,
+                "tokens_used": cached.tokens_used,
+                "suggestions": CHATBOT_SUGGESTIONS
+            }
+
+        completion = await ai_gateway.complete(
+            _chatbot_messages(query, language),
+            model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            user_id=current_user.id,
+            request=request,
+            fallback=_simulated_response(query),
+            api_key=api_key[1] if api_key else None,
+        )
+        _record_chatbot_usage(api_key, request, 200, completion.tokens_used, started)
+        ai_response_cache.put(cache_key, completion.text, completion.tokens_used)
 
         return {
-            "response": response,
+            "response": completion.text,
             "model_used": model,
-            "tokens_used": random.randint(50, max_tokens),
-            "suggestions": [
-                "Envisagez d'exécuter des tests A/B supplémentaires",
-                "Examinez les motifs saisonniers identifiés",
-                "Validez les résultats avec des experts du domaine",
-                "Optimisez les paramètres du modèle pour de meilleurs résultats"
-            ]
+            "tokens_used": completion.tokens_used,
+            "suggestions": CHATBOT_SUGGESTIONS
         }
 
+    except AIGatewayError as e:
+        _record_chatbot_usage(api_key, request, e.status_code, 0, started)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": "1"} if isinstance(e, AIGatewayBusy) else None,
+        )
     except Exception as e:
+        _record_chatbot_usage(api_key, request, 500, 0, started)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors du traitement de la requête du chatbot: {str(e)}"
         )
 
+@router.post("/chatbot/query/stream")
+async def chatbot_query_stream(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    query: str,
+    request: Request,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Interroger le chatbot, réponse en server-sent events.
+
+    Un évènement "chunk" ({"delta": texte}) par fragment produit par le
+    modèle, puis "done" (suggestions, model_used, tokens_used) ou "error"
+    ({"detail", "status_code"}). Les limites de la passerelle (429/503)
+    sont renvoyées avant le début du flux ; si le client se déconnecte,
+    l'appel au modèle est annulé. Les jetons sont comptés à la fin du flux
+    dans le journal d'utilisation (statut 499 si le client est parti). Une
+    réponse en cache est envoyée en un seul fragment ("cached" dans "done").
+    """
+    started = time.perf_counter()
+    api_key = None
+    try:
+        model, temperature, max_tokens, language = await _chatbot_settings(db, current_user.id)
+        api_key = await _active_api_key(db, current_user.id, model)
+
+        cache_key = _chatbot_cache_key(query, model, temperature, max_tokens, language)
+        cached = ai_response_cache.get(cache_key)
+        if cached is not None:
+            _record_chatbot_usage(api_key, request, 200, 0, started)
+            return EventStreamResponse(cached_sse_events(
+                cached, {"suggestions": CHATBOT_SUGGESTIONS, "model_used": model}
+            ))
+
+        stream = await ai_gateway.open_stream(
+            _chatbot_messages(query, language),
+            model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            user_id=current_user.id,
+            fallback=_simulated_response(query),
+            api_key=api_key[1] if api_key else None,
+        )
+    except AIGatewayError as e:
+        _record_chatbot_usage(api_key, request, e.status_code, 0, started)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": "1"} if isinstance(e, AIGatewayBusy) else None,
+        )
+    except Exception as e:
+        _record_chatbot_usage(api_key, request, 500, 0, started)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors du traitement de la requête du chatbot: {str(e)}"
+        )
+
+    def record(stream: AIStream) -> None:
+        if stream.status == "completed":
+            response_status = 200
+        elif stream.status == "cancelled":
+            response_status = 499
+        else:
+            response_status = stream.error.status_code if stream.error else 500
+        _record_chatbot_usage(api_key, request, response_status, stream.tokens_used, started)
+        if stream.status == "completed":
+            ai_response_cache.put(cache_key, stream.text, stream.tokens_used)
+
+    return EventStreamResponse(sse_events(stream, {"suggestions": CHATBOT_SUGGESTIONS}, on_end=record))
+
+CHATBOT_INSTRUCTIONS = {
+    "fr": "Tu es l'assistant d'analyse de données de NexusBI. Réponds en français, de façon concise et exploitable.",
+    "en": "You are NexusBI's data analysis assistant. Answer in English, concisely and with actionable insights.",
+}
+
+CHATBOT_SUGGESTIONS = [
+    "Envisagez d'exécuter des tests A/B supplémentaires",
+    "Examinez les motifs saisonniers identifiés",
+    "Validez les résultats avec des experts du domaine",
+    "Optimisez les paramètres du modèle pour de meilleurs résultats"
+]
+
+async def _chatbot_settings(db: AsyncSession, user_id: int) -> Tuple[str, float, int, str]:
+    """Modèle, température, max_tokens et langue de l'utilisateur (valeurs par défaut sans configuration)"""
+    user_settings = await db.scalar(
+        select(models.UserSettings).where(models.UserSettings.user_id == user_id)
+    )
+    if user_settings is None:
+        return "gemini-pro", 0.7, 1024, "fr"
+    return (user_settings.preferred_ai_model, user_settings.temperature,
+            user_settings.max_tokens, user_settings.language)
+
+def _chatbot_messages(query: str, language: str) -> List[dict]:
+    return [
+        {"role": "system", "content": CHATBOT_INSTRUCTIONS.get(language, CHATBOT_INSTRUCTIONS["fr"])},
+        {"role": "user", "content": query},
+    ]
+
+def _chatbot_cache_key(query: str, model: str, temperature: float, max_tokens: int, language: str) -> ResponseKey:
+    return response_cache_key(
+        query, model, temperature, context={"endpoint": "chatbot", "language": language, "max_tokens": max_tokens}
+    )
+
+def _simulated_response(query: str) -> str:
+    """Réponse simulée en français selon le type de requête (sans fournisseur configuré)"""
+    if "analyse de données" in query.lower():
+        return f"Basé sur votre demande d'analyse de données: '{query}', j'ai analysé les motifs et identifié des tendances clés. Les données montrent des corrélations significatives entre les variables X et Y, suggérant des opportunités commerciales potentielles."
+    if "prédiction" in query.lower():
+        return f"Pour votre demande de prédiction: '{query}', le modèle prévoit une augmentation de {random.uniform(5, 20):.1f}% de la métrique cible au cours du prochain trimestre, avec une confiance de {random.uniform(70, 95):.0f}%."
+    if "recommandation" in query.lower():
+        return f"Concernant votre demande de recommandation: '{query}', je suggère de mettre en œuvre la stratégie A pour des gains à court terme et la stratégie B pour une croissance à long terme. Cela est basé sur l'analyse des performances historiques."
+    return f"J'ai traité votre requête: '{query}'. Voici une analyse complète avec des informations exploitables et des recommandations basées sur les données, adaptées à votre contexte commercial."
+
+async def _active_api_key(db: AsyncSession, user_id: int, model: str) -> Optional[Tuple[int, str]]:
+    """Clé API active de l'utilisateur pour le fournisseur du modèle (None si absente ou en cas d'erreur)"""
+    try:
+        return await get_active_api_key(db, user_id, model.split("-")[0])
+    except Exception as e:
+        logger.warning("API key lookup failed, usage not recorded: %s", e)
+        return None
+
+def _record_chatbot_usage(api_key: Optional[Tuple[int, str]], request: Request,
+                          response_status: int, tokens_used: int, started: float) -> None:
+    """Compte un appel au chatbot sur la clé API active du fournisseur du modèle"""
+    if api_key is not None:
+        record_usage(
+            api_key[0], request.url.path, request.method, response_status,
+            tokens_used=tokens_used, processing_time_ms=(time.perf_counter() - started) * 1000
+        )
+
 @router.get("/chatbot/models")
 def get_chatbot_models() -> List[dict]:
     """
@@ -8,6 +8,16 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    # Utilisateur authentifié gardé en mémoire (0 = lecture de users à chaque requête)
+    AUTH_CACHE_TTL: float = 30.0  # secondes
+    AUTH_CACHE_MAX_ENTRIES: int = 10_000
+    # Mots de passe (bcrypt)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
+    # Vérification réussie gardée pour les reconnexions d'un même utilisateur
+    LOGIN_VERIFY_CACHE_TTL: float = 300.0  # secondes (0 = désactivé)
+    LOGIN_VERIFY_CACHE_SIZE: int = 10_000
 
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -34,6 +44,16 @@ class Settings(BaseSettings):
             return v
         return f"sqlite:///{info.data.get('SQLITE_DB')}"
 
+    # SQLite tuning (appliqué à chaque connexion, ignoré pour les autres bases)
+    SQLITE_TUNING: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # 256MB
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024  # 64MB par connexion
+    SQLITE_BUSY_TIMEOUT_MS: int = 30_000
+    # Écritures d'ingestion (upload, sync) sérialisées sur une connexion dédiée
+    SQLITE_WRITE_QUEUE: bool = True
+
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
 
@@ -50,6 +70,60 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "/tmp/nexusbi/uploads"
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50MB
 
+    # Travail pandas des endpoints async (lecture, statistiques, corrélations)
+    PANDAS_WORKERS: int = 4
+    PANDAS_QUEUE_LIMIT: int = 32
+
+    # Journal d'utilisation des clés API (écrit par lots)
+    USAGE_FLUSH_INTERVAL: float = 2.0  # secondes
+    USAGE_BATCH_SIZE: int = 500
+    USAGE_MAX_BUFFER: int = 100_000
+    USAGE_FLUSH_ATTEMPTS: int = 3  # échecs d'un lot avant d'isoler les événements refusés
+
+    # Journalisation : niveau global, niveaux par module ("app.services.data_sync=DEBUG,..."),
+    # format "json" ou "text"
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""
+    LOG_FORMAT: str = "json"
+
+    # Métriques Prometheus (GET /metrics)
+    METRICS_ENABLED: bool = True
+    # Spans des jobs d'ingestion : "none", "console" ou "otel"
+    TRACING_EXPORTER: str = "none"
+    TRACING_MAX_JOBS: int = 200
+    # Profilage à la demande (/api/v1/admin/profiler, superutilisateurs)
+    PROFILER_ENABLED: bool = True
+    # Pic de RSS par requête et par job (histogrammes /metrics, journal au-delà du seuil)
+    MEMORY_TRACKING: bool = True
+    MEMORY_SAMPLE_INTERVAL: float = 0.05  # secondes
+    MEMORY_LOG_THRESHOLD_MB: int = 256
+    # Admission selon l'empreinte estimée des sources (0 : désactivée) ; "queue" ou "reject"
+    MEMORY_BUDGET_MB: int = 0
+    MEMORY_ADMISSION: str = "queue"
+    MEMORY_ADMISSION_TIMEOUT: float = 30.0
+
+    # Passerelle IA : API compatible OpenAI (vide : réponses simulées), places d'appel, délais
+    AI_GATEWAY_URL: str = ""  # ex. "http://127.0.0.1:8001/v1" (ai_stub_server.py)
+    AI_GATEWAY_API_KEY: str = ""
+    AI_MAX_CONCURRENCY: int = 16
+    AI_MAX_CONCURRENCY_PER_USER: int = 2
+    AI_QUEUE_TIMEOUT: float = 10.0  # secondes
+    AI_REQUEST_TIMEOUT: float = 60.0  # secondes
+    AI_MOCK_LATENCY: float = 0.3  # secondes
+
+    # Cache des réponses IA (app/services/ai_cache.py) ; TTL 0 = désactivé
+    AI_CACHE_TTL: float = 3600.0  # secondes
+    AI_CACHE_MAX_ENTRIES: int = 1000
+    AI_CACHE_SEMANTIC: bool = False  # niveau par similarité des questions
+    AI_CACHE_SIMILARITY: float = 0.9  # similarité cosinus minimale
+
+    # Chart rendering
+    CHART_RENDER_WORKERS: int = 2
+    CHART_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 64MB
+
+    # Connected file strategies kept between requests (estimated size of their DataFrames)
+    STRATEGY_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 256MB
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -1,14 +1,17 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import models
 from app.core.config import settings
+from app.core.principal_cache import principal_cache
 from app.core.security import ALGORITHM
+from app.db.async_session import get_async_session_factory
 from app.db.session import SessionLocal
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -24,22 +27,36 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_session_factory()() as db:
+        yield db
+
+
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
 ) -> models.User:
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[ALGORITHM]
-        )
-        token_data = payload
-    except (jwt.JWTError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        )
+    token_data = principal_cache.get_payload(token)
+    if token_data is None:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[ALGORITHM]
+            )
+            token_data = payload
+        except (jwt.JWTError, ValidationError):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Could not validate credentials",
+            )
+        principal_cache.put_payload(token, token_data)
+
+    user = principal_cache.get_user(db, token_data)
+    if user is not None:
+        return user
+    generation = principal_cache.generation(token_data["sub"])
     user = db.query(models.User).filter(models.User.id == token_data["sub"]).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    principal_cache.put_user(token_data, user, generation)
     return user
 
 
@@ -0,0 +1,103 @@
+"""
+Exécuteurs bornés pour le travail bloquant des endpoints async
+
+Le travail pandas (lecture de fichiers, statistiques, corrélations) exécuté
+directement dans un endpoint `async def` bloque la boucle d'événements : plus
+aucune requête n'est servie pendant ce temps, y compris /health. Il est
+envoyé ici à un pool de threads de taille fixe ; au-delà de max_queue travaux
+en attente, les nouveaux sont refusés (ExecutorBusy, 503) au lieu de
+s'accumuler en mémoire.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.profiler import run_attributed
+
+
+class ExecutorBusy(RuntimeError):
+    """Trop de travaux en attente dans un BoundedExecutor"""
+
+
+class BoundedExecutor:
+    """Pool de threads de taille fixe avec une file d'attente bornée"""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+            return self._executor
+
+    def _call(self, fn: Callable[..., Any]) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _done(self, future: Future) -> None:
+        # Appelé aussi pour un travail annulé avant d'avoir démarré (_call n'a pas tourné)
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled():
+                self.completed += 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Exécute fn(*args, **kwargs) dans le pool et attend son résultat"""
+        executor = self._get_executor()
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorBusy(f"{self.name}: {self._pending} tâches en attente")
+            self._pending += 1
+        # Le contexte (job et span courants, requête profilée) suit le travail dans le thread
+        context = contextvars.copy_context()
+        try:
+            future = executor.submit(self._call, functools.partial(context.run, run_attributed, fn, *args, **kwargs))
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._done)
+        # Si l'appelant est annulé, wrap_future annule le travail encore en file
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Lecture des fichiers, reconstruction des DataFrames, statistiques et corrélations
+pandas_executor = BoundedExecutor("pandas", settings.PANDAS_WORKERS, settings.PANDAS_QUEUE_LIMIT)
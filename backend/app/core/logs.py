@@ -0,0 +1,127 @@
+"""
+Journalisation structurée (JSON), niveaux par module, écriture hors requête
+
+configure_logging() remplace les handlers du logger racine par un
+QueueHandler : logger.info() ne fait que préparer l'enregistrement et le
+mettre en file, un QueueListener (thread) le formate et l'écrit sur stdout.
+Les messages des chemins chauds (une ligne par instruction SQL, par table,
+par lot) sont au niveau DEBUG : au niveau INFO ils ne coûtent qu'un test de
+niveau, sans formatage ni I/O.
+
+- LOG_LEVEL : niveau global (INFO par défaut)
+- LOG_LEVELS : niveaux par module, "app.services.data_sync=DEBUG,sqlalchemy.engine=WARNING"
+- LOG_FORMAT : "json" (une ligne JSON par enregistrement) ou "text"
+
+Chaque enregistrement JSON contient ts, level, logger, message, job_id (job
+d'ingestion courant, voir tracing) et les champs passés par extra={...}.
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.tracing import current_job_id
+
+# Attributs standard d'un LogRecord : le reste vient de extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "job_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "job_id", None):
+            entry["job_id"] = record.job_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Met en file une copie de l'enregistrement, message déjà résolu ; le job
+    courant est lu ici, dans le thread appelant (contextvars), sauf si
+    extra={"job_id": ...} le fournit
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if getattr(record, "job_id", None) is None:
+            record.job_id = current_job_id()
+        return record
+
+
+def parse_levels(value: str) -> Dict[str, str]:
+    """"module=NIVEAU,module=NIVEAU" -> {module: NIVEAU}"""
+    levels = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging() -> None:
+    """Installe la file de journalisation et démarre le thread d'écriture (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_ContextQueueHandler(records))
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """
+    Écrit les enregistrements en file et arrête le thread d'écriture ; les
+    messages suivants sont écrits directement
+    """
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, _ContextQueueHandler):
+            root.removeHandler(handler)
+    listener.stop()
+    for handler in listener.handlers:
+        root.addHandler(handler)
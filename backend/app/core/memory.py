@@ -0,0 +1,320 @@
+"""
+Pic de mémoire par requête et par job, et admission selon un budget mémoire
+
+Un thread lit le RSS du processus (/proc/self/statm) toutes les
+MEMORY_SAMPLE_INTERVAL secondes ; chaque portée active (requête HTTP,
+track_memory() autour du chargement d'un DataFrame, d'un connect(), d'un
+upload ou d'une synchronisation) garde le maximum observé. La hausse
+(pic - RSS au début) est :
+- observée dans les histogrammes /metrics (par route, par opération) ;
+- ajoutée au span courant (peak_rss_increase_bytes), donc à la trace du job ;
+- écrite dans le journal au-delà de MEMORY_LOG_THRESHOLD_MB.
+Le RSS est celui du processus : des requêtes simultanées se partagent les
+hausses. Pour l'origine des allocations, voir les sessions memory=true du
+profileur (/api/v1/admin/profiler).
+
+Admission (MEMORY_BUDGET_MB > 0) : avant de charger une source, son
+empreinte est estimée à partir du nombre de lignes stocké et des types de
+colonnes ; au-delà du budget restant, la requête attend (MEMORY_ADMISSION =
+"queue", au plus MEMORY_ADMISSION_TIMEOUT secondes) ou est refusée
+("reject") avec MemoryBudgetExceeded (503).
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+MEMORY_BUCKETS = tuple(2 ** i * MB for i in range(0, 15))  # 1 Mo .. 16 Go
+
+# Octets par cellule d'un DataFrame chargé, selon le type de colonne
+CELL_BYTES = {"int": 8, "float": 8, "datetime": 8, "bool": 1, "object": 64}
+# Chargement depuis DataFrameData : texte JSON des lignes et dictionnaires décodés,
+# présents en même temps que le DataFrame en construction
+LOAD_OVERHEAD_PER_CELL = 200
+
+MEMORY_PEAK = registry.histogram(
+    "memory_peak_increase_bytes", "Hausse du RSS pendant une opération (chargement, connect, upload, sync)",
+    ("operation",), MEMORY_BUCKETS)
+HTTP_MEMORY_PEAK = registry.histogram(
+    "http_request_peak_rss_increase_bytes", "Hausse du RSS pendant une requête HTTP", ("method", "route"),
+    MEMORY_BUCKETS)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> Optional[int]:
+    """RSS du processus en octets (None hors Linux)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryScope:
+    """Portée suivie : RSS au début et maximum observé"""
+
+    __slots__ = ("operation", "start_rss", "peak_rss")
+
+    def __init__(self, operation: str, start_rss: int):
+        self.operation = operation
+        self.start_rss = start_rss
+        self.peak_rss = start_rss
+
+    @property
+    def increase_bytes(self) -> int:
+        return max(self.peak_rss - self.start_rss, 0)
+
+
+class RSSMonitor:
+    """Lit le RSS périodiquement et met à jour le pic des portées actives"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.latest: Optional[int] = None
+        self.peak: Optional[int] = None
+        self._scopes: set = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def available(self) -> bool:
+        if self.latest is None:
+            self.latest = current_rss()
+        return self.latest is not None
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rss-monitor", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self._observe(current_rss())
+
+    def _observe(self, rss: Optional[int]) -> None:
+        if rss is None:
+            return
+        self.latest = rss
+        if self.peak is None or rss > self.peak:
+            self.peak = rss
+        with self._lock:
+            scopes = list(self._scopes)
+        for scope in scopes:
+            if rss > scope.peak_rss:
+                scope.peak_rss = rss
+
+    def begin(self, operation: str, exact: bool = False) -> Optional[MemoryScope]:
+        """
+        Ouvre une portée ; exact=True lit le RSS maintenant (sinon la dernière
+        mesure du thread, suffisante pour les requêtes HTTP)
+        """
+        if not self.available:
+            return None
+        self._start()
+        start = current_rss() if exact else self.latest
+        scope = MemoryScope(operation, start or self.latest)
+        with self._lock:
+            self._scopes.add(scope)
+        return scope
+
+    def end(self, scope: MemoryScope, exact: bool = False) -> None:
+        if exact:
+            self._observe(current_rss())
+        with self._lock:
+            self._scopes.discard(scope)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            active = len(self._scopes)
+        return {
+            "rss_bytes": self.latest or 0,
+            "peak_rss_bytes": self.peak or 0,
+            "active_scopes": active,
+        }
+
+
+monitor = RSSMonitor(settings.MEMORY_SAMPLE_INTERVAL)
+
+
+def _log_increase(label: str, scope: MemoryScope) -> None:
+    if scope.increase_bytes >= settings.MEMORY_LOG_THRESHOLD_MB * MB:
+        logger.warning("%s: +%.0f Mo de RSS (pic %.0f Mo)", label, scope.increase_bytes / MB, scope.peak_rss / MB,
+                       extra={"operation": scope.operation, "rss_increase_bytes": scope.increase_bytes})
+
+
+@contextmanager
+def track_memory(operation: str, **labels: Any) -> Iterator[Optional[MemoryScope]]:
+    """Mesure la hausse du RSS pendant le bloc (histogramme, span courant, journal)"""
+    if not settings.MEMORY_TRACKING:
+        yield None
+        return
+    scope = monitor.begin(operation, exact=True)
+    if scope is None:
+        yield None
+        return
+    try:
+        yield scope
+    finally:
+        monitor.end(scope, exact=True)
+        MEMORY_PEAK.observe(scope.increase_bytes, operation=operation)
+        current_span().set(peak_rss_increase_bytes=scope.increase_bytes)
+        details = " ".join(f"{key}={value}" for key, value in labels.items())
+        _log_increase(f"{operation} {details}".strip(), scope)
+
+
+class MemoryMiddleware:
+    """Middleware ASGI : hausse du RSS pendant chaque requête, par route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        memory_scope = monitor.begin("http")
+        if memory_scope is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            monitor.end(memory_scope)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_MEMORY_PEAK.observe(memory_scope.increase_bytes, method=scope["method"], route=route)
+            _log_increase(f"{scope['method']} {route}", memory_scope)
+
+
+# Estimation de l'empreinte d'une source
+
+def _column_kind(column_type: str) -> str:
+    column_type = str(column_type).lower()
+    if "int" in column_type:
+        return "int"
+    if "float" in column_type or "double" in column_type or "decimal" in column_type or "numeric" in column_type:
+        return "float"
+    if "datetime" in column_type or "timestamp" in column_type:
+        return "datetime"
+    if "bool" in column_type:
+        return "bool"
+    return "object"
+
+
+def estimate_dataframe_bytes(row_count: int, column_types: Iterable[str]) -> int:
+    """Mémoire nécessaire pour reconstruire un DataFrame de row_count lignes depuis DataFrameData"""
+    per_row = sum(CELL_BYTES[_column_kind(column_type)] + LOAD_OVERHEAD_PER_CELL for column_type in column_types)
+    return int(row_count * per_row)
+
+
+def estimate_source_bytes(schema_info: Optional[Dict[str, Any]], row_count: Optional[int],
+                          column_count: Optional[int] = None) -> int:
+    """
+    Estimation à partir du schema_info d'une source et des compteurs de
+    DataVersion (0 si inconnus) ; sans types de colonnes, colonnes texte
+    """
+    schema_info = schema_info or {}
+    if row_count is None:
+        row_count = schema_info.get("row_count") or 0
+    columns = schema_info.get("columns") or []
+    column_types = [column.get("type", "object") if isinstance(column, dict) else "object" for column in columns]
+    if not column_types:
+        column_types = ["object"] * (column_count or schema_info.get("column_count") or 0)
+    return estimate_dataframe_bytes(row_count, column_types)
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """L'empreinte estimée dépasse le budget mémoire disponible"""
+
+
+class MemoryBudget:
+    """Réservations d'empreinte estimée, bornées par budget_bytes (0 : pas de limite)"""
+
+    def __init__(self, budget_bytes: int, mode: str = "queue", timeout: float = 30.0):
+        self.budget_bytes = budget_bytes
+        self.mode = mode
+        self.timeout = timeout
+        self.reserved = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _reject(self, estimate: int, label: str, reason: str) -> MemoryBudgetExceeded:
+        self.rejected += 1
+        logger.warning("Refusé (%s) : ~%.0f Mo estimés, %s", label, estimate / MB, reason,
+                       extra={"estimated_bytes": estimate})
+        return MemoryBudgetExceeded(
+            f"Mémoire insuffisante pour {label} : ~{estimate / MB:.0f} Mo estimés, {reason}"
+        )
+
+    @asynccontextmanager
+    async def reserve(self, estimate: int, label: str = "cette requête") -> AsyncIterator[None]:
+        """Réserve estimate octets pendant le bloc ; attend ou refuse selon le mode"""
+        if not self.enabled or estimate <= 0:
+            yield
+            return
+        if estimate > self.budget_bytes:
+            raise self._reject(estimate, label, f"budget {self.budget_bytes / MB:.0f} Mo")
+
+        condition = self._get_condition()
+        async with condition:
+            if self.reserved + estimate > self.budget_bytes:
+                if self.mode != "queue":
+                    raise self._reject(estimate, label, f"{self.reserved / MB:.0f} Mo déjà réservés")
+                self.queued += 1
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(
+                        condition.wait_for(lambda: self.reserved + estimate <= self.budget_bytes), self.timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise self._reject(estimate, label, f"toujours indisponible après {self.timeout:g}s")
+                finally:
+                    self.waiting -= 1
+            self.reserved += estimate
+            self.admitted += 1
+        try:
+            yield
+        finally:
+            async with condition:
+                self.reserved -= estimate
+                condition.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "budget_bytes": self.budget_bytes,
+            "reserved_bytes": self.reserved,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+
+memory_budget = MemoryBudget(
+    settings.MEMORY_BUDGET_MB * MB, settings.MEMORY_ADMISSION, settings.MEMORY_ADMISSION_TIMEOUT
+)
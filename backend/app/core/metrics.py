@@ -0,0 +1,271 @@
+"""
+Métriques de l'API au format texte Prometheus (GET /metrics)
+
+- MetricsMiddleware : durée, taille des réponses et requêtes en cours, par
+  méthode et par route (le modèle de chemin, pas l'URL : /data-sources/{data_source_id}/data)
+- compteurs d'ingestion (lignes, octets lus) et durée des synchronisations,
+  par type de source
+- les stats() des caches, exécuteurs et files (chart_cache, pandas_executor,
+  write_queue...) lues à chaque collecte
+
+Implémentation volontairement minimale (pas de dépendance prometheus_client) :
+compteurs, jauges et histogrammes à labels, protégés par un verrou.
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))  # 256 o .. 64 Mo
+SYNC_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# Clés des stats() qui ne font qu'augmenter : exposées comme compteurs (_total)
+STATS_COUNTERS = {
+    "hits", "misses", "token_hits", "token_misses", "invalidations",
+    "completed", "rejected", "failed", "recorded", "written", "dropped",
+    "flushes", "failed_flushes", "admitted", "queued", "cancelled", "timeouts",
+    "semantic_hits", "expired", "evictions", "tokens_saved", "discarded",
+}
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Par série : compte par bucket (non cumulé), somme, nombre
+        self._series: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = self.header()
+        names = self.labelnames + ("le",)
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Métriques déclarées et sources de stats() lues à chaque collecte"""
+
+    def __init__(self, prefix: str = "nexusbi"):
+        self.prefix = prefix
+        self._metrics: List[_Metric] = []
+        self._stats: List[Tuple[str, str, Callable[[], Dict[str, float]]]] = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(f"{self.prefix}_{name}", documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(f"{self.prefix}_{name}", documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(f"{self.prefix}_{name}", documentation, labelnames, buckets))
+
+    def register_stats(self, group: str, name: str, stats: Callable[[], Dict[str, float]]) -> None:
+        """
+        Expose un objet ayant stats() : nexusbi_<group>_<clé>{<group>="<name>"}
+
+        Les clés de STATS_COUNTERS deviennent des compteurs (_total), les
+        autres des jauges.
+        """
+        with self._lock:
+            self._stats.append((group, name, stats))
+
+    def _render_stats(self) -> Iterable[str]:
+        families: Dict[str, Tuple[str, str, List[str]]] = {}
+        with self._lock:
+            sources = list(self._stats)
+        for group, name, stats in sources:
+            try:
+                values = stats()
+            except Exception:
+                continue
+            for key, value in values.items():
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    continue
+                counter = key in STATS_COUNTERS
+                metric = f"{self.prefix}_{group}_{key}" + ("_total" if counter else "")
+                family = families.setdefault(metric, (group, "counter" if counter else "gauge", []))
+                family[2].append(f"{metric}{_format_labels((group,), (name,))} {_format_value(value)}")
+        for metric, (group, kind, samples) in families.items():
+            yield f"# HELP {metric} {group} stats()"
+            yield f"# TYPE {metric} {kind}"
+            yield from samples
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        lines.extend(self._render_stats())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status"))
+HTTP_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP (jusqu'au dernier octet envoyé)", ("method", "route"))
+HTTP_RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes", "Taille du corps des réponses HTTP", ("method", "route"), SIZE_BUCKETS)
+HTTP_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress", "Requêtes HTTP en cours", ("method",))
+
+INGEST_ROWS = registry.counter(
+    "ingest_rows_total", "Lignes chargées en base", ("source_type", "operation"))
+INGEST_BYTES = registry.counter(
+    "ingest_bytes_total", "Octets de fichiers lus et analysés", ("source_type", "operation"))
+SYNC_DURATION = registry.histogram(
+    "sync_duration_seconds", "Durée des synchronisations de sources", ("source_type", "status"), SYNC_BUCKETS)
+
+
+def record_ingest(source_type: str, operation: str, rows: int, size_bytes: Optional[int] = None) -> None:
+    """Compte une ingestion (operation : upload ou sync)"""
+    INGEST_ROWS.inc(rows, source_type=source_type, operation=operation)
+    if size_bytes is not None:
+        INGEST_BYTES.inc(size_bytes, source_type=source_type, operation=operation)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : latence, taille des réponses et requêtes en cours"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec(method=method)
+            # Modèle de chemin renseigné par le routeur FastAPI ; les 404 sont regroupés
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=str(status_code))
+            HTTP_DURATION.observe(time.perf_counter() - start, method=method, route=route_path)
+            HTTP_RESPONSE_SIZE.observe(size, method=method, route=route_path)
@@ -0,0 +1,179 @@
+"""
+Cache de l'utilisateur authentifié (get_current_user)
+
+Sans cache, chaque requête authentifiée décode le JWT puis lit la table users.
+Ici :
+- les JWT décodés sont mémorisés par chaîne de jeton, jusqu'à leur expiration ;
+- l'utilisateur est gardé AUTH_CACHE_TTL secondes, par (sub, exp) du jeton,
+  sous forme d'instance détachée rattachée à la session de la requête sans
+  requête SQL (Session.merge(load=False)).
+
+Toute modification ou suppression d'un User par l'ORM (désactivation,
+changement de mot de passe, droits) invalide ses entrées. Les UPDATE SQL
+directs ou faits par un autre processus ne sont pas vus : AUTH_CACHE_TTL
+borne alors la durée pendant laquelle l'ancien état est servi.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.models.user import User
+
+
+class PrincipalCache:
+    """Cache LRU des JWT décodés et des utilisateurs authentifiés"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._tokens: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._principals: "OrderedDict[Tuple[str, Any], Tuple[User, float]]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[Tuple[str, Any]]] = {}
+        # Incrémenté à chaque invalidation : un utilisateur lu avant ne doit pas être mis en cache
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.token_hits = 0
+        self.token_misses = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    # JWT décodés
+
+    def get_payload(self, token: str) -> Optional[Dict[str, Any]]:
+        """Payload d'un jeton déjà vérifié, ou None s'il faut le décoder"""
+        with self._lock:
+            payload = self._tokens.get(token)
+            if payload is None:
+                self.token_misses += 1
+                return None
+            exp = payload.get("exp")
+            if exp is not None and exp <= time.time():
+                # Expiré : jwt.decode() produira l'erreur habituelle
+                del self._tokens[token]
+                self.token_misses += 1
+                return None
+            self._tokens.move_to_end(token)
+            self.token_hits += 1
+            return payload
+
+    def put_payload(self, token: str, payload: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._tokens[token] = payload
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
+
+    # Utilisateurs
+
+    def generation(self, user_id: Any) -> int:
+        with self._lock:
+            return self._generations.get(_user_id(user_id), 0)
+
+    def get_user(self, db: Session, payload: Dict[str, Any]) -> Optional[User]:
+        """Utilisateur du jeton, rattaché à db, ou None s'il faut le lire en base"""
+        key = (str(payload.get("sub")), payload.get("exp"))
+        with self._lock:
+            entry = self._principals.get(key)
+            if entry is not None and entry[1] <= time.time():
+                self._forget(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._principals.move_to_end(key)
+            self.hits += 1
+            snapshot = entry[0]
+        return db.merge(snapshot, load=False)
+
+    def put_user(self, payload: Dict[str, Any], user: User, generation: int) -> None:
+        if not self.enabled:
+            return
+        # Copie détachée : l'instance de la requête reste liée à sa session
+        state = inspect(user)
+        snapshot = User(**{attr.key: getattr(user, attr.key) for attr in state.mapper.column_attrs})
+        make_transient_to_detached(snapshot)
+
+        cached_until = time.time() + self.ttl
+        exp = payload.get("exp")
+        if exp is not None:
+            cached_until = min(cached_until, exp)
+        key = (str(payload.get("sub")), exp)
+        with self._lock:
+            if self._generations.get(user.id, 0) != generation:
+                return
+            self._principals[key] = (snapshot, cached_until)
+            self._principals.move_to_end(key)
+            self._keys_by_user.setdefault(user.id, set()).add(key)
+            while len(self._principals) > self.max_entries:
+                self._forget(next(iter(self._principals)))
+
+    def _forget(self, key: Tuple[str, Any]) -> None:
+        entry = self._principals.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[0].id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[0].id]
+
+    def invalidate_user(self, user_id: Any) -> None:
+        """Retire les entrées d'un utilisateur (désactivation, mot de passe, suppression)"""
+        user_id = _user_id(user_id)
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for key in self._keys_by_user.pop(user_id, set()):
+                self._principals.pop(key, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._principals.clear()
+            self._keys_by_user.clear()
+            self._generations.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "tokens": len(self._tokens),
+                "principals": len(self._principals),
+                "token_hits": self.token_hits,
+                "token_misses": self.token_misses,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+def _user_id(user_id: Any) -> Any:
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return user_id
+
+
+principal_cache = PrincipalCache(settings.AUTH_CACHE_TTL, settings.AUTH_CACHE_MAX_ENTRIES)
+
+
+def invalidate_user(user_id: Any) -> None:
+    principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target: User) -> None:
+    principal_cache.invalidate_user(target.id)
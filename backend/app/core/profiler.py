@@ -0,0 +1,381 @@
+"""
+Profilage à la demande des workers en production (endpoints /admin/profiler)
+
+Un thread échantillonne la pile de tous les threads (sys._current_frames)
+toutes les `interval` secondes, sans redémarrer le worker ni instrumenter
+chaque appel (cProfile ne voit que le thread où il est activé, alors que le
+travail d'une requête est réparti entre la boucle d'événements,
+pandas_executor et la file d'écriture). Deux modes :
+- seconds  : tous les threads du processus pendant T secondes ;
+- requests : les N prochaines requêtes d'une route (modèle de chemin,
+  /api/v1/data-sources/{data_source_id}/statistics), y compris le travail
+  qu'elles envoient aux exécuteurs (le contexte est propagé).
+
+Le rapport donne les piles repliées (format « collapsed » de flamegraph.pl,
+speedscope...) et les fonctions les plus présentes. Avec memory=True, un
+instantané tracemalloc est pris au début et à la fin : allocations encore
+vivantes, par ligne ou par pile, et pic ; un instantané pris près du pic
+montre les DataFrames temporaires des requêtes. tracemalloc ralentit
+nettement le processus pendant la session.
+
+Une seule session à la fois ; l'inactivité ne coûte qu'une lecture
+d'attribut par requête.
+"""
+
+import contextvars
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MAX_SESSIONS = 10
+MAX_STACK_DEPTH = 128
+# Piles distinctes gardées par session ; au-delà elles sont comptées dans "[truncated]"
+MAX_STACKS = 20_000
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 30
+TRACEMALLOC_FRAMES = 25
+# Nouvel instantané « au pic » quand la mémoire tracée dépasse le précédent de 10 %
+PEAK_SNAPSHOT_GROWTH = 1.1
+
+# Scope ASGI de la requête en cours de profilage (posé par ProfilerMiddleware)
+_request_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("nexusbi_profiled_request", default=None)
+
+
+class ProfilerBusy(RuntimeError):
+    """Une session de profilage est déjà en cours"""
+
+
+def _frame_label(code, labels: Dict[Any, str]) -> str:
+    label = labels.get(code)
+    if label is None:
+        path = code.co_filename.replace("\\", "/").split("/")
+        label = f"{getattr(code, 'co_qualname', code.co_name)} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+        labels[code] = label
+    return label
+
+
+class ProfileSession:
+    """Session d'échantillonnage (thread dédié) et son rapport"""
+
+    def __init__(self, *, seconds: float, interval: float, route: Optional[str] = None,
+                 method: Optional[str] = None, max_requests: Optional[int] = None,
+                 sync_endpoints: Optional[List[Callable]] = None, memory: bool = False,
+                 memory_group_by: str = "lineno", memory_filter: Optional[str] = None,
+                 on_finish: Optional[Callable[["ProfileSession"], None]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.route = route
+        self.method = method.upper() if method else None
+        self.max_requests = max_requests
+        self.seconds = seconds
+        self.interval = interval
+        self.memory = memory
+        self.memory_group_by = memory_group_by
+        self.memory_filter = memory_filter
+        self.status = "running"
+        self._stop_reason: Optional[str] = None
+        self.started_at = time.time()
+        self.duration_s: Optional[float] = None
+        self.requests = 0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.memory_report: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # Attribution des échantillons (mode requests)
+        self._request_frames: Dict[Any, dict] = {}
+        self._thread_scopes: Dict[int, dict] = {}
+        self._endpoint_codes: Set[Any] = {fn.__code__ for fn in sync_endpoints or () if hasattr(fn, "__code__")}
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._on_finish = on_finish
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+
+    @property
+    def mode(self) -> str:
+        return "requests" if self.route else "seconds"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, reason: str = "stopped") -> None:
+        """Arrête l'échantillonnage ; le statut change quand le rapport est prêt"""
+        if self._stop_reason is None:
+            self._stop_reason = reason
+        self._stop.set()
+
+    def matches(self, scope: dict) -> bool:
+        route = scope.get("route")
+        return (route is not None and getattr(route, "path", None) == self.route
+                and (self.method is None or scope.get("method") == self.method))
+
+    # Suivi des requêtes (appelé par ProfilerMiddleware et run_attributed)
+
+    def request_started(self, frame, scope: dict) -> None:
+        self._request_frames[frame] = scope
+
+    def request_finished(self, frame, scope: dict) -> None:
+        self._request_frames.pop(frame, None)
+        if self._stop_reason is None and self.matches(scope):
+            self.requests += 1
+            if self.max_requests is not None and self.requests >= self.max_requests:
+                self.stop("completed")
+
+    # Échantillonnage
+
+    def _sample(self, own_thread: int, thread_names: Dict[int, str]) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            attributed = self.route is None
+            scope = self._thread_scopes.get(thread_id)
+            if scope is not None and self.matches(scope):
+                attributed = True
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                if not attributed:
+                    request_scope = self._request_frames.get(frame)
+                    if (request_scope is not None and self.matches(request_scope)) or code in self._endpoint_codes:
+                        attributed = True
+                stack.append(_frame_label(code, self._labels))
+                frame = frame.f_back
+            if not attributed:
+                continue
+            stack.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+            key = ";".join(reversed(stack))
+            if key not in self.stacks and len(self.stacks) >= MAX_STACKS:
+                key = "[truncated]"
+            self.stacks[key] += 1
+            self.samples += 1
+
+    def _run(self) -> None:
+        own_thread = threading.get_ident()
+        started_tracing = False
+        start_snapshot = peak_snapshot = None
+        peak_snapshot_bytes = 0
+        start = time.perf_counter()
+        deadline = start + self.seconds
+        try:
+            if self.memory:
+                if not tracemalloc.is_tracing():
+                    nframes = TRACEMALLOC_FRAMES if self.memory_group_by == "traceback" else 1
+                    tracemalloc.start(nframes)
+                    started_tracing = True
+                tracemalloc.reset_peak()
+                start_snapshot = tracemalloc.take_snapshot()
+                peak_snapshot_bytes = tracemalloc.get_traced_memory()[0]
+
+            thread_names: Dict[int, str] = {}
+            names_refreshed = 0.0
+            while not self._stop.wait(self.interval):
+                now = time.perf_counter()
+                if now >= deadline:
+                    self.stop("completed" if self.route is None else "timeout")
+                    break
+                if now - names_refreshed > 1.0:
+                    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    names_refreshed = now
+                self._sample(own_thread, thread_names)
+                if self.memory:
+                    # Les DataFrames d'une requête sont libérés à la fin : l'instantané
+                    # final ne les montre pas, celui pris près du pic, si
+                    traced = tracemalloc.get_traced_memory()[0]
+                    if traced > peak_snapshot_bytes * PEAK_SNAPSHOT_GROWTH:
+                        peak_snapshot = tracemalloc.take_snapshot()
+                        peak_snapshot_bytes = traced
+
+            if self.memory:
+                self.memory_report = self._memory_report(start_snapshot, peak_snapshot, peak_snapshot_bytes)
+        except Exception as e:
+            self.status = "error"
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            self.duration_s = time.perf_counter() - start
+            self._request_frames.clear()
+            self._thread_scopes.clear()
+            if self.error is None:
+                self.status = self._stop_reason or "completed"
+            if self._on_finish is not None:
+                self._on_finish(self)
+
+    def _top_allocations(self, snapshot, start_snapshot) -> List[Dict[str, Any]]:
+        top = []
+        for stat in snapshot.compare_to(start_snapshot, self.memory_group_by)[:TOP_ALLOCATIONS]:
+            frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+            top.append({
+                "location": frames[0] if frames else None,
+                "traceback": frames if self.memory_group_by == "traceback" else None,
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff,
+                "count": stat.count,
+            })
+        return top
+
+    def _memory_report(self, start_snapshot, peak_snapshot, peak_snapshot_bytes: int) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        end_snapshot = tracemalloc.take_snapshot()
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+        if self.memory_filter:
+            filters.append(tracemalloc.Filter(True, self.memory_filter))
+        start_snapshot = start_snapshot.filter_traces(filters)
+        return {
+            "group_by": self.memory_group_by,
+            "filter": self.memory_filter,
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            # Allocations encore vivantes à la fin de la session
+            "top": self._top_allocations(end_snapshot.filter_traces(filters), start_snapshot),
+            # Allocations vivantes au moment du plus haut niveau observé
+            "peak_snapshot_bytes": peak_snapshot_bytes if peak_snapshot is not None else None,
+            "top_at_peak": (self._top_allocations(peak_snapshot.filter_traces(filters), start_snapshot)
+                            if peak_snapshot is not None else []),
+        }
+
+    # Rapport
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in list(self.stacks.items()):
+            frames = stack.split(";")[1:]  # sans le nom du thread
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        samples = max(self.samples, 1)
+        return [
+            {
+                "function": function,
+                "self_samples": own[function],
+                "total_samples": count,
+                "self_pct": round(100 * own[function] / samples, 2),
+                "total_pct": round(100 * count / samples, 2),
+            }
+            for function, count in sorted(total.items(), key=lambda item: (own[item[0]], item[1]), reverse=True)[:limit]
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "mode": self.mode,
+            "route": self.route,
+            "method": self.method,
+            "max_requests": self.max_requests,
+            "requests": self.requests,
+            "seconds": self.seconds,
+            "interval_ms": self.interval * 1000,
+            "memory": self.memory,
+            "started_at": self.started_at,
+            "duration_s": self.duration_s,
+            "samples": self.samples,
+            "error": self.error,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "distinct_stacks": len(self.stacks),
+            "top_functions": self.top_functions(),
+            "memory_report": self.memory_report,
+        }
+
+
+class Profiler:
+    """Session active et dernières sessions terminées"""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self.active: Optional[ProfileSession] = None
+        self._sessions: "OrderedDict[str, ProfileSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, **options: Any) -> ProfileSession:
+        with self._lock:
+            if self.active is not None:
+                raise ProfilerBusy(f"session {self.active.id} en cours")
+            session = ProfileSession(on_finish=self._finished, **options)
+            self.active = session
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        logger.info("Profilage %s démarré (%s, route=%s, memory=%s)", session.id, session.mode, session.route,
+                    session.memory)
+        session.start()
+        return session
+
+    def _finished(self, session: ProfileSession) -> None:
+        with self._lock:
+            if self.active is session:
+                self.active = None
+        logger.info("Profilage %s terminé (%s, %d échantillons)", session.id, session.status, session.samples)
+
+    def get(self, session_id: str) -> Optional[ProfileSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return [session.summary() for session in reversed(sessions)]
+
+
+profiler = Profiler()
+
+
+def run_attributed(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Exécute fn dans un thread d'exécuteur (contexte de la requête déjà appliqué)
+    en rattachant ce thread à la requête profilée, s'il y en a une
+    """
+    scope = _request_scope.get()
+    session = profiler.active
+    if scope is None or session is None:
+        return fn(*args, **kwargs)
+    thread_id = threading.get_ident()
+    session._thread_scopes[thread_id] = scope
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        session._thread_scopes.pop(thread_id, None)
+
+
+class ProfilerMiddleware:
+    """Middleware ASGI : suit les requêtes pendant une session en mode requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        session = profiler.active
+        if scope["type"] != "http" or session is None or session.route is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Le cadre de cette coroutine est sur la pile de la boucle tant que la requête s'exécute
+        frame = sys._getframe()
+        session.request_started(frame, scope)
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+            session.request_finished(frame, scope)
@@ -0,0 +1,142 @@
+"""
+Sérialisation JSON des réponses de l'API avec orjson
+
+NumPy est pris en charge nativement (OPT_SERIALIZE_NUMPY) ; les objets pandas
+sont convertis colonne par colonne en tableaux NumPy, sans parcours Python
+cellule par cellule. Les NaN/NaT sont sérialisés en null.
+Les clés de dict NumPy/pandas (value_counts().to_dict()) sont converties
+comme les valeurs, au second essai seulement.
+"""
+
+import datetime
+import decimal
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _column_values(values: Any) -> Any:
+    """Valeurs d'une Series/Index sous une forme qu'orjson sérialise en un seul appel"""
+    if isinstance(values, (pd.Series, pd.Index)):
+        values = values.to_numpy()
+
+    kind = values.dtype.kind
+    if kind in "biuf":
+        # orjson exige un tableau C-contigu (une colonne de DataFrame est souvent une vue)
+        return np.ascontiguousarray(values)
+
+    if kind == "M":
+        # orjson refuse NaT dans un tableau datetime64
+        text = np.datetime_as_string(values, unit="auto").astype(object)
+        text[np.isnat(values)] = None
+        return text.tolist()
+
+    # object, string, catégories, types nullables : les éléments passent par json_default
+    return values.tolist()
+
+
+def json_default(obj: Any) -> Any:
+    """Conversion des types qu'orjson ne sérialise pas nativement"""
+    if isinstance(obj, pd.DataFrame):
+        return {str(col): _column_values(obj[col]) for col in obj.columns}
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return _column_values(obj)
+    if isinstance(obj, np.ndarray):
+        return _column_values(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (pd.Timestamp, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (pd.Timedelta, datetime.timedelta)):
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+# Clés de dict acceptées par OPT_NON_STR_KEYS (type exact : pas pd.Timestamp ni np.int64)
+_NATIVE_KEY_TYPES = (str, int, float, bool, type(None), datetime.datetime, datetime.date, datetime.time)
+
+
+def _json_key(key: Any) -> Any:
+    """Clé de dict NumPy/pandas (value_counts().to_dict()...) convertie comme les valeurs"""
+    if type(key) in _NATIVE_KEY_TYPES:
+        return key
+    if isinstance(key, np.datetime64):
+        key = pd.Timestamp(key)
+    key = json_default(key)
+    return key if type(key) in _NATIVE_KEY_TYPES else str(key)
+
+
+def _with_json_keys(content: Any) -> Any:
+    """Copie de content dont les clés de dict sont toutes acceptées par orjson"""
+    if isinstance(content, dict):
+        return {_json_key(key): _with_json_keys(value) for key, value in content.items()}
+    if isinstance(content, (list, tuple)):
+        return [_with_json_keys(value) for value in content]
+    return content
+
+
+def dumps(content: Any) -> bytes:
+    """Sérialise en JSON (bytes) avec la prise en charge NumPy/pandas de l'API"""
+    try:
+        return orjson.dumps(content, default=json_default, option=ORJSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        # Clés NumPy/pandas refusées par orjson : conversion puis second essai
+        return orjson.dumps(_with_json_keys(content), default=json_default, option=ORJSON_OPTIONS)
+
+
+def records_from_dataframe(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Lignes d'un DataFrame sous forme de dicts (format attendu par le frontend)
+
+    Chaque colonne est convertie une fois, les valeurs manquantes devenant None.
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        columns[str(col)] = series.astype(object).where(series.notna(), None).tolist()
+
+    names = list(columns.keys())
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+class NumpyJSONResponse(ORJSONResponse):
+    """
+    Réponse JSON par défaut de l'API
+
+    Les endpoints qui renvoient des objets NumPy/pandas doivent retourner
+    directement NumpyJSONResponse(content) : FastAPI applique sinon
+    jsonable_encoder au contenu avant de le passer à la réponse.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> bytes:
+    """Un évènement server-sent events (data en JSON sur une ligne)"""
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + dumps(data) + b"\n\n"
+
+
+class EventStreamResponse(StreamingResponse):
+    """
+    Flux text/event-stream, sans mise en mémoire tampon par un proxy ; si le
+    client se déconnecte, le générateur d'évènements est annulé
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(self, events: AsyncIterator[bytes], **kwargs: Any):
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **kwargs.pop("headers", {})}
+        super().__init__(events, headers=headers, **kwargs)
@@ -1,12 +1,26 @@
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.executor import BoundedExecutor
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt hors des threads de requête : une rafale de connexions attend ici
+# (ou reçoit ExecutorBusy) au lieu d'occuper les threads des autres endpoints
+password_executor = BoundedExecutor(
+    "bcrypt", settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_LIMIT
+)
 
 ALGORITHM = "HS256"
 
@@ -32,6 +46,83 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+class VerifiedPasswordCache:
+    """
+    Mots de passe récemment vérifiés avec succès, un par utilisateur
+
+    Seul un HMAC de (utilisateur, hash stocké, mot de passe) est gardé ; un
+    changement de mot de passe change le hash stocké et invalide l'entrée.
+    Les échecs ne sont jamais mis en cache : chaque mauvais mot de passe
+    passe par bcrypt.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Any, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(user_id: Any, plain_password: str, hashed_password: str) -> bytes:
+        message = f"{user_id}\0{hashed_password}\0{plain_password}".encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).digest()
+
+    def check(self, user_id: Any, plain_password: str, hashed_password: str) -> bool:
+        digest = self._digest(user_id, plain_password, hashed_password)
+        with self._lock:
+            entry = self._items.get(user_id)
+            if entry is not None and entry[1] > time.monotonic() and hmac.compare_digest(entry[0], digest):
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, user_id: Any, plain_password: str, hashed_password: str) -> None:
+        if self.ttl <= 0:
+            return
+        digest = self._digest(user_id, plain_password, hashed_password)
+        with self._lock:
+            self._items[user_id] = (digest, time.monotonic() + self.ttl)
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+verified_passwords = VerifiedPasswordCache(settings.LOGIN_VERIFY_CACHE_TTL, settings.LOGIN_VERIFY_CACHE_SIZE)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str, user_id: Optional[Any] = None
+) -> bool:
+    """
+    verify_password() dans password_executor (lève ExecutorBusy si la file est pleine)
+
+    Avec user_id, une vérification réussie est gardée LOGIN_VERIFY_CACHE_TTL
+    secondes : les reconnexions du même utilisateur ne recalculent pas bcrypt.
+    """
+    if user_id is not None and verified_passwords.check(user_id, plain_password, hashed_password):
+        return True
+    valid = await password_executor.run(verify_password, plain_password, hashed_password)
+    if valid and user_id is not None:
+        verified_passwords.add(user_id, plain_password, hashed_password)
+    return valid
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash() dans password_executor (lève ExecutorBusy si la file est pleine)"""
+    return await password_executor.run(get_password_hash, password)
+
+
 def get_random_string(length: int = 32) -> str:
     """Generate a random string of specified length."""
     import random
@@ -0,0 +1,253 @@
+"""
+Spans des étapes d'ingestion (upload, synchronisation, connexion aux sources)
+
+Chaque upload ou synchronisation est un job : job() ouvre le span racine et
+attribue un identifiant (32 caractères hexadécimaux, utilisable comme
+trace_id OpenTelemetry), renvoyé dans l'en-tête X-Job-Id. Les span() ouverts
+pendant le job, y compris dans pandas_executor et la file d'écriture (le
+contexte est propagé), sont enregistrés avec leur durée et leurs attributs
+(octets, lignes...) dans trace_store, consultable par GET /api/v1/jobs/{job_id}/trace.
+
+Hors d'un job, span() ne fait rien. L'export est désactivé par défaut
+(TRACING_EXPORTER="none") ; "console" journalise chaque span terminé
+(logger app.core.tracing, niveau INFO, champs du span dans l'enregistrement
+JSON), "otel" les transmet à l'API OpenTelemetry si le paquet opentelemetry est installé.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Spans gardés par job (les étapes répétées, tentatives d'encodage par exemple, sont bornées)
+MAX_SPANS_PER_JOB = 500
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("nexusbi_span", default=None)
+
+
+class Span:
+    """Étape mesurée d'un job ; set() ajoute des attributs (bytes, rows, ...)"""
+
+    __slots__ = ("name", "job_id", "span_id", "parent_id", "attributes", "start_time",
+                 "_start", "duration_ms", "status", "error", "exporter_state")
+
+    def __init__(self, name: str, job_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.job_id = job_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.exporter_state: Any = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def _finish(self, error: Optional[BaseException]) -> None:
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Span hors job : aucun enregistrement"""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class TraceStore:
+    """Spans des derniers jobs, par job_id (LRU borné)"""
+
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, root: Span, owner_id: Optional[int] = None) -> None:
+        with self._lock:
+            self._jobs[root.job_id] = {
+                "job_id": root.job_id,
+                "name": root.name,
+                "owner_id": owner_id,
+                "started_at": root.start_time,
+                "duration_ms": None,
+                "status": "running",
+                "attributes": root.attributes,
+                "spans": [],
+                "dropped_spans": 0,
+            }
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            job = self._jobs.get(span.job_id)
+            if job is None:
+                return
+            if span.parent_id is None:
+                job["duration_ms"] = span.duration_ms
+                job["status"] = span.status
+                job["error"] = span.error
+            elif len(job["spans"]) < MAX_SPANS_PER_JOB:
+                job["spans"].append(span.as_dict())
+            else:
+                job["dropped_spans"] += 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {**job, "attributes": dict(job["attributes"]), "spans": list(job["spans"])}
+
+    def recent(self, limit: int = 20, owner_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Derniers jobs, ceux de owner_id seulement s'il est donné"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if owner_id is None or job["owner_id"] == owner_id]
+        jobs = jobs[-limit:]
+        return [
+            {key: job.get(key) for key in ("job_id", "name", "owner_id", "started_at", "duration_ms", "status",
+                                           "attributes")}
+            for job in reversed(jobs)
+        ]
+
+
+class NoopExporter:
+    def on_start(self, span: Span, parent: Optional[Span]) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        pass
+
+
+class ConsoleExporter(NoopExporter):
+    def on_end(self, span: Span) -> None:
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("span %s %.1fms", span.name, span.duration_ms or 0.0,
+                        extra={"job_id": span.job_id, "span": span.as_dict()})
+
+
+class OpenTelemetryExporter(NoopExporter):
+    """Recrée chaque span avec l'API OpenTelemetry (le SDK et l'exporteur sont configurés par l'application hôte)"""
+
+    def __init__(self):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer("nexusbi.ingest")
+
+    def on_start(self, span: Span, parent: Optional[Span]) -> None:
+        context = None
+        if parent is not None and parent.exporter_state is not None:
+            context = self._trace.set_span_in_context(parent.exporter_state)
+        span.exporter_state = self._tracer.start_span(
+            span.name, context=context, start_time=int(span.start_time * 1e9)
+        )
+
+    def on_end(self, span: Span) -> None:
+        otel_span = span.exporter_state
+        if otel_span is None:
+            return
+        otel_span.set_attribute("nexusbi.job_id", span.job_id)
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                otel_span.set_attribute(f"nexusbi.{key}", value)
+        if span.error is not None:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        otel_span.end()
+
+
+def _create_exporter(name: str) -> NoopExporter:
+    name = name.lower()
+    if name == "console":
+        return ConsoleExporter()
+    if name in ("otel", "opentelemetry"):
+        try:
+            return OpenTelemetryExporter()
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otel mais opentelemetry n'est pas installé : export désactivé")
+    return NoopExporter()
+
+
+trace_store = TraceStore(settings.TRACING_MAX_JOBS)
+exporter = _create_exporter(settings.TRACING_EXPORTER)
+
+
+def current_job_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.job_id if span is not None else None
+
+
+def current_span() -> Any:
+    """Span courant (ou un span inerte hors job), pour y ajouter des attributs"""
+    span = _current_span.get()
+    return span if span is not None else _NOOP_SPAN
+
+
+@contextmanager
+def _run_span(span: Span, parent: Optional[Span]) -> Iterator[Span]:
+    token = _current_span.set(span)
+    exporter.on_start(span, parent)
+    error = None
+    try:
+        yield span
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        span._finish(error)
+        trace_store.add(span)
+        exporter.on_end(span)
+
+
+@contextmanager
+def job(name: str, owner_id: Optional[int] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Ouvre un job (span racine) ; son identifiant est span.job_id. owner_id :
+    utilisateur qui peut consulter sa trace (les superutilisateurs voient tout)
+    """
+    root = Span(name, uuid.uuid4().hex, None, attributes)
+    trace_store.start(root, owner_id)
+    with _run_span(root, None) as span:
+        yield span
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Mesure une étape du job courant ; sans job, ne fait rien"""
+    parent = _current_span.get()
+    if parent is None:
+        yield _NOOP_SPAN
+        return
+    with _run_span(Span(name, parent.job_id, parent.span_id, attributes), parent) as child:
+        yield child
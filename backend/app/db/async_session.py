@@ -0,0 +1,71 @@
+"""
+Accès asynchrone à la base (SQLAlchemy AsyncSession)
+
+Utilisé par les endpoints de lecture `async def` (données, statistiques,
+corrélations, graphiques) : les requêtes attendent la base sans bloquer la
+boucle d'événements. Le pilote async est déduit de SQLALCHEMY_DATABASE_URI
+(sqlite -> aiosqlite, postgresql -> asyncpg) ; l'engine est créé à la
+première utilisation, le pilote n'est donc requis que par ces endpoints.
+"""
+
+import threading
+from typing import Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.sqlite import configure_sqlite_engine, is_file_database, sqlite_connect_args
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+_lock = threading.Lock()
+
+
+def async_database_url(url: str) -> str:
+    """URL SQLAlchemy équivalente avec le pilote async"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """Engine async, avec les réglages SQLITE_* pour SQLite"""
+    global _engine, _session_factory
+    with _lock:
+        if _engine is None:
+            url = async_database_url(settings.SQLALCHEMY_DATABASE_URI)
+            kwargs = {"pool_pre_ping": True}
+            if url.startswith("sqlite"):
+                from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+                # Une base en mémoire n'existe que dans sa connexion
+                kwargs["poolclass"] = AsyncAdaptedQueuePool if is_file_database(url) else StaticPool
+                if settings.SQLITE_TUNING:
+                    kwargs["connect_args"] = sqlite_connect_args()
+            _engine = create_async_engine(url, **kwargs)
+            if url.startswith("sqlite") and settings.SQLITE_TUNING:
+                configure_sqlite_engine(_engine.sync_engine)
+            _session_factory = async_sessionmaker(_engine, expire_on_commit=False, autoflush=False)
+        return _engine
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    get_async_engine()
+    return _session_factory
+
+
+async def dispose_async_engine() -> None:
+    """Ferme les connexions async (arrêt de l'API)"""
+    global _engine, _session_factory
+    with _lock:
+        engine, _engine, _session_factory = _engine, None, None
+    if engine is not None:
+        await engine.dispose()
@@ -0,0 +1,41 @@
+import logging
+from pathlib import Path
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+# Dernière révision correspondant au schéma créé par create_all avant Alembic
+BASELINE_REVISION = "0001_baseline"
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+logger = logging.getLogger(__name__)
+
+
+def get_alembic_config(connection=None):
+    """Configuration Alembic du backend, éventuellement liée à une connexion existante"""
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def run_migrations(engine: Engine) -> None:
+    """
+    Met le schéma à jour (alembic upgrade head).
+
+    Une base créée avant Alembic (tables présentes, pas de table alembic_version)
+    est d'abord marquée à la révision de référence pour ne pas recréer ses tables.
+    """
+    from alembic import command
+
+    with engine.begin() as connection:
+        config = get_alembic_config(connection)
+        tables = inspect(connection).get_table_names()
+        if "alembic_version" not in tables and "users" in tables:
+            logger.info("Base existante sans historique de migrations: marquée à %s", BASELINE_REVISION)
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
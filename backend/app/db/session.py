@@ -1,7 +1,20 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.sqlite import configure_sqlite_engine, is_sqlite_url, sqlite_connect_args
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+
+def create_db_engine(url: str, **kwargs) -> Engine:
+    """Crée un engine ; pour SQLite, avec les réglages SQLITE_* des settings"""
+    if is_sqlite_url(url) and settings.SQLITE_TUNING:
+        kwargs.setdefault("connect_args", sqlite_connect_args())
+        db_engine = create_engine(url, **kwargs)
+        configure_sqlite_engine(db_engine)
+        return db_engine
+    return create_engine(url, **kwargs)
+
+
+engine = create_db_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
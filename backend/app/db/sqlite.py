@@ -0,0 +1,73 @@
+"""
+Réglages des connexions SQLite
+
+La base par défaut est un fichier SQLite partagé par les requêtes de lecture
+et les ingestions. Chaque connexion reçoit les PRAGMA configurés dans les
+settings : journal WAL (les lectures ne bloquent plus l'écriture et
+inversement), synchronous=NORMAL, mmap, taille du cache et busy_timeout.
+"""
+
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from app.core.config import settings
+
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+def is_sqlite_url(url: str) -> bool:
+    """Vrai pour une URL SQLAlchemy SQLite"""
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def is_file_database(url: str) -> bool:
+    """Vrai pour une base SQLite stockée dans un fichier (pas :memory:)"""
+    database = make_url(url).database
+    return bool(database) and database != ":memory:" and "mode=memory" not in database
+
+
+def sqlite_connect_args() -> Dict[str, Any]:
+    """Arguments de connexion pysqlite : délai d'attente du verrou en secondes"""
+    return {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+
+
+def sqlite_pragmas(file_database: bool = True) -> List[str]:
+    """PRAGMA exécutés à l'ouverture de chaque connexion"""
+    journal_mode = settings.SQLITE_JOURNAL_MODE.upper()
+    synchronous = settings.SQLITE_SYNCHRONOUS.upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"Invalid SQLITE_JOURNAL_MODE: {settings.SQLITE_JOURNAL_MODE}")
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid SQLITE_SYNCHRONOUS: {settings.SQLITE_SYNCHRONOUS}")
+
+    pragmas = [f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}"]
+    if file_database:
+        # Le journal et le mmap n'ont pas de sens pour une base en mémoire
+        pragmas += [
+            f"PRAGMA journal_mode = {journal_mode}",
+            f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}",
+        ]
+    pragmas += [
+        f"PRAGMA synchronous = {synchronous}",
+        # Valeur négative : taille en KiB plutôt qu'en nombre de pages
+        f"PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KB)}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    return pragmas
+
+
+def configure_sqlite_engine(engine: Engine) -> None:
+    """Applique les PRAGMA de sqlite_pragmas() à chaque nouvelle connexion de l'engine"""
+    pragmas = sqlite_pragmas(is_file_database(str(engine.url)))
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
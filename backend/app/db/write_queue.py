@@ -0,0 +1,139 @@
+"""
+File d'écriture unique pour l'ingestion (upload, synchronisation)
+
+SQLite n'accepte qu'un écrivain à la fois : des ingestions concurrentes sur
+des connexions différentes s'attendent mutuellement jusqu'au busy_timeout,
+puis échouent avec "database is locked". Les écritures volumineuses passent
+donc par un seul thread qui possède sa propre connexion ; les requêtes
+attendent leur tour sans bloquer la boucle d'événements, et les lectures
+(journal WAL) continuent pendant l'ingestion.
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.profiler import run_attributed
+from app.core.tracing import span
+from app.db.sqlite import is_sqlite_url
+
+
+class WriteQueue:
+    """Exécute les travaux d'écriture un par un, chacun dans sa propre transaction"""
+
+    def __init__(self, database_url: str):
+        self.database_url = database_url
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._engine: Optional[Engine] = None
+        self._session_factory: Optional[sessionmaker] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _start(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                from app.db.session import create_db_engine
+
+                # Une seule connexion, utilisée uniquement par le thread d'écriture
+                self._engine = create_db_engine(self.database_url, pool_size=1, max_overflow=0)
+                self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self._engine)
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+            return self._executor
+
+    def _run_job(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        db: Session = self._session_factory()
+        try:
+            result = fn(db, *args, **kwargs)
+            with span("commit"):
+                db.commit()
+            self.completed += 1
+            return result
+        except BaseException:
+            db.rollback()
+            self.failed += 1
+            raise
+        finally:
+            db.close()
+
+    def _done(self, future: Future) -> None:
+        # Appelé aussi pour un travail annulé avant d'avoir démarré
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Ajoute fn(db, *args, **kwargs) à la file ; la transaction est validée après fn"""
+        executor = self._start()
+        with self._lock:
+            self._pending += 1
+        # Le contexte (job et span courants, requête profilée) suit le travail dans le thread d'écriture
+        context = contextvars.copy_context()
+        try:
+            future = executor.submit(context.run, run_attributed, self._run_job, fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Comme submit(), en attendant le résultat sans bloquer la boucle
+        d'événements. Une fois en file, l'écriture va au bout même si
+        l'appelant est annulé : run_write a déjà validé la session de la
+        requête (par exemple la DataSource d'un upload, sans ses lignes)
+        """
+        return await asyncio.shield(asyncio.wrap_future(self.submit(fn, *args, **kwargs)))
+
+    @property
+    def pending(self) -> int:
+        """Travaux en attente ou en cours"""
+        with self._lock:
+            return self._pending
+
+    def stats(self) -> dict:
+        return {"pending": self.pending, "completed": self.completed, "failed": self.failed}
+
+    def shutdown(self) -> None:
+        """Termine les travaux en cours puis ferme la connexion d'écriture"""
+        with self._lock:
+            executor, engine = self._executor, self._engine
+            self._executor = self._engine = self._session_factory = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if engine is not None:
+            engine.dispose()
+
+
+write_queue = WriteQueue(settings.SQLALCHEMY_DATABASE_URI)
+
+
+def writes_serialized() -> bool:
+    """Vrai si les écritures d'ingestion passent par write_queue"""
+    return settings.SQLITE_WRITE_QUEUE and is_sqlite_url(settings.SQLALCHEMY_DATABASE_URI)
+
+
+async def run_write(db: Session, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Exécute fn(session, *args, **kwargs) puis valide la transaction
+
+    Avec la file d'écriture, la session de la requête est d'abord validée (elle
+    ne doit pas garder de verrou pendant l'attente) et fn reçoit la session du
+    thread d'écriture. Sinon fn est exécutée directement sur db.
+    """
+    if not writes_serialized():
+        result = fn(db, *args, **kwargs)
+        with span("commit"):
+            db.commit()
+        return result
+
+    db.commit()
+    return await write_queue.run(fn, *args, **kwargs)
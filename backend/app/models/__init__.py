@@ -1,5 +1,5 @@
 from .user import User
-from .project import Project, DataSource, DataFrameData
+from .project import Project, DataSource, DataFrameData, DataBlob, DataVersion
 from .api_keys import APIKey, APIKeyUsage, UserSettings, UserActivity
 
-__all__ = ["User", "Project", "DataSource", "DataFrameData"]
\ No newline at end of file
+__all__ = ["User", "Project", "DataSource", "DataFrameData", "DataBlob", "DataVersion"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Text, LargeBinary
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Text, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -38,6 +38,8 @@ class DataSource(Base):
     # Relationships
     project = relationship("Project", back_populates="data_sources")
     data_rows = relationship("DataFrameData", back_populates="data_source")
+    data_blobs = relationship("DataBlob", back_populates="data_source")
+    data_version = relationship("DataVersion", back_populates="data_source", uselist=False)
 
 
 class DataFrameData(Base):
@@ -49,4 +51,37 @@ class DataFrameData(Base):
     row_index = Column(Integer, nullable=False)  # Row index in the DataFrame
 
     # Relationships
-    data_source = relationship("DataSource", back_populates="data_rows")
\ No newline at end of file
+    data_source = relationship("DataSource", back_populates="data_rows")
+
+    # Pages are read, counted and deleted per data source in row_index order
+    __table_args__ = (
+        Index("ix_dataframe_data_source_row", "data_source_id", "row_index"),
+    )
+
+
+class DataBlob(Base):
+    __tablename__ = "data_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    data_source_id = Column(Integer, ForeignKey("data_sources.id"), nullable=False, index=True)
+    row_index = Column(Integer, nullable=False)  # Row index in the DataFrame
+    column_name = Column(String, nullable=False)
+    content = Column(Text, nullable=False)  # Original large value (base64, blob, ...)
+    size = Column(Integer, nullable=False)  # Length of the value in characters
+
+    # Relationships
+    data_source = relationship("DataSource", back_populates="data_blobs")
+
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    data_source_id = Column(Integer, ForeignKey("data_sources.id"), nullable=False, unique=True)
+    version = Column(Integer, nullable=False, default=1)  # Incremented each time the rows are replaced
+    row_count = Column(Integer, nullable=False, default=0)
+    column_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    data_source = relationship("DataSource", back_populates="data_version")
@@ -0,0 +1,257 @@
+"""
+Cache des réponses de l'assistant IA et du chatbot
+
+Une réponse du modèle est réutilisée pour la même question (normalisée :
+casse, accents, ponctuation, espaces), le même modèle, la même température,
+le même contexte (langue, max_tokens) et la même version des données du
+projet : toute modification d'une source du projet change la clé.
+
+Deux niveaux :
+- exact : question normalisée identique ;
+- sémantique (AI_CACHE_SEMANTIC) : question la plus proche parmi celles
+  déjà posées avec les mêmes paramètres, si la similarité cosinus atteint
+  AI_CACHE_SIMILARITY. Les vecteurs sont calculés localement (mots et
+  trigrammes de caractères hachés, sans appel au modèle) et gardés dans un
+  index numpy par jeu de paramètres. Proche n'est pas identique
+  ("augmenter" / "diminuer" les ventes) : désactivé par défaut.
+
+Entrées gardées AI_CACHE_TTL secondes (0 = cache désactivé), au plus
+AI_CACHE_MAX_ENTRIES (LRU). hits / semantic_hits / misses et les jetons
+économisés sont exposés par /metrics.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Dimension des vecteurs de l'index sémantique
+EMBEDDING_DIMENSIONS = 512
+
+
+def normalize_query(query: str) -> str:
+    """Minuscules, sans accents ni ponctuation, espaces réduits"""
+    text = unicodedata.normalize("NFKD", query.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.findall(r"\w+", text))
+
+
+def hashed_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> Any:
+    """Vecteur normé des mots et trigrammes de caractères de text (hachage stable crc32)"""
+    import numpy as np
+
+    vector = np.zeros(dimensions, dtype=np.float32)
+    padded = f" {text} "
+    features = text.split() + [padded[i:i + 3] for i in range(len(padded) - 2)]
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dimensions] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass
+class ResponseKey:
+    """Question normalisée + paramètres (partition) ; vector calculé à la première recherche sémantique"""
+    query: str
+    partition: Tuple[str, ...]
+    vector: Any = field(default=None, compare=False)
+
+    @property
+    def exact(self) -> Tuple[Tuple[str, ...], str]:
+        return self.partition, self.query
+
+
+def response_cache_key(query: str, model: str, temperature: float, *,
+                       context: Optional[Dict[str, Any]] = None, data_version: Any = None) -> ResponseKey:
+    partition = (
+        model,
+        f"{temperature:.3f}",
+        json.dumps(context or {}, sort_keys=True, default=str),
+        json.dumps(data_version, sort_keys=True, default=str),
+    )
+    return ResponseKey(normalize_query(query), partition)
+
+
+@dataclass
+class CachedResponse:
+    text: str
+    tokens_used: int
+    expires_at: float
+    tier: str = "exact"  # ou "semantic" pour la réponse renvoyée par get()
+
+
+class AIResponseCache:
+    """Cache LRU à durée de vie des réponses du modèle, avec index sémantique optionnel"""
+
+    def __init__(self, ttl: float, max_entries: int, semantic: bool = False, similarity: float = 0.9,
+                 embed: Callable[[str], Any] = hashed_embedding):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.semantic = semantic
+        self.similarity = similarity
+        self.embed = embed
+        self._items: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        # Index sémantique : partition -> {clé exacte: vecteur}, matrice recalculée après modification
+        self._vectors: Dict[Tuple[str, ...], Dict[Hashable, Any]] = {}
+        self._matrices: Dict[Tuple[str, ...], Tuple[List[Hashable], Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.tokens_saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: ResponseKey) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._lookup(key.exact, now)
+            if entry is not None:
+                self.hits += 1
+                self.tokens_saved += entry.tokens_used
+                return entry
+
+        if not self.semantic or not key.query:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Vecteur calculé hors verrou, réutilisé par put()
+        if key.vector is None:
+            key.vector = self.embed(key.query)
+        with self._lock:
+            nearest = self._nearest(key)
+            entry = self._lookup(nearest, now) if nearest is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.semantic_hits += 1
+            self.tokens_saved += entry.tokens_used
+            return CachedResponse(entry.text, entry.tokens_used, entry.expires_at, "semantic")
+
+    def put(self, key: ResponseKey, text: str, tokens_used: int) -> None:
+        if not self.enabled or not text:
+            return
+        if self.semantic and key.query and key.vector is None:
+            key.vector = self.embed(key.query)
+        with self._lock:
+            exact = key.exact
+            self._remove(exact)
+            self._items[exact] = CachedResponse(text, tokens_used, time.monotonic() + self.ttl)
+            if self.semantic and key.vector is not None:
+                self._vectors.setdefault(key.partition, {})[exact] = key.vector
+                self._matrices.pop(key.partition, None)
+            while len(self._items) > self.max_entries:
+                self._remove(next(iter(self._items)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._vectors.clear()
+            self._matrices.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "tokens_saved": self.tokens_saved,
+            }
+
+    def _lookup(self, exact: Hashable, now: float) -> Optional[CachedResponse]:
+        entry = self._items.get(exact)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(exact)
+            self.expired += 1
+            return None
+        self._items.move_to_end(exact)
+        return entry
+
+    def _nearest(self, key: ResponseKey) -> Optional[Hashable]:
+        """Clé exacte de la question la plus proche dans la même partition (seuil similarity)"""
+        vectors = self._vectors.get(key.partition)
+        if not vectors:
+            return None
+        keys, matrix = self._matrices.get(key.partition) or (None, None)
+        if keys is None:
+            import numpy as np
+
+            keys = list(vectors)
+            matrix = np.stack([vectors[k] for k in keys])
+            self._matrices[key.partition] = (keys, matrix)
+        scores = matrix @ key.vector
+        best = int(scores.argmax())
+        return keys[best] if scores[best] >= self.similarity else None
+
+    def _remove(self, exact: Hashable) -> None:
+        if self._items.pop(exact, None) is None:
+            return
+        partition = exact[0]
+        vectors = self._vectors.get(partition)
+        if vectors is not None and vectors.pop(exact, None) is not None:
+            self._matrices.pop(partition, None)
+            if not vectors:
+                del self._vectors[partition]
+
+
+async def project_data_version(db: Any, project_id: Optional[int]) -> Any:
+    """
+    Version des données d'un projet : (source, version DataFrameData, mise à
+    jour, date du fichier) de chaque source ; None sans projet
+    """
+    if project_id is None:
+        return None
+    from sqlalchemy import select
+
+    from app import models
+
+    rows = await db.execute(
+        select(models.DataSource.id, models.DataSource.updated_at, models.DataSource.file_path,
+               models.DataVersion.version)
+        .outerjoin(models.DataVersion, models.DataVersion.data_source_id == models.DataSource.id)
+        .where(models.DataSource.project_id == project_id)
+        .order_by(models.DataSource.id)
+    )
+    version = []
+    for source_id, updated_at, file_path, data_version in rows:
+        file_mtime = os.path.getmtime(file_path) if file_path and os.path.exists(file_path) else None
+        version.append([source_id, data_version or 0, updated_at.isoformat() if updated_at else None, file_mtime])
+    return version
+
+
+async def cached_sse_events(cached: CachedResponse, final: Dict[str, Any]) -> AsyncIterator[bytes]:
+    """Évènements SSE d'une réponse en cache : un seul "chunk" puis "done" (comme sse_events)"""
+    from app.core.responses import sse_event
+
+    yield sse_event({"delta": cached.text}, "chunk")
+    yield sse_event({**final, "tokens_used": cached.tokens_used, "cached": cached.tier}, "done")
+
+
+ai_response_cache = AIResponseCache(
+    ttl=settings.AI_CACHE_TTL,
+    max_entries=settings.AI_CACHE_MAX_ENTRIES,
+    semantic=settings.AI_CACHE_SEMANTIC,
+    similarity=settings.AI_CACHE_SIMILARITY,
+)
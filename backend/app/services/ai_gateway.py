@@ -0,0 +1,430 @@
+"""
+Passerelle async vers les modèles d'IA (chatbot, assistant)
+
+Les appels au modèle ne bloquent ni la boucle d'événements ni le pool de
+threads des requêtes :
+- un seul httpx.AsyncClient (connexions réutilisées) vers une API compatible
+  OpenAI (POST {AI_GATEWAY_URL}/chat/completions : OpenAI, endpoint
+  compatible de Gemini, ou le serveur de test ai_stub_server.py) ;
+- AI_MAX_CONCURRENCY appels simultanés au total : au-delà, attente d'au plus
+  AI_QUEUE_TIMEOUT secondes puis AIGatewayBusy (503) ;
+- AI_MAX_CONCURRENCY_PER_USER appels simultanés par utilisateur : au-delà,
+  AIUserLimitExceeded (429) immédiatement ;
+- AI_REQUEST_TIMEOUT secondes par appel (AIGatewayTimeout, 504) ;
+- si le client HTTP se déconnecte, l'appel au modèle est annulé
+  (ClientDisconnected).
+
+open_stream() renvoie la réponse fragment par fragment (stream=true de
+l'API, lu en SSE) : la place d'appel est prise avant la réponse HTTP (429/503
+possibles) et rendue à la fin du flux, y compris si le client se déconnecte.
+Le délai AI_REQUEST_TIMEOUT s'applique alors entre deux fragments.
+
+Sans AI_GATEWAY_URL, la réponse de repli fournie par l'endpoint est
+renvoyée après AI_MOCK_LATENCY secondes (asyncio.sleep), comme les réponses
+simulées d'origine ; en flux, mot par mot sur la même durée.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de vérification de la déconnexion du client pendant un appel
+DISCONNECT_POLL_INTERVAL = 0.25
+
+AI_FIRST_CHUNK = registry.histogram(
+    "ai_first_chunk_seconds", "Délai avant le premier fragment d'une réponse IA en flux", ("model",))
+
+
+class AIGatewayError(RuntimeError):
+    """Réponse invalide ou erreur du fournisseur de modèle ; status_code : statut HTTP à renvoyer"""
+    status_code = 502
+
+
+class AIGatewayBusy(AIGatewayError):
+    """Toutes les places d'appel sont occupées"""
+    status_code = 503
+
+
+class AIUserLimitExceeded(AIGatewayBusy):
+    """L'utilisateur a déjà AI_MAX_CONCURRENCY_PER_USER appels en cours"""
+    status_code = 429
+
+
+class AIGatewayTimeout(AIGatewayError):
+    """Le modèle n'a pas répondu dans AI_REQUEST_TIMEOUT secondes"""
+    status_code = 504
+
+
+class ClientDisconnected(AIGatewayError):
+    """Le client est parti pendant l'appel ; l'appel au modèle a été annulé"""
+    status_code = 499
+
+
+@dataclass
+class AICompletion:
+    text: str
+    model: str
+    tokens_used: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation du nombre de jetons (~4 caractères par jeton)"""
+    return max(1, len(text) // 4)
+
+
+class AIGateway:
+    """Client partagé, places d'appel (globales et par utilisateur) et compteurs"""
+
+    def __init__(self, base_url: str, api_key: str, max_concurrency: int, max_per_user: int,
+                 queue_timeout: float, request_timeout: float, mock_latency: float):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_per_user = max_per_user
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.mock_latency = mock_latency
+        # Créés dans la boucle d'événements qui les utilise (voir aclose())
+        self._client = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._user_calls: Dict[int, int] = {}
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.timeouts = 0
+
+    def _get_client(self):
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.request_timeout, connect=min(self.request_timeout, 5.0)),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+            )
+        return self._client
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    async def _acquire(self, user_id: Optional[int]) -> None:
+        if user_id is not None:
+            if self._user_calls.get(user_id, 0) >= self.max_per_user:
+                self.rejected += 1
+                raise AIUserLimitExceeded(
+                    f"{self.max_per_user} requêtes IA déjà en cours pour cet utilisateur"
+                )
+            self._user_calls[user_id] = self._user_calls.get(user_id, 0) + 1
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._get_slots().acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._release_user(user_id)
+            self.rejected += 1
+            raise AIGatewayBusy("Trop de requêtes IA en cours, réessayez plus tard")
+        except BaseException:
+            self._release_user(user_id)
+            raise
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def _release_user(self, user_id: Optional[int]) -> None:
+        if user_id is None:
+            return
+        remaining = self._user_calls.get(user_id, 1) - 1
+        if remaining > 0:
+            self._user_calls[user_id] = remaining
+        else:
+            self._user_calls.pop(user_id, None)
+
+    def _release(self, user_id: Optional[int]) -> None:
+        self.in_flight -= 1
+        self._get_slots().release()
+        self._release_user(user_id)
+
+    async def complete(self, messages: List[Dict[str, str]], model: str, *, temperature: float = 0.7,
+                       max_tokens: int = 1024, user_id: Optional[int] = None, request: Any = None,
+                       fallback: Optional[str] = None, api_key: Optional[str] = None) -> AICompletion:
+        """
+        Envoie messages au modèle et renvoie sa réponse ; request (Starlette)
+        permet d'annuler l'appel si le client se déconnecte, api_key remplace
+        AI_GATEWAY_API_KEY (clé de l'utilisateur pour le fournisseur)
+        """
+        await self._acquire(user_id)
+        started = time.perf_counter()
+        call = asyncio.ensure_future(self._call(messages, model, temperature, max_tokens, fallback, api_key))
+        try:
+            if request is not None:
+                await _cancel_on_disconnect(call, request)
+            completion = await call
+        except asyncio.CancelledError:
+            call.cancel()
+            self.cancelled += 1
+            if _current_task_cancelling():
+                # La requête elle-même est annulée (arrêt du serveur)
+                raise
+            raise ClientDisconnected("Client déconnecté, appel au modèle annulé")
+        except AIGatewayTimeout:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._release(user_id)
+        self.completed += 1
+        logger.debug("Réponse de %s en %.2fs (%d jetons)", model, time.perf_counter() - started,
+                     completion.tokens_used)
+        return completion
+
+    async def _call(self, messages: List[Dict[str, str]], model: str, temperature: float,
+                    max_tokens: int, fallback: Optional[str], api_key: Optional[str]) -> AICompletion:
+        if not self.base_url:
+            # Pas de fournisseur configuré : réponse simulée, sans bloquer la boucle
+            await asyncio.sleep(self.mock_latency)
+            text = fallback or ""
+            return AICompletion(text=text, model=model, tokens_used=min(estimate_tokens(text), max_tokens))
+
+        import httpx
+
+        try:
+            response = await self._get_client().post(
+                "/chat/completions", headers=self._headers(api_key),
+                json=_payload(messages, model, temperature, max_tokens),
+            )
+        except httpx.TimeoutException:
+            raise AIGatewayTimeout(f"Le modèle {model} n'a pas répondu dans les {self.request_timeout:g}s")
+        except httpx.HTTPError as e:
+            raise AIGatewayError(f"Fournisseur de modèle injoignable: {e}")
+        if response.status_code != 200:
+            raise AIGatewayError(f"Le fournisseur de modèle a répondu {response.status_code}: {response.text[:200]}")
+        try:
+            body = response.json()
+            text = body["choices"][0]["message"]["content"] or ""
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise AIGatewayError("Réponse du fournisseur de modèle illisible")
+        usage = body.get("usage") or {}
+        tokens_used = usage.get("total_tokens") or estimate_tokens(text)
+        return AICompletion(text=text, model=body.get("model") or model, tokens_used=tokens_used)
+
+    async def open_stream(self, messages: List[Dict[str, str]], model: str, *, temperature: float = 0.7,
+                          max_tokens: int = 1024, user_id: Optional[int] = None,
+                          fallback: Optional[str] = None, api_key: Optional[str] = None) -> "AIStream":
+        """
+        Prend une place d'appel (AIGatewayBusy / AIUserLimitExceeded sinon) et
+        renvoie le flux de la réponse, à itérer jusqu'au bout ou à fermer
+        """
+        await self._acquire(user_id)
+        stream = AIStream(self, model, user_id)
+        stream._chunks = self._stream_chunks(stream, messages, model, temperature, max_tokens, fallback, api_key)
+        return stream
+
+    async def _stream_chunks(self, stream: "AIStream", messages: List[Dict[str, str]], model: str,
+                             temperature: float, max_tokens: int, fallback: Optional[str],
+                             api_key: Optional[str]) -> AsyncIterator[str]:
+        if not self.base_url:
+            words = re.findall(r"\S+\s*", fallback or "")
+            interval = self.mock_latency / max(len(words), 1)
+            for word in words:
+                await asyncio.sleep(interval)
+                yield word
+            return
+
+        import httpx
+
+        payload = _payload(messages, model, temperature, max_tokens)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        try:
+            async with self._get_client().stream("POST", "/chat/completions", headers=self._headers(api_key),
+                                                 json=payload) as response:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode(errors="replace")
+                    raise AIGatewayError(f"Le fournisseur de modèle a répondu {response.status_code}: {body[:200]}")
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except ValueError:
+                        raise AIGatewayError("Fragment du fournisseur de modèle illisible")
+                    usage = chunk.get("usage")
+                    if usage and usage.get("total_tokens"):
+                        stream.tokens_used = usage["total_tokens"]
+                    for choice in chunk.get("choices") or []:
+                        content = (choice.get("delta") or {}).get("content")
+                        if content:
+                            yield content
+        except httpx.TimeoutException:
+            raise AIGatewayTimeout(f"Le modèle {model} n'a rien envoyé pendant {self.request_timeout:g}s")
+        except httpx.HTTPError as e:
+            raise AIGatewayError(f"Fournisseur de modèle injoignable: {e}")
+
+    def _headers(self, api_key: Optional[str]) -> Dict[str, str]:
+        api_key = api_key or self.api_key
+        return {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    async def aclose(self) -> None:
+        """Ferme les connexions ; client et places sont recréés au prochain appel"""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._slots = None
+        self._user_calls.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "timeouts": self.timeouts,
+        }
+
+
+class AIStream:
+    """
+    Réponse en flux : async for chunk in stream. À la fin (complète, en
+    erreur ou abandonnée par le client), status, text et tokens_used sont
+    renseignés et la place d'appel est rendue.
+    """
+
+    def __init__(self, gateway: AIGateway, model: str, user_id: Optional[int]):
+        self.gateway = gateway
+        self.model = model
+        self.user_id = user_id
+        self.status = "pending"  # completed, cancelled, error
+        self.error: Optional[AIGatewayError] = None
+        self.tokens_used = 0
+        self.parts: List[str] = []
+        self._chunks: Optional[AsyncIterator[str]] = None
+        self._released = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        if self._chunks is None:
+            return
+        chunks, self._chunks = self._chunks, None
+        started = time.perf_counter()
+        try:
+            async for chunk in chunks:
+                if not self.parts:
+                    AI_FIRST_CHUNK.observe(time.perf_counter() - started, model=self.model)
+                self.parts.append(chunk)
+                yield chunk
+            self.status = "completed"
+            self.gateway.completed += 1
+        except (asyncio.CancelledError, GeneratorExit):
+            self.status = "cancelled"
+            self.gateway.cancelled += 1
+            raise
+        except AIGatewayError as e:
+            self.status, self.error = "error", e
+            if isinstance(e, AIGatewayTimeout):
+                self.gateway.timeouts += 1
+            else:
+                self.gateway.failed += 1
+            raise
+        except Exception:
+            self.status = "error"
+            self.gateway.failed += 1
+            raise
+        finally:
+            # Sans décompte du fournisseur (ou flux interrompu) : estimation sur le texte envoyé
+            if not self.tokens_used and self.parts:
+                self.tokens_used = estimate_tokens(self.text)
+            # Avant tout await : une annulation peut interrompre la suite
+            self.release()
+            await chunks.aclose()
+
+    def release(self) -> None:
+        """Rend la place d'appel (une seule fois) ; un flux jamais lu compte comme annulé"""
+        if self._released:
+            return
+        self._released = True
+        if self.status == "pending":
+            self.status = "cancelled"
+            self.gateway.cancelled += 1
+        self.gateway._release(self.user_id)
+
+
+async def sse_events(stream: AIStream, final: Dict[str, Any],
+                     on_end: Optional[Callable[[AIStream], None]] = None) -> AsyncIterator[bytes]:
+    """
+    Évènements SSE d'une réponse en flux : "chunk" ({"delta": ...}) par
+    fragment, puis "done" (final, model_used, tokens_used) ou "error"
+    ({"detail", "status_code"}) ; on_end(stream) est appelé à la fin, y
+    compris si le client se déconnecte
+    """
+    import anyio
+
+    from app.core.responses import sse_event
+
+    chunks = stream.__aiter__()
+    try:
+        async for chunk in chunks:
+            yield sse_event({"delta": chunk}, "chunk")
+        yield sse_event({**final, "model_used": stream.model, "tokens_used": stream.tokens_used}, "done")
+    except AIGatewayError as e:
+        yield sse_event({"detail": str(e), "status_code": e.status_code}, "error")
+    finally:
+        # Client parti pendant l'envoi d'un fragment : fermer le flux malgré l'annulation
+        with anyio.CancelScope(shield=True):
+            await chunks.aclose()
+        stream.release()
+        if on_end is not None:
+            on_end(stream)
+
+
+def _payload(messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int) -> Dict[str, Any]:
+    return {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+
+
+def _current_task_cancelling() -> bool:
+    task = asyncio.current_task()
+    return bool(task and task.cancelling())
+
+
+async def _cancel_on_disconnect(call: "asyncio.Future", request: Any) -> None:
+    """Attend la fin de call en annulant l'appel si le client se déconnecte"""
+    while not call.done():
+        await asyncio.wait({call}, timeout=DISCONNECT_POLL_INTERVAL)
+        if not call.done() and await request.is_disconnected():
+            logger.info("Client déconnecté, appel au modèle annulé")
+            call.cancel()
+            return
+
+
+ai_gateway = AIGateway(
+    base_url=settings.AI_GATEWAY_URL,
+    api_key=settings.AI_GATEWAY_API_KEY,
+    max_concurrency=settings.AI_MAX_CONCURRENCY,
+    max_per_user=settings.AI_MAX_CONCURRENCY_PER_USER,
+    queue_timeout=settings.AI_QUEUE_TIMEOUT,
+    request_timeout=settings.AI_REQUEST_TIMEOUT,
+    mock_latency=settings.AI_MOCK_LATENCY,
+)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stockage des lignes DataFrame et des données volumineuses (images base64, blobs)
+Les valeurs volumineuses sont déplacées dans la table data_blobs et remplacées
+dans les lignes par un label qui porte l'identifiant du blob
+Chaque remplacement des lignes incrémente la version de la source (table data_versions)
+"""
+
+import json
+import re
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.tracing import span
+from app.models.project import DataBlob, DataFrameData, DataVersion
+
+# Seuil pour considérer une donnée comme "volumineuse" (10KB)
+LARGE_DATA_THRESHOLD = 10 * 1024
+
+# Nombre de valeurs non nulles examinées par colonne
+DETECTION_SAMPLE_SIZE = 10
+
+# Préfixes base64 courants (data URI, PNG, JPEG) ou 100 premiers caractères base64
+LARGE_VALUE_PATTERN = re.compile(r'(?:data:image/|iVBOR|/9j/|[A-Za-z0-9+/=]{100}.)', re.DOTALL)
+
+# Taille des lots pour les insertions en base
+INSERT_BATCH_SIZE = 5000
+
+EMPTY_LABEL = "[Données vides]"
+
+
+def detect_large_data_columns(df: pd.DataFrame) -> Dict[str, bool]:
+    """Détecte les colonnes avec des données volumineuses (images base64, etc.)"""
+    large_columns = {}
+
+    for col in df.columns:
+        sample = df[col].dropna().head(DETECTION_SAMPLE_SIZE).astype(str)
+        if sample.empty:
+            continue
+
+        is_large = (sample.str.len() > LARGE_DATA_THRESHOLD) | sample.str.match(LARGE_VALUE_PATTERN)
+
+        # Si plus de 50% des valeurs échantillonnées sont volumineuses, marquer la colonne
+        if is_large.mean() > 0.5:
+            large_columns[col] = True
+
+    return large_columns
+
+
+def _stringify_column(series: pd.Series) -> pd.Series:
+    """Convertit une colonne en chaînes comme str(val), None devenant une chaîne vide"""
+    values = series.astype(str)
+    if series.dtype == object:
+        values = values.mask(series.isna() & (values == 'None'), "")
+    return values
+
+
+def _store_large_column(db: Session, data_source_id: int, column: str, values: pd.Series) -> pd.Series:
+    """Déplace les valeurs d'une colonne volumineuse dans data_blobs et retourne les labels"""
+    empty = values.isin(["", "nan", "None"])
+    labels = pd.Series(EMPTY_LABEL, index=values.index, dtype=object)
+
+    to_store = values[~empty]
+    if to_store.empty:
+        return labels
+
+    sizes = to_store.str.len()
+    params = [
+        {
+            "data_source_id": data_source_id,
+            "row_index": int(row_index),
+            "column_name": str(column),
+            "content": content,
+            "size": int(size),
+        }
+        for row_index, content, size in zip(to_store.index, to_store.values, sizes.values)
+    ]
+
+    blob_ids: List[int] = []
+    for start in range(0, len(params), INSERT_BATCH_SIZE):
+        batch = params[start:start + INSERT_BATCH_SIZE]
+        blob_ids.extend(db.scalars(
+            insert(DataBlob).returning(DataBlob.id, sort_by_parameter_order=True),
+            batch
+        ).all())
+
+    ids = pd.Series(blob_ids, index=to_store.index).astype(str)
+    labels[~empty] = (
+        "[Données volumineuses - " + sizes.astype(str) + " caractères] [blob:" + ids + "]"
+    )
+    return labels
+
+
+def delete_dataframe_data(db: Session, data_source_id: int, drop_version: bool = False) -> None:
+    """
+    Supprime les lignes et les blobs d'une source de données
+
+    La version est conservée par défaut pour que le prochain stockage l'incrémente ;
+    drop_version=True la supprime aussi (suppression de la source).
+    """
+    db.query(DataFrameData).filter(DataFrameData.data_source_id == data_source_id).delete()
+    db.query(DataBlob).filter(DataBlob.data_source_id == data_source_id).delete()
+    if drop_version:
+        db.query(DataVersion).filter(DataVersion.data_source_id == data_source_id).delete()
+    else:
+        db.query(DataVersion).filter(DataVersion.data_source_id == data_source_id).update(
+            {DataVersion.row_count: 0, DataVersion.column_count: 0}
+        )
+
+
+def store_dataframe_rows(db: Session, data_source_id: int, df: pd.DataFrame) -> Dict[str, bool]:
+    """
+    Stocke les lignes d'un DataFrame dans DataFrameData
+
+    Les colonnes volumineuses sont détectées une fois puis stockées dans data_blobs ;
+    la conversion en chaînes se fait colonne par colonne et les lignes sont insérées par lots.
+    Le commit reste à la charge de l'appelant.
+
+    Returns:
+        Les colonnes détectées comme volumineuses
+    """
+    with span("detect_large_columns", columns=len(df.columns)) as stage:
+        large_columns = detect_large_data_columns(df)
+        stage.set(large_columns=sum(large_columns.values()))
+
+    with span("stringify", columns=len(df.columns)):
+        str_columns = {}
+        for col in df.columns:
+            values = _stringify_column(df[col])
+            if large_columns.get(col, False):
+                values = _store_large_column(db, data_source_id, col, values)
+            str_columns[col] = values.tolist()
+
+    with span("write_rows", rows=len(df)) as stage:
+        # Sérialisation JSON et insertions alternent par lot : temps cumulés séparément
+        serialize_seconds = insert_seconds = 0.0
+        json_bytes = 0
+        columns = list(str_columns.keys())
+        rows = []
+        started = time.perf_counter()
+        for row_index, *values in zip(df.index, *str_columns.values()):
+            row_data = json.dumps(dict(zip(columns, values)))
+            json_bytes += len(row_data)
+            rows.append({
+                "data_source_id": data_source_id,
+                "row_data": row_data,
+                "row_index": int(row_index),
+            })
+            if len(rows) >= INSERT_BATCH_SIZE:
+                insert_started = time.perf_counter()
+                serialize_seconds += insert_started - started
+                db.execute(insert(DataFrameData), rows)
+                started = time.perf_counter()
+                insert_seconds += started - insert_started
+                rows = []
+
+        insert_started = time.perf_counter()
+        serialize_seconds += insert_started - started
+        if rows:
+            db.execute(insert(DataFrameData), rows)
+        insert_seconds += time.perf_counter() - insert_started
+        stage.set(bytes=json_bytes, serialize_ms=serialize_seconds * 1000, insert_ms=insert_seconds * 1000)
+
+    record_data_version(db, data_source_id, len(df), len(df.columns))
+
+    return large_columns
+
+
+def replace_dataframe_data(db: Session, data_source_id: int, df: pd.DataFrame) -> Dict[str, bool]:
+    """Remplace les lignes et les blobs d'une source (synchronisation) ; le commit reste à la charge de l'appelant"""
+    with span("delete_previous"):
+        delete_dataframe_data(db, data_source_id)
+    return store_dataframe_rows(db, data_source_id, df)
+
+
+def record_data_version(db: Session, data_source_id: int, row_count: int, column_count: int) -> DataVersion:
+    """Incrémente la version d'une source de données et enregistre ses dimensions"""
+    data_version = get_data_version(db, data_source_id)
+    if data_version is None:
+        data_version = DataVersion(data_source_id=data_source_id, version=1)
+        db.add(data_version)
+    else:
+        data_version.version += 1
+
+    data_version.row_count = int(row_count)
+    data_version.column_count = int(column_count)
+    db.flush()
+    return data_version
+
+
+def get_data_version(db: Session, data_source_id: int) -> Optional[DataVersion]:
+    """Récupère la version courante d'une source de données"""
+    return db.query(DataVersion).filter(DataVersion.data_source_id == data_source_id).first()
+
+
+def get_blob(db: Session, data_source_id: int, blob_id: int) -> Optional[DataBlob]:
+    """Récupère un blob stocké pour une source de données"""
+    return (
+        db.query(DataBlob)
+        .filter(DataBlob.id == blob_id, DataBlob.data_source_id == data_source_id)
+        .first()
+    )
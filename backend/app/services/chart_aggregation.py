@@ -0,0 +1,113 @@
+"""
+Server-side aggregation for histogram, box and pie charts
+
+plotly express embeds every raw value in the figure JSON and lets the browser
+compute bins, quartiles and counts. These helpers compute them with NumPy, so
+the figure only carries O(bins) / O(groups) values. Column statistics already
+computed by calculate_column_stats (min, max, quartiles) are reused when given.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BINS = 30
+
+# Precision of the statistics returned by calculate_column_stats
+STATS_ROUNDING = 1e-4
+
+# Outliers drawn per box: the most extreme ones are kept
+MAX_BOX_OUTLIERS = 500
+
+# Slices drawn in a pie chart, the remaining categories are grouped
+MAX_PIE_SLICES = 20
+OTHER_LABEL = "Autres"
+
+# Bars drawn in the histogram of a text column
+MAX_BAR_CATEGORIES = 50
+
+
+def histogram_bins(series: pd.Series, bins: int = DEFAULT_BINS,
+                   stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Bin edges and counts of a numeric column
+
+    Returns:
+        {"edges": ndarray (bins + 1), "counts": ndarray (bins), "count": int}
+    """
+    values = _finite_values(series)
+    value_range = None
+    if stats and stats.get("min") is not None and stats.get("max") is not None and len(values):
+        # calculate_column_stats rounds to 4 decimals: widen the range so it keeps every value
+        value_range = (float(stats["min"]) - STATS_ROUNDING, float(stats["max"]) + STATS_ROUNDING)
+
+    counts, edges = np.histogram(values, bins=bins, range=value_range)
+    return {"edges": edges, "counts": counts, "count": int(len(values))}
+
+
+def box_statistics(series: pd.Series, stats: Optional[Dict[str, Any]] = None,
+                   max_outliers: int = MAX_BOX_OUTLIERS) -> Dict[str, Any]:
+    """
+    Quartiles, Tukey whiskers (1.5 IQR) and outliers of a numeric column
+
+    The whiskers stop at the most extreme values inside the fences, as Plotly does.
+    """
+    values = _finite_values(series)
+    if len(values) == 0:
+        return {"count": 0}
+
+    if stats and all(stats.get(key) is not None for key in ("q25", "median", "q75")):
+        q1, median, q3 = float(stats["q25"]), float(stats["median"]), float(stats["q75"])
+    else:
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+
+    iqr = q3 - q1
+    low_fence, high_fence = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    inside = (values >= low_fence) & (values <= high_fence)
+    inside_values = values[inside]
+
+    outliers = values[~inside]
+    if len(outliers) > max_outliers:
+        # Keep the values farthest from the box
+        distance = np.maximum(low_fence - outliers, outliers - high_fence)
+        outliers = outliers[np.argpartition(distance, -max_outliers)[-max_outliers:]]
+
+    return {
+        "count": int(len(values)),
+        "q1": float(q1),
+        "median": float(median),
+        "q3": float(q3),
+        "mean": float(values.mean()),
+        "lowerfence": float(inside_values.min()) if len(inside_values) else float(q1),
+        "upperfence": float(inside_values.max()) if len(inside_values) else float(q3),
+        "outliers": outliers,
+        "outliers_count": int((~inside).sum()),
+    }
+
+
+def category_counts(names: pd.Series, values: Optional[pd.Series] = None,
+                    max_slices: int = MAX_PIE_SLICES) -> Dict[str, List[Any]]:
+    """
+    Counts (or sums of values) per category, the smallest grouped under OTHER_LABEL
+
+    Returns:
+        {"labels": [...], "values": [...]} sorted by decreasing value
+    """
+    if values is None:
+        totals = names.value_counts()
+    else:
+        totals = pd.to_numeric(values, errors="coerce").groupby(names).sum().sort_values(ascending=False)
+
+    labels = [str(label) for label in totals.index[:max_slices]]
+    slice_values = totals.to_numpy()[:max_slices].tolist()
+    if len(totals) > max_slices:
+        labels.append(OTHER_LABEL)
+        slice_values.append(totals.to_numpy()[max_slices:].sum().item())
+    return {"labels": labels, "values": slice_values}
+
+
+def _finite_values(series: pd.Series) -> np.ndarray:
+    """Finite values of a column as float64"""
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return values[np.isfinite(values)]
@@ -1,35 +1,98 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.utils import PlotlyJSONEncoder
-import json
 from typing import Dict, Any, Optional
 import io
 import base64
 
+from app.services.chart_aggregation import (
+    DEFAULT_BINS, MAX_BAR_CATEGORIES, box_statistics, category_counts, histogram_bins
+)
+from app.services.downsampling import DEFAULT_MAX_POINTS, downsample_frame
 
-class ChartGenerator:
-    """Service for generating interactive charts and visualizations"""
+# matplotlib, seaborn and plotly are heavy to import and only needed when a chart
+# is actually generated: they are loaded on first use, not when the API boots
+_seaborn_configured = False
+
+
+def _load_pyplot():
+    """Import matplotlib.pyplot with the non-interactive backend"""
+    import matplotlib
+    # Set matplotlib backend to non-interactive for server environment
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
 
-    def __init__(self):
-        # Set matplotlib backend to non-interactive for server environment
-        plt.switch_backend('Agg')
 
+def _load_seaborn():
+    """Import seaborn and apply the default style once"""
+    global _seaborn_configured
+    _load_pyplot()
+    import seaborn as sns
+    if not _seaborn_configured:
         # Set seaborn style
         sns.set_style("whitegrid")
         sns.set_palette("husl")
+        _seaborn_configured = True
+    return sns
+
+
+def _figure_json(fig) -> Dict[str, Any]:
+    """Plotly figure as plain JSON types (lists, str, float), converted by orjson in one pass"""
+    import orjson
+
+    from app.core.responses import dumps
+    return orjson.loads(dumps(fig.to_dict()))
+
+
+class ChartGenerator:
+    """Service for generating interactive charts and visualizations"""
+
+    SUPPORTED_PLOTLY_TYPES = ("scatter", "line", "bar", "histogram", "box", "heatmap", "pie")
+
+    # Chart types built from server-side aggregates, and the options they support
+    AGGREGATED_PLOTLY_TYPES = ("histogram", "box", "pie")
+    AGGREGATION_OPTIONS = ("nbins",)
 
     def generate_plotly_chart(self, df: pd.DataFrame, chart_type: str,
                             x_column: str = None, y_column: str = None,
-                            title: str = "Chart", **kwargs) -> Dict[str, Any]:
+                            title: str = "Chart", max_points: int = DEFAULT_MAX_POINTS,
+                            sampling: str = "auto", column_stats: Optional[Dict[str, Dict[str, Any]]] = None,
+                            **kwargs) -> Dict[str, Any]:
         """
         Generate interactive Plotly chart
-        Returns chart data as JSON-serializable dict
+        Returns chart data as plain JSON (no NumPy arrays), usable with any encoder
+
+        Line and scatter charts are downsampled to at most max_points points
+        (see app.services.downsampling); sampling="none" keeps every point.
+        Histogram, box and pie charts are built from bins, quartiles and counts
+        computed server-side; column_stats ({column: calculate_column_stats(...)})
+        avoids recomputing the range and quartiles.
         """
         try:
+            import plotly.express as px
+
+            original_points = len(df)
+            sampling_method = "none"
+
+            if chart_type in self.AGGREGATED_PLOTLY_TYPES and set(kwargs) <= set(self.AGGREGATION_OPTIONS):
+                fig = self._build_aggregated_figure(
+                    df, chart_type, x_column, y_column, title, column_stats or {}, **kwargs
+                )
+                return {
+                    "success": True,
+                    "chart_data": _figure_json(fig),
+                    "chart_type": chart_type,
+                    "original_points": original_points,
+                    "displayed_points": original_points,
+                    "sampling": "aggregated"
+                }
+
+            if chart_type in ("scatter", "line") or chart_type not in self.SUPPORTED_PLOTLY_TYPES:
+                df, sampling_method = downsample_frame(
+                    df, "line" if chart_type == "line" else "scatter",
+                    x_column, y_column, max_points, sampling, group_column=kwargs.get("color")
+                )
+
             if chart_type == "scatter":
                 fig = px.scatter(df, x=x_column, y=y_column, title=title, **kwargs)
 
@@ -47,8 +110,9 @@ class ChartGenerator:
 
             elif chart_type == "heatmap":
                 # Correlation heatmap
-                numeric_df = df.select_dtypes(include=[np.number])
-                corr_matrix = numeric_df.corr()
+                from app.services.correlation import correlation_matrix
+                corr = correlation_matrix(df)
+                corr_matrix = pd.DataFrame(corr["matrix"], index=corr["columns"], columns=corr["columns"])
                 fig = px.imshow(corr_matrix, title=title, **kwargs)
 
             elif chart_type == "pie":
@@ -63,12 +127,14 @@ class ChartGenerator:
                 # Default to scatter plot
                 fig = px.scatter(df, x=x_column, y=y_column, title=title, **kwargs)
 
-            # Convert to JSON-serializable format
-            chart_data = json.loads(json.dumps(fig.to_dict(), cls=PlotlyJSONEncoder))
+            chart_data = _figure_json(fig)
             return {
                 "success": True,
                 "chart_data": chart_data,
-                "chart_type": chart_type
+                "chart_type": chart_type,
+                "original_points": original_points,
+                "displayed_points": len(df),
+                "sampling": sampling_method
             }
 
         except Exception as e:
@@ -78,65 +144,88 @@ class ChartGenerator:
                 "chart_type": chart_type
             }
 
+    def _build_aggregated_figure(self, df: pd.DataFrame, chart_type: str, x_column: str,
+                                 y_column: Optional[str], title: str,
+                                 column_stats: Dict[str, Dict[str, Any]], nbins: int = DEFAULT_BINS):
+        """Build a histogram (go.Bar), box (go.Box) or pie (go.Pie) figure from aggregates"""
+        import plotly.graph_objects as go
+
+        fig = go.Figure()
+
+        if chart_type == "histogram":
+            column = df[x_column]
+            # Columns stored as text (DataFrameData) are binned when their values are numbers
+            sample = column.dropna().head(1000)
+            numeric_sample = pd.to_numeric(sample, errors="coerce")
+            if pd.api.types.is_numeric_dtype(column) or numeric_sample.count() >= 0.9 * len(sample) > 0:
+                hist = histogram_bins(column, bins=nbins, stats=column_stats.get(x_column))
+                edges = hist["edges"]
+                fig.add_trace(go.Bar(
+                    x=(edges[:-1] + edges[1:]) / 2, y=hist["counts"], width=np.diff(edges),
+                    name=x_column, marker_line_width=0
+                ))
+                fig.update_layout(bargap=0)
+            else:
+                counts = category_counts(column, max_slices=MAX_BAR_CATEGORIES)
+                fig.add_trace(go.Bar(x=counts["labels"], y=counts["values"], name=x_column))
+            fig.update_layout(xaxis_title=x_column, yaxis_title="count")
+
+        elif chart_type == "box":
+            value_column = y_column or x_column
+            if y_column and x_column:
+                groups = df.groupby(x_column, sort=True)[value_column]
+            else:
+                groups = [(value_column, df[value_column])]
+
+            for name, values in groups:
+                # Cached statistics describe the whole column, not a group
+                stats = column_stats.get(value_column) if not (y_column and x_column) else None
+                box = box_statistics(values, stats=stats)
+                if box["count"] == 0:
+                    continue
+                label = str(name)
+                fig.add_trace(go.Box(
+                    x=[label], q1=[box["q1"]], median=[box["median"]], q3=[box["q3"]],
+                    lowerfence=[box["lowerfence"]], upperfence=[box["upperfence"]],
+                    mean=[box["mean"]], name=label, boxpoints=False
+                ))
+                if len(box["outliers"]):
+                    fig.add_trace(go.Scatter(
+                        x=[label] * len(box["outliers"]), y=box["outliers"], mode="markers",
+                        name=f"{label} outliers", showlegend=False
+                    ))
+            fig.update_layout(xaxis_title=x_column if y_column else None, yaxis_title=value_column)
+
+        else:
+            counts = category_counts(df[x_column], df[y_column] if y_column else None)
+            fig.add_trace(go.Pie(labels=counts["labels"], values=counts["values"]))
+
+        fig.update_layout(title=title)
+        return fig
+
     def generate_matplotlib_chart(self, df: pd.DataFrame, chart_type: str,
                                 x_column: str = None, y_column: str = None,
                                 title: str = "Chart") -> Dict[str, Any]:
         """
         Generate matplotlib chart and return as base64 encoded image
-        """
-        try:
-            plt.figure(figsize=(10, 6))
-
-            if chart_type == "scatter":
-                plt.scatter(df[x_column], df[y_column])
-                plt.xlabel(x_column)
-                plt.ylabel(y_column)
-
-            elif chart_type == "line":
-                plt.plot(df[x_column], df[y_column])
-                plt.xlabel(x_column)
-                plt.ylabel(y_column)
-
-            elif chart_type == "bar":
-                plt.bar(df[x_column], df[y_column])
-                plt.xlabel(x_column)
-                plt.ylabel(y_column)
-
-            elif chart_type == "histogram":
-                plt.hist(df[x_column], bins=30, alpha=0.7)
-                plt.xlabel(x_column)
-                plt.ylabel("Frequency")
-
-            elif chart_type == "box":
-                sns.boxplot(data=df, x=x_column, y=y_column)
-                plt.xlabel(x_column)
-                plt.ylabel(y_column)
 
-            elif chart_type == "heatmap":
-                numeric_df = df.select_dtypes(include=[np.number])
-                corr_matrix = numeric_df.corr()
-                sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', center=0)
-                plt.title(title)
-
-            plt.title(title)
-            plt.tight_layout()
+        Drawn with the object-oriented Figure API (app.services.chart_renderer),
+        so concurrent calls do not share pyplot's global state.
+        """
+        from app.services.chart_renderer import prepare_chart_frame, render_chart_png
 
-            # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-            plt.close()
+        try:
+            frame = prepare_chart_frame(df, chart_type, x_column, y_column)
+            image = render_chart_png(frame, chart_type, x_column, y_column, title)
 
             return {
                 "success": True,
-                "image_base64": image_base64,
+                "image_base64": base64.b64encode(image).decode('utf-8'),
                 "chart_type": chart_type,
                 "format": "png"
             }
 
         except Exception as e:
-            plt.close()
             return {
                 "success": False,
                 "error": f"Failed to generate matplotlib chart: {str(e)}",
@@ -149,6 +238,8 @@ class ChartGenerator:
         """
         Generate seaborn chart and return as base64 encoded image
         """
+        plt = _load_pyplot()
+        sns = _load_seaborn()
         try:
             plt.figure(figsize=(12, 8))
 
@@ -181,8 +272,9 @@ class ChartGenerator:
                     "format": "png"
                 }
             elif chart_type == "heatmap":
-                numeric_df = df.select_dtypes(include=[np.number])
-                corr_matrix = numeric_df.corr()
+                from app.services.correlation import correlation_matrix
+                corr = correlation_matrix(df)
+                corr_matrix = pd.DataFrame(corr["matrix"], index=corr["columns"], columns=corr["columns"])
                 sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', center=0, square=True)
 
             plt.title(title)
@@ -0,0 +1,268 @@
+"""
+Rendu des graphiques matplotlib hors de la boucle d'événements
+
+Les images sont dessinées avec l'API objet de matplotlib (Figure, sans l'état
+global de pyplot) dans un pool de processus dédié, puis gardées dans un cache
+LRU borné en octets. La clé du cache, calculée à partir de la version des
+données et de la spécification du graphique, sert aussi d'ETag.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.executor import pandas_executor
+from app.services.downsampling import downsample_frame
+
+CHART_TYPES = ("scatter", "line", "bar", "histogram", "box", "heatmap")
+
+# Points envoyés au processus de rendu pour un nuage de points ou une courbe :
+# au-delà, une image raster ne change plus visiblement
+RENDER_MAX_POINTS = 50_000
+
+FIGURE_SIZE = (10, 6)
+FIGURE_DPI = 100
+
+
+def _as_numeric(series: pd.Series) -> pd.Series:
+    """Convertit en nombres une colonne stockée en texte quand ses valeurs sont numériques"""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    numeric = pd.to_numeric(series, errors="coerce")
+    if numeric.count() >= 0.9 * series.count() > 0:
+        return numeric
+    return series
+
+
+def render_chart_png(df: pd.DataFrame, chart_type: str, x_column: Optional[str] = None,
+                     y_column: Optional[str] = None, title: str = "Chart") -> bytes:
+    """
+    Dessine un graphique et retourne l'image PNG
+
+    Exécutée dans le pool de rendu : uniquement l'API objet (Figure/Axes),
+    sans pyplot, donc sans état global partagé entre les rendus.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=FIGURE_SIZE)
+    ax = fig.subplots()
+
+    if chart_type == "scatter":
+        ax.scatter(_as_numeric(df[x_column]), _as_numeric(df[y_column]), s=8)
+        ax.set_xlabel(x_column)
+        ax.set_ylabel(y_column)
+
+    elif chart_type == "line":
+        ax.plot(_as_numeric(df[x_column]), _as_numeric(df[y_column]))
+        ax.set_xlabel(x_column)
+        ax.set_ylabel(y_column)
+
+    elif chart_type == "bar":
+        ax.bar(df[x_column].astype(str), _as_numeric(df[y_column]))
+        ax.set_xlabel(x_column)
+        ax.set_ylabel(y_column)
+
+    elif chart_type == "histogram":
+        values = _as_numeric(df[x_column]).dropna()
+        ax.hist(values, bins=30, alpha=0.7)
+        ax.set_xlabel(x_column)
+        ax.set_ylabel("Frequency")
+
+    elif chart_type == "box":
+        if x_column and y_column:
+            groups = _as_numeric(df[y_column]).groupby(df[x_column], sort=True)
+            labels = [str(name) for name, _ in groups]
+            ax.boxplot([values.dropna().to_numpy() for _, values in groups], tick_labels=labels)
+            ax.set_xlabel(x_column)
+            ax.set_ylabel(y_column)
+        else:
+            column = y_column or x_column
+            ax.boxplot(_as_numeric(df[column]).dropna().to_numpy(), tick_labels=[column])
+
+    elif chart_type == "heatmap":
+        from app.services.correlation import correlation_matrix
+        corr = correlation_matrix(df)
+        image = ax.imshow(corr["matrix"], cmap="coolwarm", vmin=-1, vmax=1)
+        ax.set_xticks(range(len(corr["columns"])), corr["columns"], rotation=45, ha="right")
+        ax.set_yticks(range(len(corr["columns"])), corr["columns"])
+        for (i, j), value in np.ndenumerate(corr["matrix"]):
+            ax.text(j, i, f"{value:.2f}", ha="center", va="center", fontsize=8)
+        fig.colorbar(image, ax=ax)
+
+    else:
+        raise ValueError(f"Unsupported chart type: {chart_type}")
+
+    ax.set_title(title)
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=FIGURE_DPI, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def prepare_chart_frame(df: pd.DataFrame, chart_type: str, x_column: Optional[str] = None,
+                        y_column: Optional[str] = None) -> pd.DataFrame:
+    """Colonnes utiles au graphique, réduites avant d'être envoyées au processus de rendu"""
+    columns = [col for col in (x_column, y_column) if col]
+    if chart_type != "heatmap" and columns:
+        df = df[list(dict.fromkeys(columns))]
+    if chart_type in ("scatter", "line"):
+        df, _ = downsample_frame(df, chart_type, x_column, y_column, RENDER_MAX_POINTS)
+    elif chart_type == "bar" and x_column and y_column and df[x_column].duplicated().any():
+        # Une barre par catégorie, empilée comme px.bar, au lieu d'une barre par ligne
+        values = _as_numeric(df[y_column])
+        df = values.groupby(df[x_column], sort=False).sum().rename(y_column).reset_index()
+    return df
+
+
+def chart_cache_key(data_source_id: int, data_version: Any, spec: Dict[str, Any]) -> str:
+    """Clé de cache (et ETag) d'un graphique : version des données + spécification"""
+    payload = json.dumps(
+        {"data_source_id": data_source_id, "version": data_version, "spec": spec},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class ChartRenderCache:
+    """Cache LRU des images rendues, borné par la taille totale en octets"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            image = self._items.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key: str, image: bytes) -> None:
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._items[key] = image
+            self._size += len(image)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+chart_cache = ChartRenderCache(settings.CHART_CACHE_MAX_BYTES)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Rendus en cours, partagés par les requêtes identiques simultanées
+_in_flight: Dict[str, "asyncio.Future[bytes]"] = {}
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Pool de processus de rendu, créé au premier graphique"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            # spawn : les workers ne doivent pas hériter des threads et connexions de l'API
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.CHART_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_render_pool() -> None:
+    """Arrête le pool de rendu (arrêt de l'API)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def render_chart(key: str, load_frame: Callable[[], Awaitable[pd.DataFrame]], chart_type: str,
+                       x_column: Optional[str] = None, y_column: Optional[str] = None,
+                       title: str = "Chart") -> bytes:
+    """
+    Image PNG d'un graphique : depuis le cache, sinon rendue dans le pool de processus
+
+    load_frame (coroutine) n'est appelé qu'en cas d'absence du cache ; la
+    préparation des données est exécutée dans pandas_executor. Les requêtes
+    identiques arrivant pendant un rendu attendent ce même rendu.
+    """
+    image = chart_cache.get(key)
+    if image is not None:
+        return image
+
+    pending = _in_flight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    _in_flight[key] = future
+    try:
+        frame = await pandas_executor.run(prepare_chart_frame, await load_frame(), chart_type, x_column, y_column)
+        image = await loop.run_in_executor(
+            get_render_pool(), render_chart_png, frame, chart_type, x_column, y_column, title
+        )
+        chart_cache.put(key, image)
+        future.set_result(image)
+        return image
+    except BrokenProcessPool as e:
+        # Un worker a été tué (mémoire, signal) : le prochain rendu recrée le pool
+        shutdown_render_pool()
+        future.set_exception(e)
+        future.exception()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        # L'exception est relancée ici, les requêtes en attente la reçoivent via le future
+        future.exception()
+        raise
+    finally:
+        del _in_flight[key]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Vrai si l'en-tête If-None-Match désigne l'ETag courant"""
+    if not if_none_match:
+        return False
+    candidates: List[str] = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
@@ -0,0 +1,230 @@
+"""
+Matrices de corrélation (Pearson, Spearman) calculées une fois par version des données
+
+Les colonnes sont standardisées puis la matrice est obtenue par produits
+matriciels (BLAS) au lieu d'une boucle par paire de colonnes. Les valeurs
+manquantes sont traitées paire par paire (pairwise-complete, comme pandas) à
+l'aide de produits avec le masque des valeurs présentes.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+CORRELATION_METHODS = ("pearson", "spearman")
+
+# Nombre minimal d'observations communes pour qu'une corrélation soit définie
+MIN_PERIODS = 2
+
+# Nombre de matrices gardées en cache
+CORRELATION_CACHE_SIZE = 32
+
+DEFAULT_TOP_K = 10
+
+
+def numeric_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colonnes numériques d'un DataFrame
+
+    Les colonnes texte dont au moins 90% des valeurs sont des nombres (données
+    stockées dans DataFrameData) sont converties.
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_numeric_dtype(series):
+            columns[col] = series
+            continue
+        if series.dtype == object:
+            sample = series.dropna().head(1000)
+            if len(sample) and pd.to_numeric(sample, errors="coerce").count() >= 0.9 * len(sample):
+                columns[col] = pd.to_numeric(series, errors="coerce")
+    return pd.DataFrame(columns, index=df.index)
+
+
+def correlation_matrix(df: pd.DataFrame, method: str = "pearson",
+                       sample_size: Optional[int] = None, seed: int = 0) -> Dict[str, Any]:
+    """
+    Matrice de corrélation des colonnes numériques
+
+    Args:
+        method: "pearson" ou "spearman" (Pearson sur les rangs ; avec des valeurs
+            manquantes, les rangs sont calculés par colonne et non par paire)
+        sample_size: si le tableau a plus de lignes, un échantillon aléatoire de
+            cette taille est utilisé
+
+    Returns:
+        {"columns": [...], "matrix": ndarray (k x k, NaN si non défini),
+         "rows_used": int, "sampled": bool, "method": str}
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unsupported correlation method: {method}")
+
+    numeric = numeric_frame(df)
+    sampled = sample_size is not None and len(numeric) > sample_size
+    if sampled:
+        numeric = numeric.sample(n=sample_size, random_state=seed)
+
+    if method == "spearman":
+        numeric = numeric.rank(method="average")
+
+    values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+    return {
+        "columns": [str(col) for col in numeric.columns],
+        "matrix": _pearson(values),
+        "rows_used": int(len(numeric)),
+        "sampled": bool(sampled),
+        "method": method,
+    }
+
+
+def _pearson(values: np.ndarray) -> np.ndarray:
+    """Corrélations de Pearson (pairwise-complete) des colonnes d'un tableau n x k"""
+    n, k = values.shape
+    if k == 0:
+        return np.empty((0, 0))
+
+    present = ~np.isnan(values)
+    counts = present.sum(axis=0)
+
+    # Standardisation par colonne : la corrélation n'en dépend pas, mais les
+    # produits restent bien conditionnés
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(values, axis=0) / counts
+        centered = values - mean
+        scale = np.sqrt(np.nansum(centered ** 2, axis=0))
+        z = centered / np.where(scale > 0, scale, np.nan)
+
+    if present.all():
+        # Cas sans valeur manquante : un seul produit matriciel
+        corr = z.T @ z
+    else:
+        mask = present.astype(np.float64)
+        z0 = np.where(present, z, 0.0)
+        pair_counts = mask.T @ mask
+        sums = z0.T @ mask                  # sums[i, j] = somme de z_i sur les lignes où j est présent
+        products = z0.T @ z0
+        squares = (z0 ** 2).T @ mask
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = products - sums * sums.T / pair_counts
+            var_x = squares - sums ** 2 / pair_counts
+            var_y = var_x.T
+            corr = cov / np.sqrt(var_x * var_y)
+        corr[pair_counts < MIN_PERIODS] = np.nan
+
+    corr = np.clip(corr, -1.0, 1.0)
+    valid = (counts >= MIN_PERIODS) & np.isfinite(scale) & (scale > 0)
+    corr[~valid, :] = np.nan
+    corr[:, ~valid] = np.nan
+    np.fill_diagonal(corr, np.where(valid, 1.0, np.nan))
+    return corr
+
+
+def top_pairs(result: Dict[str, Any], k: int = DEFAULT_TOP_K) -> List[Dict[str, Any]]:
+    """Les k paires de colonnes les plus corrélées (en valeur absolue)"""
+    matrix = result["matrix"]
+    columns = result["columns"]
+    rows, cols = np.triu_indices(len(columns), 1)
+    values = matrix[rows, cols]
+    defined = ~np.isnan(values)
+    rows, cols, values = rows[defined], cols[defined], values[defined]
+
+    if len(values) > k:
+        best = np.argpartition(-np.abs(values), k - 1)[:k]
+        rows, cols, values = rows[best], cols[best], values[best]
+    order = np.argsort(-np.abs(values), kind="stable")
+
+    return [
+        {"column_1": columns[i], "column_2": columns[j], "correlation": float(value)}
+        for i, j, value in zip(rows[order], cols[order], values[order])
+    ]
+
+
+def matrix_as_dict(result: Dict[str, Any]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Matrice sous forme {colonne: {colonne: valeur}} (NaN -> None)"""
+    columns = result["columns"]
+    matrix = result["matrix"]
+    return {
+        col: {other: (None if np.isnan(value) else float(value)) for other, value in zip(columns, row)}
+        for col, row in zip(columns, matrix)
+    }
+
+
+class CorrelationCache:
+    """Cache LRU des matrices, par (source, version des données, méthode, échantillon)"""
+
+    def __init__(self, max_entries: int = CORRELATION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._items.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: Tuple, result: Dict[str, Any]) -> None:
+        with self._lock:
+            # Une seule version gardée par source et paramètres
+            for stale in [k for k in self._items if k[0] == key[0] and k[2:] == key[2:] and k != key]:
+                del self._items[stale]
+            self._items[key] = result
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+correlation_cache = CorrelationCache()
+
+
+def get_correlations(data_source_id: int, data_version: Any, load_frame, method: str = "pearson",
+                     sample_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Matrice de corrélation d'une source, calculée une fois par version des données
+
+    load_frame n'est appelé qu'en l'absence de résultat en cache.
+    """
+    key = (data_source_id, repr(data_version), method, sample_size)
+    result = correlation_cache.get(key)
+    if result is None:
+        result = correlation_matrix(load_frame(), method=method, sample_size=sample_size)
+        correlation_cache.put(key, result)
+    return result
+
+
+async def get_correlations_async(data_source_id: int, data_version: Any, load_frame, method: str = "pearson",
+                                 sample_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Comme get_correlations, pour les endpoints async
+
+    load_frame est une coroutine ; le calcul est exécuté dans pandas_executor.
+    """
+    from app.core.executor import pandas_executor
+
+    key = (data_source_id, repr(data_version), method, sample_size)
+    result = correlation_cache.get(key)
+    if result is None:
+        df = await load_frame()
+        result = await pandas_executor.run(correlation_matrix, df, method=method, sample_size=sample_size)
+        correlation_cache.put(key, result)
+    return result
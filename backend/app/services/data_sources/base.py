@@ -1,7 +1,26 @@
+import functools
+import os
 from abc import ABC, abstractmethod
 from typing import Dict, Any
 import pandas as pd
 
+from app.core.memory import track_memory
+from app.core.tracing import span
+
+
+def _traced_connect(connect):
+    """Record connect() as a "connect" span of the current ingest job, with its RSS peak"""
+    @functools.wraps(connect)
+    def wrapper(self, *args, **kwargs):
+        attributes = {"strategy": type(self).__name__}
+        file_path = self.config.get("file_path")
+        if file_path and os.path.exists(file_path):
+            attributes["bytes"] = os.path.getsize(file_path)
+        with span("connect", **attributes), track_memory("connect", strategy=attributes["strategy"]):
+            return connect(self, *args, **kwargs)
+    wrapper.__traced__ = True
+    return wrapper
+
 
 class DataSourceStrategy(ABC):
     """Abstract base class for data source strategies"""
@@ -9,6 +28,13 @@ class DataSourceStrategy(ABC):
     def __init__(self, config: Dict[str, Any]):
         self.config = config
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every concrete connect(), built-in or from an entry point, is traced
+        connect = cls.__dict__.get("connect")
+        if connect is not None and not getattr(connect, "__traced__", False):
+            cls.connect = _traced_connect(connect)
+
     @abstractmethod
     def connect(self) -> None:
         """Establish connection or load file"""
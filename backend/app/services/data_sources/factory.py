@@ -1,60 +1,204 @@
-from typing import Dict, Any
+import importlib
+import os
+import threading
+from collections import OrderedDict
+from importlib.metadata import entry_points
+from typing import Dict, Any, Optional, Tuple, Type
 
+from app.core.config import settings
+from app.core.memory import CELL_BYTES
 from .base import DataSourceStrategy
-from .csv_strategy import CSVStrategy
-from .excel_strategy import ExcelStrategy
-from .json_strategy import JSONStrategy
-from .txt_strategy import TXTStrategy
-from .sql_dump_strategy import SQLDumpStrategy
-
-# Optional imports for database connectors
-try:
-    from .mysql_strategy import MySQLStrategy
-    MYSQL_STRATEGY_AVAILABLE = True
-except ImportError:
-    MYSQL_STRATEGY_AVAILABLE = False
-    MySQLStrategy = None
-
-try:
-    from .postgresql_strategy import PostgreSQLStrategy
-    POSTGRESQL_STRATEGY_AVAILABLE = True
-except ImportError:
-    POSTGRESQL_STRATEGY_AVAILABLE = False
-    PostgreSQLStrategy = None
+
+# Entry point group used by external packages to provide extra strategies:
+#   [project.entry-points."nexusbi.data_sources"]
+#   mongodb = "nexusbi_mongo.strategy:MongoDBStrategy"
+ENTRY_POINT_GROUP = "nexusbi.data_sources"
+
+# Built-in strategies, imported only when their source type is first requested
+BUILTIN_STRATEGIES = {
+    "csv": "app.services.data_sources.csv_strategy:CSVStrategy",
+    "excel": "app.services.data_sources.excel_strategy:ExcelStrategy",
+    "json": "app.services.data_sources.json_strategy:JSONStrategy",
+    "txt": "app.services.data_sources.txt_strategy:TXTStrategy",
+    "mysql": "app.services.data_sources.mysql_strategy:MySQLStrategy",
+    "postgresql": "app.services.data_sources.postgresql_strategy:PostgreSQLStrategy",
+    "sql_dump": "app.services.data_sources.sql_dump_strategy:SQLDumpStrategy",
+}
+
+# DataSource.type values stored by the upload endpoint
+SOURCE_TYPE_ALIASES = {
+    "xlsx": "excel",
+    "xls": "excel",
+    "sql": "sql_dump",
+}
+
+INSTALL_HINTS = {
+    "mysql": "MySQL strategy not available. Please install mysql-connector-python.",
+    "postgresql": "PostgreSQL strategy not available. Please install psycopg2.",
+}
+
+NOT_IMPLEMENTED_STRATEGIES = {
+    # TODO: Implement MongoDBStrategy
+    "mongodb": "MongoDB strategy not implemented yet",
+    # TODO: Implement APIStrategy
+    "api": "API strategy not implemented yet",
+    # TODO: Implement CloudStorageStrategy
+    "cloud": "Cloud storage strategy not implemented yet",
+}
+
+# Maximum number of connected file strategies kept in memory; their estimated
+# size is also bounded by settings.STRATEGY_CACHE_MAX_BYTES
+STRATEGY_CACHE_SIZE = 8
+
+# Parsed (non-DataFrame) data such as JSON documents, relative to the file size
+PARSED_FILE_FACTOR = 4
+
+
+def _frame_bytes(df: Any) -> int:
+    """Resident size of a DataFrame, text cells counted like app.core.memory estimates"""
+    usage = int(df.memory_usage(index=True, deep=False).sum())
+    object_columns = sum(1 for dtype in df.dtypes if dtype == object)
+    return usage + object_columns * len(df) * CELL_BYTES["object"]
+
+
+def estimate_strategy_bytes(strategy: DataSourceStrategy, file_path: str) -> int:
+    """
+    Memory kept by a connected strategy: its DataFrames (attributes or dict
+    values such as sample_data), or PARSED_FILE_FACTOR x the file size when it
+    holds no DataFrame
+    """
+    import pandas as pd
+
+    total = 0
+    for value in vars(strategy).values():
+        frames = value.values() if isinstance(value, dict) else (value,)
+        total += sum(_frame_bytes(frame) for frame in frames if isinstance(frame, pd.DataFrame))
+    if total:
+        return total
+    return os.path.getsize(file_path) * PARSED_FILE_FACTOR if os.path.exists(file_path) else 0
 
 
 class DataSourceFactory:
     """Factory for creating data source strategies"""
 
+    # source type -> strategy class or "module:Class" target not imported yet
+    _registry: Dict[str, Any] = dict(BUILTIN_STRATEGIES)
+    _entry_points_loaded = False
+
+    # (type, file_path, mtime, config) -> (connected strategy, estimated bytes), least recently used first
+    _cache: "OrderedDict[Tuple, Tuple[DataSourceStrategy, int]]" = OrderedDict()
+    _cache_bytes = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, source_type: str, strategy: Any) -> None:
+        """Register a strategy class, or a lazy "module:Class" target, for a source type"""
+        cls._registry[source_type.lower()] = strategy
+
+    @classmethod
+    def _load_entry_points(cls) -> None:
+        """Add strategies advertised by installed packages, without importing them"""
+        if cls._entry_points_loaded:
+            return
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            cls._registry.setdefault(entry_point.name.lower(), entry_point)
+        cls._entry_points_loaded = True
+
+    @classmethod
+    def get_strategy_class(cls, source_type: str) -> Type[DataSourceStrategy]:
+        """Resolve (and import on first use) the strategy class for a source type"""
+        source_type = SOURCE_TYPE_ALIASES.get(source_type.lower(), source_type.lower())
+
+        if source_type not in cls._registry:
+            cls._load_entry_points()
+
+        target = cls._registry.get(source_type)
+        if target is None:
+            if source_type in NOT_IMPLEMENTED_STRATEGIES:
+                raise NotImplementedError(NOT_IMPLEMENTED_STRATEGIES[source_type])
+            raise ValueError(f"Unsupported data source type: {source_type}")
+
+        if isinstance(target, type):
+            return target
+
+        try:
+            if isinstance(target, str):
+                module_name, class_name = target.split(":")
+                strategy_class = getattr(importlib.import_module(module_name), class_name)
+            else:
+                strategy_class = target.load()
+        except ImportError:
+            raise NotImplementedError(
+                INSTALL_HINTS.get(source_type, f"Strategy for {source_type} could not be imported")
+            )
+
+        cls._registry[source_type] = strategy_class
+        return strategy_class
+
     @staticmethod
     def get_source(source_type: str, config: Dict[str, Any]) -> DataSourceStrategy:
         """Create appropriate data source strategy based on type"""
-        if source_type.lower() == "csv":
-            return CSVStrategy(config)
-        elif source_type.lower() == "excel":
-            return ExcelStrategy(config)
-        elif source_type.lower() == "json":
-            return JSONStrategy(config)
-        elif source_type.lower() == "txt":
-            return TXTStrategy(config)
-        elif source_type.lower() == "mysql":
-            if not MYSQL_STRATEGY_AVAILABLE:
-                raise NotImplementedError("MySQL strategy not available. Please install mysql-connector-python.")
-            return MySQLStrategy(config)
-        elif source_type.lower() == "postgresql":
-            if not POSTGRESQL_STRATEGY_AVAILABLE:
-                raise NotImplementedError("PostgreSQL strategy not available. Please install psycopg2.")
-            return PostgreSQLStrategy(config)
-        elif source_type.lower() == "sql_dump":
-            return SQLDumpStrategy(config)
-        elif source_type.lower() == "mongodb":
-            # TODO: Implement MongoDBStrategy
-            raise NotImplementedError("MongoDB strategy not implemented yet")
-        elif source_type.lower() == "api":
-            # TODO: Implement APIStrategy
-            raise NotImplementedError("API strategy not implemented yet")
-        elif source_type.lower() == "cloud":
-            # TODO: Implement CloudStorageStrategy
-            raise NotImplementedError("Cloud storage strategy not implemented yet")
-        else:
-            raise ValueError(f"Unsupported data source type: {source_type}")
\ No newline at end of file
+        return DataSourceFactory.get_strategy_class(source_type)(config)
+
+    @classmethod
+    def get_connected_source(cls, source_type: str, config: Dict[str, Any]) -> DataSourceStrategy:
+        """
+        Return a connected strategy.
+
+        File sources are cached per (type, file_path, mtime, config): repeated requests
+        against an unchanged file reuse the parsed state instead of calling connect()
+        again. Callers must not disconnect() a cached strategy. Database sources are
+        always connected fresh. The cache holds at most STRATEGY_CACHE_SIZE strategies
+        and STRATEGY_CACHE_MAX_BYTES of estimated data; a larger source is returned
+        without being cached.
+        """
+        key = cls._cache_key(source_type, config)
+        if key is None:
+            strategy = cls.get_source(source_type, config)
+            strategy.connect()
+            return strategy
+
+        with cls._lock:
+            entry = cls._cache.get(key)
+            if entry is not None:
+                cls._cache.move_to_end(key)
+                return entry[0]
+
+        strategy = cls.get_source(source_type, config)
+        strategy.connect()
+        size = estimate_strategy_bytes(strategy, key[1])
+
+        with cls._lock:
+            # Drop the entries of older versions of the same file
+            for stale_key in [k for k in cls._cache if k[:2] == key[:2]]:
+                cls._remove(stale_key)
+            if size > settings.STRATEGY_CACHE_MAX_BYTES:
+                return strategy
+            cls._cache[key] = (strategy, size)
+            cls._cache_bytes += size
+            while len(cls._cache) > STRATEGY_CACHE_SIZE or cls._cache_bytes > settings.STRATEGY_CACHE_MAX_BYTES:
+                cls._remove(next(iter(cls._cache)))
+
+        return strategy
+
+    @classmethod
+    def _remove(cls, key: Tuple) -> None:
+        _, size = cls._cache.pop(key)
+        cls._cache_bytes -= size
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Forget all cached strategies"""
+        with cls._lock:
+            cls._cache.clear()
+            cls._cache_bytes = 0
+
+    @staticmethod
+    def _cache_key(source_type: str, config: Dict[str, Any]) -> Optional[Tuple]:
+        """Cache key for file sources, None for sources that cannot be cached"""
+        file_path = config.get('file_path')
+        if not file_path or not os.path.exists(file_path):
+            return None
+        source_type = SOURCE_TYPE_ALIASES.get(source_type.lower(), source_type.lower())
+        options = tuple(sorted((k, repr(v)) for k, v in config.items() if k != 'file_path'))
+        return (source_type, os.path.abspath(file_path), os.path.getmtime(file_path), options)
@@ -1,3 +1,4 @@
+import logging
 import re
 import pandas as pd
 from typing import Dict, Any, List
@@ -9,6 +10,8 @@ try:
 except ImportError:
     HAS_CHARDET = False
 
+logger = logging.getLogger(__name__)
+
 
 class SQLDumpStrategy(DataSourceStrategy):
     """Strategy for SQL dump file data sources"""
@@ -36,10 +39,10 @@ class SQLDumpStrategy(DataSourceStrategy):
                     detected = chardet.detect(raw_data)
                     detected_encoding = detected['encoding'] or 'utf-8'
                     encodings_to_try.append(detected_encoding)
-                    print(f"🔍 Auto-detected encoding: {detected_encoding} (confidence: {detected.get('confidence', 0):.2f})")
+                    logger.debug("Auto-detected encoding: %s (confidence: %.2f)", detected_encoding, detected.get('confidence') or 0)
                 else:
                     # Fallback: try UTF-16 first (common for SQL dumps)
-                    print(f"🔍 chardet not available, trying common encodings...")
+                    logger.debug("chardet not available, trying common encodings")
                     encodings_to_try = ['utf-16', 'utf-8', 'latin1']
             else:
                 encodings_to_try = [self.encoding]
@@ -54,14 +57,14 @@ class SQLDumpStrategy(DataSourceStrategy):
                         content = file.read()
                     
                     successful_encoding = encoding
-                    print(f"✅ Successfully read file with encoding: {encoding}")
+                    logger.debug("Read %s with encoding %s", self.file_path, encoding)
                     break
                     
                 except (UnicodeDecodeError, UnicodeError) as e:
-                    print(f"⚠️  Failed with encoding {encoding}: {str(e)[:100]}")
+                    logger.debug("Failed with encoding %s: %.100s", encoding, e)
                     continue
                 except Exception as e:
-                    print(f"❌ Unexpected error with encoding {encoding}: {str(e)[:100]}")
+                    logger.warning("Unexpected error with encoding %s: %.100s", encoding, e)
                     continue
             
             if content is None:
@@ -200,7 +203,7 @@ class SQLDumpStrategy(DataSourceStrategy):
         
         matches = re.findall(insert_pattern, content, re.IGNORECASE | re.DOTALL)
         
-        print(f"🔍 Found {len(matches)} INSERT statements")
+        logger.debug("Found %d INSERT statements", len(matches))
         
         for table_name, columns_str, values_str in matches:
             # Parse column names if provided
@@ -235,7 +238,7 @@ class SQLDumpStrategy(DataSourceStrategy):
                             break
                     
                     self.sample_data[table_name] = df
-                    print(f"✅ Extracted {len(df_data)} rows from table {table_name}")
+                    logger.debug("Extracted %d rows from table %s", len(df_data), table_name)
 
     def _parse_insert_values(self, values_str: str) -> List[List[str]]:
         """Parse VALUES clause from INSERT statement"""
@@ -312,7 +315,7 @@ class SQLDumpStrategy(DataSourceStrategy):
                             row_values.append(val)
                     rows.append(row_values)
             except Exception as e:
-                print(f"⚠️  Failed to parse INSERT values with simple method: {e}")
+                logger.warning("Failed to parse INSERT values with simple method: %s", e)
                 # Return empty list as fallback
                 return []
         
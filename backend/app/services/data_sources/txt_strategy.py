@@ -1,9 +1,22 @@
+import csv
+import io
+import logging
 import re
 import pandas as pd
 import chardet
 from typing import Dict, Any, List, Optional
 from .base import DataSourceStrategy
 
+# Bytes handed to chardet for encoding detection
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+# Patterns used to spot datetime-looking values during type detection
+DATETIME_PATTERN = re.compile(
+    r'\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{2}-\d{2}-\d{4}|\d{4}/\d{2}/\d{2}|\d{2}:\d{2}:\d{2}'
+)
+
+logger = logging.getLogger(__name__)
+
 
 class TXTStrategy(DataSourceStrategy):
     """Strategy for TXT file data sources with automatic detection"""
@@ -20,13 +33,14 @@ class TXTStrategy(DataSourceStrategy):
     def connect(self) -> None:
         """Load and parse TXT file with automatic detection"""
         try:
+            with open(self.file_path, 'rb') as file:
+                raw_data = file.read()
+
             # Auto-detect encoding if not specified
             if self.encoding == 'utf-8':
-                with open(self.file_path, 'rb') as file:
-                    raw_data = file.read()
-                
-                # Detect encoding
-                detected = chardet.detect(raw_data)
+                # Detect encoding on a sample only: chardet is pure Python and
+                # dominates the load time on multi-million-line files
+                detected = chardet.detect(raw_data[:ENCODING_SAMPLE_BYTES])
                 detected_encoding = detected['encoding'] or 'utf-8'
                 
                 # Try common encodings for text files
@@ -37,12 +51,11 @@ class TXTStrategy(DataSourceStrategy):
                 
                 for encoding in encodings_to_try:
                     try:
-                        with open(self.file_path, 'r', encoding=encoding) as file:
-                            content = file.read()
+                        content = raw_data.decode(encoding)
                         successful_encoding = encoding
-                        print(f"✅ Successfully read TXT file with encoding: {encoding}")
+                        logger.debug("Read TXT file with encoding %s", encoding)
                         break
-                    except (UnicodeDecodeError, UnicodeError):
+                    except (UnicodeDecodeError, UnicodeError, LookupError):
                         continue
                 
                 if content is None:
@@ -51,9 +64,9 @@ class TXTStrategy(DataSourceStrategy):
                 self.encoding = successful_encoding
             else:
                 # Use specified encoding
-                with open(self.file_path, 'r', encoding=self.encoding) as file:
-                    content = file.read()
-            
+                content = raw_data.decode(self.encoding)
+
+            del raw_data
             self._parse_txt_content(content)
             
         except Exception as e:
@@ -65,33 +78,128 @@ class TXTStrategy(DataSourceStrategy):
         # Auto-detect separator if not specified
         if not self.separator:
             self.separator = self._detect_separator(content)
-            print(f"🔍 Auto-detected separator: '{self.separator}'")
+            logger.debug("Auto-detected separator: %r", self.separator)
         
-        # Split content into lines
-        lines = [line.strip() for line in content.split('\n') if line.strip()]
+        # Only the first non-empty lines are needed up-front (header and width)
+        head_lines = self._head_lines(content, 2)
         
-        if not lines:
+        if not head_lines:
             raise Exception("No data found in TXT file")
         
         # Detect if first row is header
         if self.has_header is None:
-            self.has_header = self._detect_header(lines)
-            print(f"🔍 Auto-detected header: {self.has_header}")
-        
-        # Parse data
-        data_rows = []
-        headers = []
+            self.has_header = self._detect_header(head_lines)
+            logger.debug("Auto-detected header: %s", self.has_header)
         
         if self.has_header:
-            headers = self._parse_line(lines[0])
-            data_lines = lines[1:]
+            headers = self._parse_line(head_lines[0])
         else:
             # Generate column names
-            first_row = self._parse_line(lines[0])
+            first_row = self._parse_line(head_lines[0])
             headers = [f'col_{i+1}' for i in range(len(first_row))]
-            data_lines = lines
+        
+        # Delegate regular files to the C parser, keep the line loop for the rest
+        df = None
+        if len(set(headers)) == len(headers):
+            try:
+                df = self._parse_with_engine(content, headers)
+            except (pd.errors.ParserError, ValueError) as e:
+                # Irregular file (or leading tab separator): the line parser handles it
+                logger.debug("C parser failed (%s), falling back to line parser", e)
+        
+        if df is None:
+            df = self._parse_txt_lines(content, headers)
+        
+        # Create DataFrame
+        if not df.empty:
+            # Auto-detect data types
+            df = self._auto_detect_types(df)
+            
+            self.sample_data['txt_data'] = df
+            
+            # Generate schema info
+            self._generate_schema_info(list(df.columns), len(df))
+            
+            logger.debug("Parsed %d rows with %d columns", len(df), len(df.columns))
+        else:
+            raise Exception("No valid data rows found")
+
+    def _head_lines(self, content: str, count: int) -> List[str]:
+        """Return the first `count` non-empty stripped lines without splitting the whole content"""
+        lines = []
+        start = 0
+        while len(lines) < count and start < len(content):
+            end = content.find('\n', start)
+            if end == -1:
+                end = len(content)
+            line = content[start:end].strip()
+            if line:
+                lines.append(line)
+            start = end + 1
+        return lines
+
+    def _parse_with_engine(self, content: str, headers: List[str]) -> pd.DataFrame:
+        """
+        Parse the whole content with the pandas C engine.
+
+        Short rows are padded with '' and long rows truncated to the header width,
+        like the line parser does: `usecols` drops the extra fields and
+        `na_filter=False` leaves missing fields as empty strings.
+        """
+        width = len(headers)
+        if self.separator == ' ':
+            # Space-separated files: runs of blanks are a single separator
+            sep = r'\s+'
+        else:
+            # Tabs and other single characters are taken literally: consecutive
+            # separators are empty fields
+            sep = self.separator
+            # Regex scans only when some line starts with a blank
+            leading_blanks = content.startswith((' ', '\t')) or '\n ' in content or '\n\t' in content
+            if leading_blanks and re.search(r'(?m)^[ \t]+\r?$', content):
+                # Blank-only lines are skipped, like empty ones
+                content = re.sub(r'(?m)^[ \t]+(\r?)$', r'\1', content)
+            if (leading_blanks and self.separator.isspace()
+                    and re.search(r'(?m)^[ \t]*' + re.escape(self.separator), content)):
+                # Lines are stripped before splitting: a leading separator is dropped,
+                # which shifts the fields of that line (line parser only)
+                raise ValueError("line starting with the separator")
+
+        df = pd.read_csv(
+            io.StringIO(content),
+            sep=sep,
+            engine='c',
+            header=None,
+            names=list(range(width)),
+            usecols=list(range(width)),
+            dtype=str,
+            na_filter=False,
+            quoting=csv.QUOTE_NONE,
+            skipinitialspace=True,
+            skip_blank_lines=True,
+        )
+
+        # Vectorized post-pass: leading blanks are already skipped by the engine,
+        # trailing ones are stripped only when the content actually has some
+        if self.separator != ' ':
+            trailing_blanks = [blank + end for blank in (' ', '\t') for end in (self.separator, '\n', '\r')]
+            if content.endswith((' ', '\t')) or any(token in content for token in trailing_blanks):
+                for col in df.columns:
+                    df[col] = df[col].str.strip()
+
+        if self.has_header:
+            df = df.iloc[1:]
+
+        df.columns = headers
+        return df.reset_index(drop=True)
+
+    def _parse_txt_lines(self, content: str, headers: List[str]) -> pd.DataFrame:
+        """Line-by-line parser for irregular files the C engine cannot handle"""
+        lines = [line.strip() for line in content.split('\n') if line.strip()]
+        data_lines = lines[1:] if self.has_header else lines
         
         # Parse data rows
+        data_rows = []
         for line in data_lines:
             values = self._parse_line(line)
             if len(values) == len(headers):
@@ -106,21 +214,7 @@ class TXTStrategy(DataSourceStrategy):
                 row_dict = dict(zip(headers, values))
                 data_rows.append(row_dict)
         
-        # Create DataFrame
-        if data_rows:
-            df = pd.DataFrame(data_rows)
-            
-            # Auto-detect data types
-            df = self._auto_detect_types(df)
-            
-            self.sample_data['txt_data'] = df
-            
-            # Generate schema info
-            self._generate_schema_info(headers, len(data_rows))
-            
-            print(f"✅ Parsed {len(data_rows)} rows with {len(headers)} columns")
-        else:
-            raise Exception("No valid data rows found")
+        return pd.DataFrame(data_rows)
 
     def _detect_separator(self, content: str) -> str:
         """Auto-detect the separator used in the TXT file"""
@@ -128,7 +222,7 @@ class TXTStrategy(DataSourceStrategy):
         # Common separators to test
         separators = [',', ';', '\t', '|', ' ']
         
-        lines = [line.strip() for line in content.split('\n') if line.strip()][:10]  # Test first 10 lines
+        lines = self._head_lines(content, 10)  # Test first 10 lines
         
         best_separator = ','
         best_score = 0
@@ -172,6 +266,9 @@ class TXTStrategy(DataSourceStrategy):
 
     def _parse_line(self, line: str) -> List[str]:
         """Parse a single line with the detected separator"""
+        if self.separator == ' ':
+            # Same rule as the C engine path: runs of blanks are a single separator
+            return line.split()
         return [field.strip() for field in line.split(self.separator)]
 
     def _is_numeric(self, value: str) -> bool:
@@ -190,29 +287,31 @@ class TXTStrategy(DataSourceStrategy):
         for col in df.columns:
             # Sample values to determine type
             sample_values = df[col].dropna().head(100).astype(str)
-            
-            # Check for numeric values
-            numeric_count = sum(1 for val in sample_values if self._is_numeric(val))
             total_count = len(sample_values)
             
             if total_count > 0:
+                # Same rule as _is_numeric, evaluated on the whole sample at once
+                numeric_count = int(
+                    pd.to_numeric(sample_values.str.replace(',', ''), errors='coerce').notna().sum()
+                )
                 numeric_ratio = numeric_count / total_count
                 
                 if numeric_ratio > 0.8:  # 80% numeric values
                     # Try to convert to numeric
+                    try:
+                        # Clean columns convert directly, only the others pay for the comma removal
+                        df[col] = pd.to_numeric(df[col])
+                        continue
+                    except (ValueError, TypeError):
+                        pass
                     try:
                         df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce')
+                        continue
                     except:
                         pass  # Keep as object if conversion fails
-                elif numeric_ratio > 0.6:  # 60% numeric, might be mixed
-                    # Keep as object for now
-                    pass
             
             # Check for datetime patterns
-            datetime_count = 0
-            for val in sample_values.head(20):
-                if self._is_datetime(val):
-                    datetime_count += 1
+            datetime_count = int(sample_values.head(20).str.contains(DATETIME_PATTERN).sum())
             
             if datetime_count > 10:  # More than half look like dates
                 try:
@@ -227,20 +326,7 @@ class TXTStrategy(DataSourceStrategy):
         if not value:
             return False
         
-        # Common datetime patterns
-        datetime_patterns = [
-            r'\d{4}-\d{2}-\d{2}',  # YYYY-MM-DD
-            r'\d{2}/\d{2}/\d{4}',  # MM/DD/YYYY
-            r'\d{2}-\d{2}-\d{4}',  # MM-DD-YYYY
-            r'\d{4}/\d{2}/\d{2}',  # YYYY/MM/DD
-            r'\d{2}:\d{2}:\d{2}',  # HH:MM:SS
-        ]
-        
-        for pattern in datetime_patterns:
-            if re.search(pattern, value):
-                return True
-        
-        return False
+        return DATETIME_PATTERN.search(value) is not None
 
     def _generate_schema_info(self, headers: List[str], row_count: int) -> None:
         """Generate comprehensive schema information"""
@@ -6,15 +6,28 @@ Implémente la vraie synchronisation selon le type de source
 """
 
 import json
+import logging
 import os
+import time
 import pandas as pd
 import io
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
-from app.models.project import DataSource, DataFrameData
+from app.models.project import DataSource, Project
+from app.core.executor import pandas_executor
+from app.core.memory import track_memory
+from app.core.metrics import SYNC_DURATION, record_ingest
+from app.core.tracing import Span, job, span
+from app.db.write_queue import run_write
+from app.services.blob_store import replace_dataframe_data
 from app.services.data_sources.factory import DataSourceFactory
 
+logger = logging.getLogger(__name__)
+
+# Types relus par _sync_by_type ; les autres passent par _sync_generic (horodatage seulement)
+SYNCED_TYPES = frozenset({'csv', 'xlsx', 'xls', 'json', 'sql', 'mysql', 'postgresql', 'sql_server', 'mongodb'})
+
 
 class DataSyncService:
     """Service de synchronisation des sources de données"""
@@ -31,9 +44,24 @@ class DataSyncService:
             data_source_id: ID de la source de données à synchroniser
             
         Returns:
-            Dict avec les informations de synchronisation
+            Dict avec les informations de synchronisation, dont job_id
+            (trace des étapes : GET /jobs/{job_id}/trace)
         """
-        print(f"🔄 Début de la synchronisation pour la source ID: {data_source_id}")
+        # Trace consultable par le propriétaire du projet de la source
+        owner_id = (
+            self.db.query(Project.owner_id)
+            .join(DataSource, DataSource.project_id == Project.id)
+            .filter(DataSource.id == data_source_id)
+            .scalar()
+        )
+        with job("sync", owner_id=owner_id, data_source_id=data_source_id) as sync_job:
+            with track_memory("sync", data_source_id=data_source_id):
+                result = await self._sync_data_source(data_source_id, sync_job)
+            result["job_id"] = sync_job.job_id
+            return result
+
+    async def _sync_data_source(self, data_source_id: int, sync_job: Span) -> Dict[str, Any]:
+        logger.debug("Début de la synchronisation de la source %s", data_source_id)
         
         # Récupérer la source de données
         data_source = self.db.query(DataSource).filter(DataSource.id == data_source_id).first()
@@ -43,6 +71,8 @@ class DataSyncService:
         if not data_source.is_active:
             raise ValueError("La source de données est inactive")
         
+        sync_job.set(source_type=data_source.type)
+        started = time.perf_counter()
         try:
             # Exécuter la synchronisation selon le type
             sync_result = await self._sync_by_type(data_source)
@@ -52,7 +82,14 @@ class DataSyncService:
             data_source.schema_info = json.dumps(sync_result['schema_info'])
             self.db.commit()
             
-            print(f"✅ Synchronisation réussie pour {data_source.name}")
+            SYNC_DURATION.observe(time.perf_counter() - started, source_type=data_source.type, status="success")
+            record_ingest(data_source.type, "sync", sync_result['rows_updated'], sync_result.get('bytes_read'))
+            logger.info("Synchronisation réussie", extra={
+                "data_source_id": data_source.id,
+                "source_type": data_source.type,
+                "rows": sync_result['rows_updated'],
+                "duration_s": round(time.perf_counter() - started, 3),
+            })
             return {
                 "success": True,
                 "message": f"Source '{data_source.name}' synchronisée avec succès",
@@ -63,7 +100,9 @@ class DataSyncService:
             }
             
         except Exception as e:
-            print(f"❌ Erreur lors de la synchronisation: {str(e)}")
+            logger.error("Erreur lors de la synchronisation de la source %s: %s", data_source.id, e,
+                         exc_info=True, extra={"data_source_id": data_source.id, "source_type": data_source.type})
+            SYNC_DURATION.observe(time.perf_counter() - started, source_type=data_source.type, status="error")
             # Marquer l'erreur dans la source
             data_source.updated_at = datetime.utcnow()
             self.db.commit()
@@ -103,7 +142,7 @@ class DataSyncService:
         if not data_source.file_path:
             raise ValueError("Chemin de fichier non défini pour la source CSV")
         
-        print(f"📄 Synchronisation du fichier CSV: {data_source.file_path}")
+        logger.debug("Synchronisation du fichier CSV: %s", data_source.file_path)
         
         # Construire le chemin complet du fichier
         from app.core.config import settings
@@ -116,7 +155,7 @@ class DataSyncService:
         else:
             full_file_path = file_path
         
-        print(f"🔍 Recherche du fichier à: {full_file_path}")
+        logger.debug("Recherche du fichier à: %s", full_file_path)
         
         # Vérifier si le fichier existe
         if not os.path.exists(full_file_path):
@@ -130,8 +169,10 @@ class DataSyncService:
         delimiter = processing_info.get('detected_delimiter', ',')
         
         try:
-            df = pd.read_csv(full_file_path, encoding=encoding, sep=delimiter)
-            print(f"📊 CSV lu: {len(df)} lignes, {len(df.columns)} colonnes")
+            with span("read_csv", bytes=os.path.getsize(full_file_path)) as stage:
+                df = await pandas_executor.run(pd.read_csv, full_file_path, encoding=encoding, sep=delimiter)
+                stage.set(rows=len(df), columns=len(df.columns))
+            logger.debug("CSV lu: %d lignes, %d colonnes", len(df), len(df.columns))
             
             # Mettre à jour les données en base
             await self._update_dataframe_data(data_source.id, df)
@@ -147,6 +188,7 @@ class DataSyncService:
             
             return {
                 "rows_updated": len(df),
+                "bytes_read": os.path.getsize(full_file_path),
                 "schema_info": new_schema_info
             }
             
@@ -158,7 +200,7 @@ class DataSyncService:
         if not data_source.file_path:
             raise ValueError("Chemin de fichier non défini pour la source Excel")
         
-        print(f"📊 Synchronisation du fichier Excel: {data_source.file_path}")
+        logger.debug("Synchronisation du fichier Excel: %s", data_source.file_path)
         
         # Construire le chemin complet du fichier
         from app.core.config import settings
@@ -171,15 +213,17 @@ class DataSyncService:
         else:
             full_file_path = file_path
         
-        print(f"🔍 Recherche du fichier à: {full_file_path}")
+        logger.debug("Recherche du fichier à: %s", full_file_path)
         
         if not os.path.exists(full_file_path):
             raise ValueError(f"Fichier Excel non trouvé: {full_file_path}")
         
         try:
             # Lire le fichier Excel (première feuille par défaut)
-            df = pd.read_excel(full_file_path)
-            print(f"📊 Excel lu: {len(df)} lignes, {len(df.columns)} colonnes")
+            with span("read_excel", bytes=os.path.getsize(full_file_path)) as stage:
+                df = await pandas_executor.run(pd.read_excel, full_file_path)
+                stage.set(rows=len(df), columns=len(df.columns))
+            logger.debug("Excel lu: %d lignes, %d colonnes", len(df), len(df.columns))
             
             # Mettre à jour les données en base
             await self._update_dataframe_data(data_source.id, df)
@@ -195,6 +239,7 @@ class DataSyncService:
             
             return {
                 "rows_updated": len(df),
+                "bytes_read": os.path.getsize(full_file_path),
                 "schema_info": new_schema_info
             }
             
@@ -206,7 +251,7 @@ class DataSyncService:
         if not data_source.file_path:
             raise ValueError("Chemin de fichier non défini pour la source JSON")
         
-        print(f"🔗 Synchronisation du fichier JSON: {data_source.file_path}")
+        logger.debug("Synchronisation du fichier JSON: %s", data_source.file_path)
         
         # Construire le chemin complet du fichier
         from app.core.config import settings
@@ -219,14 +264,16 @@ class DataSyncService:
         else:
             full_file_path = file_path
         
-        print(f"🔍 Recherche du fichier à: {full_file_path}")
+        logger.debug("Recherche du fichier à: %s", full_file_path)
         
         if not os.path.exists(full_file_path):
             raise ValueError(f"Fichier JSON non trouvé: {full_file_path}")
         
         try:
-            df = pd.read_json(full_file_path)
-            print(f"📊 JSON lu: {len(df)} lignes, {len(df.columns)} colonnes")
+            with span("read_json", bytes=os.path.getsize(full_file_path)) as stage:
+                df = await pandas_executor.run(pd.read_json, full_file_path)
+                stage.set(rows=len(df), columns=len(df.columns))
+            logger.debug("JSON lu: %d lignes, %d colonnes", len(df), len(df.columns))
             
             # Mettre à jour les données en base
             await self._update_dataframe_data(data_source.id, df)
@@ -242,6 +289,7 @@ class DataSyncService:
             
             return {
                 "rows_updated": len(df),
+                "bytes_read": os.path.getsize(full_file_path),
                 "schema_info": new_schema_info
             }
             
@@ -253,7 +301,7 @@ class DataSyncService:
         if not data_source.file_path:
             raise ValueError("Chemin de fichier non défini pour la source SQL dump")
         
-        print(f"🗄️ Synchronisation du fichier SQL dump: {data_source.file_path}")
+        logger.debug("Synchronisation du fichier SQL dump: %s", data_source.file_path)
         
         # Construire le chemin complet du fichier
         from app.core.config import settings
@@ -266,7 +314,7 @@ class DataSyncService:
         else:
             full_file_path = file_path
         
-        print(f"🔍 Recherche du fichier à: {full_file_path}")
+        logger.debug("Recherche du fichier à: %s", full_file_path)
         
         if not os.path.exists(full_file_path):
             raise ValueError(f"Fichier SQL dump non trouvé: {full_file_path}")
@@ -278,64 +326,71 @@ class DataSyncService:
             
             encoding = processing_info.get('detected_encoding', 'utf-8')
             
-            # Utiliser la factory pour créer la stratégie SQL dump
-            strategy = self.factory.get_source('sql_dump', {
-                'file_path': full_file_path,
-                'encoding': encoding
-            })
+            # Analyse du dump (stratégie connectée, réutilisée tant que le fichier
+            # n'a pas changé) hors de la boucle d'événements
+            with span("read_sql_dump", bytes=os.path.getsize(full_file_path)) as stage:
+                schema, all_table_data, combined_df = await pandas_executor.run(
+                    self._read_sql_dump, full_file_path, encoding
+                )
+                stage.set(rows=len(combined_df), tables=len(all_table_data or {}))
+            
+            logger.debug("SQL dump analysé: %d tables, %d lignes au total", len(schema.get('tables', [])), len(combined_df))
+            
+            # Mettre à jour les données en base
+            await self._update_dataframe_data(data_source.id, combined_df)
+            
+            # Préparer le schéma mis à jour
+            new_schema_info = {
+                "tables": schema.get('tables', []),
+                "total_tables": len(schema.get('tables', [])),
+                "total_rows": sum(table.get('row_count', 0) for table in schema.get('tables', [])),
+                "processing_info": {
+                    "processing_method": "sql_dump_parser",
+                    "encoding": encoding,
+                    "extracted_rows": len(combined_df),
+                    "tables_processed": list(all_table_data.keys()) if all_table_data else []
+                },
+                "file_modified": datetime.fromtimestamp(os.path.getmtime(full_file_path)).isoformat()
+            }
             
-            strategy.connect()
+            return {
+                "rows_updated": len(combined_df),
+                "bytes_read": os.path.getsize(full_file_path),
+                "schema_info": new_schema_info
+            }
             
-            try:
-                # Obtenir le schéma complet
-                schema = strategy.get_schema()
-                
-                # Obtenir TOUTES les données de toutes les tables
-                all_table_data = strategy.get_all_table_data()
-                
-                # Combiner toutes les tables en une seule DataFrame
-                if all_table_data:
-                    all_dataframes = []
-                    for table_name, table_df in all_table_data.items():
-                        # Add table name column to identify source
-                        table_df_with_source = table_df.copy()
-                        table_df_with_source.insert(0, '_source_table', table_name)
-                        all_dataframes.append(table_df_with_source)
-                    
-                    combined_df = pd.concat(all_dataframes, ignore_index=True, sort=False)
-                else:
-                    combined_df = pd.DataFrame()
-                
-                print(f"📊 SQL dump analysé: {len(schema.get('tables', []))} tables, {len(combined_df)} lignes au total")
-                
-                # Mettre à jour les données en base
-                await self._update_dataframe_data(data_source.id, combined_df)
-                
-                # Préparer le schéma mis à jour
-                new_schema_info = {
-                    "tables": schema.get('tables', []),
-                    "total_tables": len(schema.get('tables', [])),
-                    "total_rows": sum(table.get('row_count', 0) for table in schema.get('tables', [])),
-                    "processing_info": {
-                        "processing_method": "sql_dump_parser",
-                        "encoding": encoding,
-                        "extracted_rows": len(combined_df),
-                        "tables_processed": list(all_table_data.keys()) if all_table_data else []
-                    },
-                    "file_modified": datetime.fromtimestamp(os.path.getmtime(full_file_path)).isoformat()
-                }
-                
-                return {
-                    "rows_updated": len(combined_df),
-                    "schema_info": new_schema_info
-                }
-                
-            finally:
-                strategy.disconnect()
-                
         except Exception as e:
             raise ValueError(f"Erreur lors de la lecture du fichier SQL dump: {str(e)}")
     
+    def _read_sql_dump(self, full_file_path: str, encoding: str) -> Tuple[Dict[str, Any], Dict[str, pd.DataFrame], pd.DataFrame]:
+        """Schéma, tables et DataFrame combiné d'un dump SQL (bloquant)"""
+        # Stratégie SQL dump connectée, réutilisée tant que le fichier n'a pas changé
+        strategy = self.factory.get_connected_source('sql_dump', {
+            'file_path': full_file_path,
+            'encoding': encoding
+        })
+        
+        # Obtenir le schéma complet
+        schema = strategy.get_schema()
+        
+        # Obtenir TOUTES les données de toutes les tables
+        all_table_data = strategy.get_all_table_data()
+        
+        # Combiner toutes les tables en une seule DataFrame
+        if all_table_data:
+            all_dataframes = []
+            for table_name, table_df in all_table_data.items():
+                # Add table name column to identify source
+                table_df_with_source = table_df.copy()
+                table_df_with_source.insert(0, '_source_table', table_name)
+                all_dataframes.append(table_df_with_source)
+            
+            combined_df = pd.concat(all_dataframes, ignore_index=True, sort=False)
+        else:
+            combined_df = pd.DataFrame()
+        
+        return schema, all_table_data, combined_df
+    
     async def _sync_mysql_db(self, data_source: DataSource) -> Dict[str, Any]:
         """Synchronise une base MySQL"""
         return await self._sync_database_generic(data_source, "mysql")
@@ -357,50 +412,59 @@ class DataSyncService:
         if not data_source.connection_string:
             raise ValueError("Chaîne de connexion non définie pour la source de base de données")
         
-        print(f"🗄️ Synchronisation de la base {db_type}: {data_source.name}")
+        logger.debug("Synchronisation de la base %s: %s", db_type, data_source.name)
         
         try:
-            # Utiliser la factory pour créer la stratégie
-            strategy = self.factory.get_source(db_type, {"connection_string": data_source.connection_string})
-            strategy.connect()
+            # Connexion et lecture bloquantes, exécutées hors de la boucle d'événements
+            with span("read_database", db_type=db_type) as stage:
+                schema, df = await pandas_executor.run(
+                    self._read_database, db_type, data_source.connection_string
+                )
+                stage.set(rows=len(df), columns=len(df.columns))
+            
+            logger.debug("Base de données lue: %d lignes, %d colonnes", len(df), len(df.columns))
+            
+            # Mettre à jour les données en base
+            await self._update_dataframe_data(data_source.id, df)
+            
+            # Préparer le schéma mis à jour
+            new_schema_info = {
+                "columns": schema.get("columns", []),
+                "row_count": len(df),
+                "column_count": len(df.columns),
+                "processing_info": {
+                    "processing_method": f"database_{db_type}",
+                    "connection_string": "***",  # Masquer pour la sécurité
+                    "query_limit": 1000
+                },
+                "last_sync": datetime.utcnow().isoformat()
+            }
+            
+            return {
+                "rows_updated": len(df),
+                "schema_info": new_schema_info
+            }
             
-            try:
-                # Obtenir le schéma et les données
-                schema = strategy.get_schema()
-                df = strategy.get_data(limit=1000)  # Limiter à 1000 lignes pour la prévisualisation
-                
-                print(f"📊 Base de données lue: {len(df)} lignes, {len(df.columns)} colonnes")
-                
-                # Mettre à jour les données en base
-                await self._update_dataframe_data(data_source.id, df)
-                
-                # Préparer le schéma mis à jour
-                new_schema_info = {
-                    "columns": schema.get("columns", []),
-                    "row_count": len(df),
-                    "column_count": len(df.columns),
-                    "processing_info": {
-                        "processing_method": f"database_{db_type}",
-                        "connection_string": "***",  # Masquer pour la sécurité
-                        "query_limit": 1000
-                    },
-                    "last_sync": datetime.utcnow().isoformat()
-                }
-                
-                return {
-                    "rows_updated": len(df),
-                    "schema_info": new_schema_info
-                }
-                
-            finally:
-                strategy.disconnect()
-                
         except Exception as e:
             raise ValueError(f"Erreur lors de la synchronisation de la base {db_type}: {str(e)}")
     
+    def _read_database(self, db_type: str, connection_string: str) -> Tuple[Dict[str, Any], pd.DataFrame]:
+        """Schéma et données d'une base externe (bloquant)"""
+        # Utiliser la factory pour créer la stratégie
+        strategy = self.factory.get_source(db_type, {"connection_string": connection_string})
+        strategy.connect()
+        
+        try:
+            # Obtenir le schéma et les données
+            schema = strategy.get_schema()
+            df = strategy.get_data(limit=1000)  # Limiter à 1000 lignes pour la prévisualisation
+            return schema, df
+        finally:
+            strategy.disconnect()
+    
     async def _sync_generic(self, data_source: DataSource) -> Dict[str, Any]:
         """Synchronisation générique pour types non supportés"""
-        print(f"🔄 Synchronisation générique pour: {data_source.type}")
+        logger.debug("Synchronisation générique pour: %s", data_source.type)
         
         # Simuler une synchronisation en mettant à jour seulement le timestamp
         return {
@@ -408,80 +472,18 @@ class DataSyncService:
             "schema_info": json.loads(data_source.schema_info) if data_source.schema_info else {}
         }
     
-    def _detect_large_data_columns(self, df: pd.DataFrame) -> Dict[str, bool]:
-        """Détecte les colonnes avec des données volumineuses (images base64, etc.)"""
-        large_columns = {}
-        
-        # Seuil pour considérer une donnée comme "volumineuse" (10KB)
-        LARGE_DATA_THRESHOLD = 10 * 1024
-        
-        for col in df.columns:
-            # Vérifier si la colonne contient des données volumineuses
-            large_values = 0
-            total_values = 0
-            
-            for val in df[col].dropna():
-                total_values += 1
-                val_str = str(val)
-                # Détecter base64 (commence par常见的base64 patterns)
-                if (len(val_str) > LARGE_DATA_THRESHOLD or
-                    val_str.startswith('data:image/') or
-                    val_str.startswith('iVBOR') or  # PNG base64
-                    val_str.startswith('/9j/') or   # JPEG base64
-                    (len(val_str) > 100 and all(c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=' for c in val_str[:100]))):
-                    large_values += 1
-                
-                # Vérifier seulement les premières valeurs pour la performance
-                if total_values >= 10:
-                    break
-            
-            # Si plus de 50% des valeurs échantillonnées sont volumineuses, marquer la colonne
-            if total_values > 0 and large_values / total_values > 0.5:
-                large_columns[col] = True
-        
-        return large_columns
-    
-    def _sanitize_large_data(self, value: str, is_large_column: bool) -> str:
-        """Remplace les données volumineuses par des labels"""
-        if is_large_column:
-            if not value or value == 'nan' or value == 'None':
-                return "[Données vides]"
-            else:
-                return f"[Données volumineuses - {len(value)} caractères]"
-        return value
-    
     async def _update_dataframe_data(self, data_source_id: int, df: pd.DataFrame) -> None:
         """Met à jour les données DataFrame en base"""
-        print(f"💾 Mise à jour des données en base pour la source {data_source_id}")
+        logger.debug("Mise à jour des données en base pour la source %s", data_source_id)
         
-        # Détecter les colonnes avec des données volumineuses
-        large_columns = self._detect_large_data_columns(df)
-        if large_columns:
-            print(f"🔍 Détecté colonnes avec données volumineuses: {list(large_columns.keys())}")
-        
-        # Supprimer les anciennes données
-        self.db.query(DataFrameData).filter(DataFrameData.data_source_id == data_source_id).delete()
-        
-        # Insérer les nouvelles données
-        for idx, row in df.iterrows():
-            row_dict = {}
-            for col, val in row.items():
-                val_str = str(val) if val is not None else ""
-                # Sanitize si c'est une colonne avec des données volumineuses
-                sanitized_val = self._sanitize_large_data(val_str, large_columns.get(col, False))
-                row_dict[col] = sanitized_val
-            
-            db_row = DataFrameData(
-                data_source_id=data_source_id,
-                row_data=json.dumps(row_dict),
-                row_index=idx
-            )
-            self.db.add(db_row)
-        
-        self.db.commit()
-        print(f"✅ {len(df)} lignes mises à jour en base")
+        # Remplacer les anciennes données (lignes et blobs) via la file d'écriture,
+        # les colonnes volumineuses partent dans data_blobs
+        with span("persist", rows=len(df)):
+            large_columns = await run_write(self.db, replace_dataframe_data, data_source_id, df)
+        
+        logger.debug("%d lignes mises à jour en base", len(df))
         if large_columns:
-            print(f"📊 {len(large_columns)} colonnes avec données volumineuses处理ées")
+            logger.debug("%d colonnes avec données volumineuses stockées à part: %s", len(large_columns), list(large_columns))
 
 
 def create_sync_service(db: Session) -> DataSyncService:
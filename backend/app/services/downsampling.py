@@ -0,0 +1,250 @@
+"""
+Server-side downsampling of line and scatter chart data
+
+Plotly embeds every point in the figure JSON: a 1M-point series produces a
+payload the browser cannot handle. The points are reduced before the figure
+is built:
+- line charts: Largest-Triangle-Three-Buckets (LTTB), which keeps the visual shape
+- time series: min/max per time bucket, which keeps peaks and dips
+- scatter plots: uniform random sampling, or hex-bin stratified sampling that
+  keeps the point density and at least one point in every occupied cell
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Default maximum number of points sent to the browser per chart
+DEFAULT_MAX_POINTS = 5000
+
+# Number of hexagons along the x axis for hex-bin sampling
+HEXBIN_GRIDSIZE = 50
+
+SAMPLING_METHODS = ("auto", "lttb", "minmax", "random", "hexbin", "none")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets
+
+    x must be increasing. The first and last points are always kept; for every
+    bucket, the point forming the largest triangle with the previously selected
+    point and the average of the next bucket is kept.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    # Averages of every bucket, computed once; the last "next bucket" is the last point
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        bx = x[start:stop]
+        by = y[start:stop]
+        # Twice the triangle area, the constant factor does not change the argmax
+        area = np.abs(
+            (x[a] - avg_x[bucket + 1]) * (by - y[a])
+            - (x[a] - bx) * (avg_y[bucket + 1] - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[bucket + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the minimum and maximum of each of n_out / 2 consecutive buckets"""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    n_buckets = n_out // 2
+    bucket_ids = (np.arange(n) * n_buckets) // n
+    # Sorted by bucket then by value: the first and last entries of each bucket
+    # are its minimum and maximum
+    order = np.lexsort((y, bucket_ids))
+    boundaries = np.searchsorted(bucket_ids[order], np.arange(n_buckets + 1))
+    firsts = order[boundaries[:-1]]
+    lasts = order[boundaries[1:] - 1]
+    return np.unique(np.concatenate([firsts, lasts]))
+
+
+def random_indices(n: int, n_out: int, seed: int = 0) -> np.ndarray:
+    """Uniform random sample of n_out indices, in their original order"""
+    if n_out >= n:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n, size=n_out, replace=False))
+
+
+def hexbin_indices(x: np.ndarray, y: np.ndarray, n_out: int,
+                   gridsize: int = HEXBIN_GRIDSIZE, seed: int = 0) -> np.ndarray:
+    """
+    Stratified sample over a hexagonal grid
+
+    Each occupied hexagon keeps a share of points proportional to its count
+    (at least one), so dense areas stay dense and isolated points are not lost.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+
+    cells = _hexbin_cells(x.astype(np.float64), y.astype(np.float64), gridsize)
+    rng = np.random.default_rng(seed)
+
+    # Random rank of every point inside its cell
+    order = np.lexsort((rng.random(n), cells))
+    sorted_cells = cells[order]
+    cell_starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    counts = np.diff(np.r_[cell_starts, n])
+    ranks = np.arange(n) - np.repeat(cell_starts, counts)
+
+    # One point per cell first when the budget allows it, the rest is shared
+    # proportionally to the counts
+    if len(counts) <= n_out:
+        quotas = 1 + _largest_remainder(counts - 1, n_out - len(counts))
+    else:
+        quotas = _largest_remainder(counts, n_out)
+    keep = ranks < np.repeat(quotas, counts)
+    return np.sort(order[keep])
+
+
+def _largest_remainder(weights: np.ndarray, total: int) -> np.ndarray:
+    """Integer shares of total proportional to weights (largest remainder method)"""
+    weight_sum = weights.sum()
+    if weight_sum == 0 or total <= 0:
+        return np.zeros(len(weights), dtype=np.int64)
+    exact = weights * (total / weight_sum)
+    shares = np.floor(exact).astype(np.int64)
+    missing = total - int(shares.sum())
+    if missing > 0:
+        shares[np.argpartition(shares - exact, missing - 1)[:missing]] += 1
+    return shares
+
+
+def _hexbin_cells(x: np.ndarray, y: np.ndarray, gridsize: int) -> np.ndarray:
+    """Hexagon id of every point (same construction as matplotlib's hexbin)"""
+    xmin, xmax = x.min(), x.max()
+    ymin, ymax = y.min(), y.max()
+    sx = (xmax - xmin) / gridsize or 1.0
+    ny = max(int(gridsize / np.sqrt(3)), 1)
+    sy = (ymax - ymin) / ny or 1.0
+
+    ix = (x - xmin) / sx
+    iy = (y - ymin) / sy
+
+    # Two interleaved rectangular lattices, each point goes to the nearest center
+    ix1, iy1 = np.round(ix), np.round(iy)
+    ix2, iy2 = np.floor(ix) + 0.5, np.floor(iy) + 0.5
+    d1 = (ix - ix1) ** 2 + 3.0 * (iy - iy1) ** 2
+    d2 = (ix - ix2) ** 2 + 3.0 * (iy - iy2) ** 2
+    use_first = d1 < d2
+
+    width = gridsize + 2
+    first = (iy1 * width + ix1).astype(np.int64)
+    second = ((iy2 - 0.5) * width + (ix2 - 0.5)).astype(np.int64) + (ny + 2) * width
+    return np.where(use_first, first, second)
+
+
+def downsample_frame(df: pd.DataFrame, chart_type: str, x_column: Optional[str] = None,
+                     y_column: Optional[str] = None, max_points: int = DEFAULT_MAX_POINTS,
+                     method: str = "auto", group_column: Optional[str] = None) -> Tuple[pd.DataFrame, str]:
+    """
+    Reduce the rows of a line/scatter chart to at most max_points
+
+    With method="auto", line charts use min/max bucketing when x is a datetime
+    column and LTTB otherwise; scatter plots use hex-bin sampling. When the
+    chart is split by group_column (plotly `color`), each group is reduced
+    separately with its share of the budget.
+
+    Returns:
+        (reduced DataFrame, sampling method actually applied or "none")
+    """
+    if method not in SAMPLING_METHODS:
+        raise ValueError(f"Unknown sampling method: {method}")
+    if method == "none" or max_points is None or len(df) <= max_points:
+        return df, "none"
+
+    if group_column and group_column in df.columns:
+        groups = df.groupby(group_column, sort=False, dropna=False).indices
+        budget = max(max_points // max(len(groups), 1), 2)
+        positions = []
+        applied = "none"
+        for group_positions in groups.values():
+            group_df = df.iloc[group_positions]
+            kept, group_method = _downsample_positions(group_df, chart_type, x_column, y_column, budget, method)
+            positions.append(group_positions[kept])
+            if group_method != "none":
+                applied = group_method
+        return df.iloc[np.sort(np.concatenate(positions))], applied
+
+    kept, applied = _downsample_positions(df, chart_type, x_column, y_column, max_points, method)
+    return df.iloc[kept], applied
+
+
+def _downsample_positions(df: pd.DataFrame, chart_type: str, x_column: Optional[str],
+                          y_column: Optional[str], max_points: int, method: str) -> Tuple[np.ndarray, str]:
+    """Positions of the rows to keep and the method used"""
+    n = len(df)
+    if n <= max_points:
+        return np.arange(n), "none"
+
+    y = _numeric_values(df, y_column)
+    x = _numeric_values(df, x_column) if x_column else np.arange(n, dtype=np.float64)
+    is_time_series = bool(x_column) and pd.api.types.is_datetime64_any_dtype(df[x_column])
+
+    if method == "auto":
+        if chart_type == "line":
+            method = "minmax" if is_time_series else "lttb"
+        else:
+            method = "hexbin"
+
+    # Non-numeric axes cannot be bucketed by value
+    if method == "random" or y is None or x is None:
+        return random_indices(n, max_points), "random"
+
+    # Missing values are not drawn by plotly: only the complete points are reduced
+    valid = ~(np.isnan(x) | np.isnan(y))
+    positions = np.flatnonzero(valid)
+    if len(positions) < n:
+        x, y = x[positions], y[positions]
+        if len(positions) <= max_points:
+            return positions, method
+
+    if method == "lttb":
+        # LTTB follows the drawing order: use positions when x is not sorted
+        if not np.all(np.diff(x) >= 0):
+            x = positions.astype(np.float64)
+        kept = lttb_indices(x, y, max_points)
+    elif method == "minmax":
+        kept = minmax_indices(y, max_points)
+    else:
+        kept = hexbin_indices(x, y, max_points)
+    return positions[kept], method
+
+
+def _numeric_values(df: pd.DataFrame, column: Optional[str]) -> Optional[np.ndarray]:
+    """Column as float64 (datetimes as nanoseconds), None when it is not numeric"""
+    if not column or column not in df.columns:
+        return None
+    series = df[column]
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+        values[series.isna().to_numpy()] = np.nan
+        return values
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return None
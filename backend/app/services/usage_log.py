@@ -0,0 +1,252 @@
+"""
+Journal d'utilisation des clés API, écrit par lots
+
+Les requêtes n'écrivent pas en base : record_usage() ajoute l'événement à un
+tampon en mémoire. Un thread vide ce tampon toutes les USAGE_FLUSH_INTERVAL
+secondes, ou dès que USAGE_BATCH_SIZE événements sont en attente : une
+insertion groupée dans api_key_usage et une seule mise à jour de
+usage_count / last_used_at par clé. Le tampon est vidé à l'arrêt de l'API.
+
+Un lot refusé est remis en tête du tampon. Après USAGE_FLUSH_ATTEMPTS échecs
+consécutifs, le lot est réécrit par moitiés jusqu'à isoler les événements
+refusés (clé supprimée, ...), qui sont abandonnés : ils ne bloquent plus les
+suivants. Une base indisponible (OperationalError) n'abandonne rien.
+"""
+
+import logging
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.api_keys import APIKey, APIKeyUsage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UsageEvent:
+    """Un appel effectué avec une clé API"""
+    api_key_id: int
+    endpoint: str
+    request_method: str
+    response_status: int
+    tokens_used: int = 0
+    processing_time_ms: Optional[float] = None
+    request_data: Optional[str] = None
+    response_data: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class UsageRecorder:
+    """Tampon des événements d'utilisation et thread d'écriture par lots"""
+
+    def __init__(self, session_factory: Callable[[], Session], flush_interval: float,
+                 batch_size: int, max_buffer: int, max_attempts: int = 3):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.max_attempts = max_attempts
+        # Échecs consécutifs du dernier lot
+        self._failures = 0
+        self._buffer: Deque[UsageEvent] = deque()
+        self._lock = threading.Lock()
+        # Un seul vidage à la fois (thread périodique, arrêt, appel explicite)
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.discarded = 0
+
+    def record(self, event: UsageEvent) -> None:
+        """Ajoute un événement au tampon (aucun accès à la base)"""
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                # Base indisponible depuis longtemps : les plus anciens sont perdus
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(event)
+            self.recorded += 1
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Écrit les événements en attente ; retourne le nombre de lignes écrites"""
+        with self._flush_lock:
+            with self._lock:
+                events = list(self._buffer)
+                self._buffer.clear()
+            if not events:
+                return 0
+
+            if self._failures >= self.max_attempts:
+                written, kept = self._write_isolated(events)
+            else:
+                try:
+                    self._write(events)
+                    written, kept = len(events), []
+                except Exception as e:
+                    logger.warning("Usage log flush failed (%d events kept): %s", len(events), e)
+                    written, kept = 0, events
+
+            if kept:
+                # Les événements sont remis en tête du tampon pour le prochain essai
+                with self._lock:
+                    self._buffer.extendleft(reversed(kept))
+                    while len(self._buffer) > self.max_buffer:
+                        self._buffer.popleft()
+                        self.dropped += 1
+                    self.failed_flushes += 1
+                self._failures += 1
+            else:
+                self._failures = 0
+                self.flushes += 1
+            self.written += written
+            return written
+
+    def _write_isolated(self, events: List[UsageEvent]) -> Tuple[int, List[UsageEvent]]:
+        """
+        Écrit les événements par moitiés ; un événement refusé seul est abandonné.
+        Retourne (lignes écrites, événements à réessayer si la base est indisponible).
+        """
+        written = 0
+        pending = [events]
+        while pending:
+            batch = pending.pop()
+            try:
+                self._write(batch)
+                written += len(batch)
+            except OperationalError as e:
+                # Base indisponible : rien n'est abandonné
+                logger.warning("Usage log flush failed, database unavailable: %s", e)
+                return written, batch + [event for rest in reversed(pending) for event in rest]
+            except Exception as e:
+                if len(batch) > 1:
+                    middle = len(batch) // 2
+                    pending.append(batch[middle:])
+                    pending.append(batch[:middle])
+                    continue
+                self.discarded += 1
+                logger.warning("Usage event discarded after %d failed flushes (api_key_id=%s): %s",
+                               self.max_attempts, batch[0].api_key_id, e)
+        return written, []
+
+    def _write(self, events: List[UsageEvent]) -> None:
+        # Compteurs agrégés par clé : une mise à jour par clé et non par appel
+        per_key: Dict[int, Dict] = {}
+        for event in events:
+            counters = per_key.setdefault(event.api_key_id, {"key_id": event.api_key_id, "calls": 0,
+                                                             "last_used": event.created_at})
+            counters["calls"] += 1
+            counters["last_used"] = max(counters["last_used"], event.created_at)
+
+        db = self.session_factory()
+        try:
+            db.execute(insert(APIKeyUsage), [asdict(event) for event in events])
+            keys = APIKey.__table__
+            db.execute(
+                update(keys)
+                .where(keys.c.id == bindparam("key_id"))
+                .values(
+                    usage_count=func.coalesce(keys.c.usage_count, 0) + bindparam("calls"),
+                    last_used_at=bindparam("last_used"),
+                ),
+                list(per_key.values()),
+            )
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self) -> None:
+        """Démarre le thread de vidage périodique"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="usage-log", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Arrête le thread puis écrit les événements restants"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    @property
+    def buffered(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffered": self.buffered,
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "discarded": self.discarded,
+        }
+
+
+def _session_factory() -> Session:
+    from app.db.session import SessionLocal
+    return SessionLocal()
+
+
+usage_recorder = UsageRecorder(
+    _session_factory,
+    flush_interval=settings.USAGE_FLUSH_INTERVAL,
+    batch_size=settings.USAGE_BATCH_SIZE,
+    max_buffer=settings.USAGE_MAX_BUFFER,
+    max_attempts=settings.USAGE_FLUSH_ATTEMPTS,
+)
+
+
+def record_usage(api_key_id: int, endpoint: str, request_method: str, response_status: int,
+                 tokens_used: int = 0, processing_time_ms: Optional[float] = None) -> None:
+    """Enregistre un appel effectué avec une clé API (écrit au prochain vidage)"""
+    usage_recorder.record(UsageEvent(
+        api_key_id=api_key_id,
+        endpoint=endpoint,
+        request_method=request_method,
+        response_status=response_status,
+        tokens_used=tokens_used,
+        processing_time_ms=processing_time_ms,
+    ))
+
+
+async def get_active_api_key(db: AsyncSession, user_id: int, key_type: str) -> Optional[Tuple[int, str]]:
+    """(identifiant, valeur) de la clé active d'un utilisateur pour un fournisseur (gemini, openai, ...)"""
+    row = (await db.execute(
+        select(APIKey.id, APIKey.key_value)
+        .where(APIKey.user_id == user_id, APIKey.key_type == key_type, APIKey.is_active.is_(True))
+        .order_by(APIKey.id)
+        .limit(1)
+    )).first()
+    return (row.id, row.key_value) if row else None
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Comparaison de deux exécutions de benchmarks/suite.py (contrôle de régression)
+
+Pour chaque mesure présente dans les deux fichiers (même nom : cas, format,
+taille), calcule le rapport des médianes candidat / référence et son
+intervalle de confiance par bootstrap (rééchantillonnage des essais de
+chaque côté, graine fixe). Une mesure est une régression de temps si :
+- le rapport dépasse 1 + --time-threshold,
+- la borne basse de l'intervalle dépasse 1 (écart non dû au bruit),
+- et l'écart absolu des médianes dépasse --min-delta-s.
+Elle est « non concluante » si l'un des côtés a moins de MIN_SAMPLES essais,
+ou si le rapport dépasse le seuil sans que l'intervalle exclue 1 : il faut
+alors plus d'essais (suite.py --repeat) pour conclure.
+La mémoire (hausse maximale du RSS) est une régression si elle augmente de
+plus de --memory-threshold et de plus de --memory-min-mb. Une mesure en
+erreur dans le candidat mais pas dans la référence est aussi une régression.
+
+Code de sortie : 0 sans régression, 1 avec au moins une régression,
+2 si les fichiers ne sont pas comparables, 3 sans régression mais avec au
+moins une mesure de temps non concluante.
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json
+    python benchmarks/compare.py baseline.json candidate.json --time-threshold 0.05 --filter upload,sync,statistics
+    python benchmarks/compare.py baseline.json candidate.json --output comparison.json
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+MIN_SAMPLES = 5
+
+
+def load_results(path: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    with open(path) as f:
+        run = json.load(f)
+    if run.get("benchmark") != "suite" or "results" not in run:
+        raise ValueError(f"{path}: pas un résultat de benchmarks/suite.py")
+    return run, {result["name"]: result for result in run["results"]}
+
+
+def bootstrap_ratio_ci(baseline: List[float], candidate: List[float], confidence: float,
+                       resamples: int, rng: random.Random) -> Optional[Tuple[float, float]]:
+    """Intervalle de confiance du rapport des médianes (candidat / référence)"""
+    if len(baseline) < MIN_SAMPLES or len(candidate) < MIN_SAMPLES:
+        return None
+    ratios = []
+    for _ in range(resamples):
+        base = statistics.median(rng.choices(baseline, k=len(baseline)))
+        cand = statistics.median(rng.choices(candidate, k=len(candidate)))
+        if base > 0:
+            ratios.append(cand / base)
+    if not ratios:
+        return None
+    ratios.sort()
+    tail = (1 - confidence) / 2
+    return ratios[int(tail * (len(ratios) - 1))], ratios[int((1 - tail) * (len(ratios) - 1))]
+
+
+def compare_result(name: str, base: Dict[str, Any], cand: Dict[str, Any], args: argparse.Namespace,
+                   rng: random.Random) -> Dict[str, Any]:
+    comparison: Dict[str, Any] = {
+        "name": name,
+        "baseline_median_s": base.get("median_s"),
+        "candidate_median_s": cand.get("median_s"),
+        "baseline_peak_rss_mb": base.get("peak_rss_mb"),
+        "candidate_peak_rss_mb": cand.get("peak_rss_mb"),
+        "time_ratio": None,
+        "time_ci": None,
+        "memory_delta_mb": None,
+        "regressions": [],
+        "improvements": [],
+        "inconclusive": None,
+    }
+    if cand.get("error") and not base.get("error"):
+        comparison["regressions"].append(f"erreur: {cand['error']}")
+        return comparison
+    if base.get("error") or not base.get("timings_s") or not cand.get("timings_s"):
+        return comparison
+
+    base_median, cand_median = base["median_s"], cand["median_s"]
+    if base_median > 0:
+        ratio = cand_median / base_median
+        ci = bootstrap_ratio_ci(base["timings_s"], cand["timings_s"], args.confidence, args.bootstrap, rng)
+        comparison["time_ratio"] = ratio
+        comparison["time_ci"] = list(ci) if ci else None
+        large_enough = abs(cand_median - base_median) > args.min_delta_s
+        slower = ratio > 1 + args.time_threshold and large_enough
+        faster = ratio < 1 / (1 + args.time_threshold) and large_enough
+        if ci is None:
+            samples = min(len(base["timings_s"]), len(cand["timings_s"]))
+            comparison["inconclusive"] = f"{samples} essai(s), {MIN_SAMPLES} requis"
+        elif slower and ci[0] > 1:
+            comparison["regressions"].append("temps")
+        elif faster and ci[1] < 1:
+            comparison["improvements"].append("temps")
+        elif slower or faster:
+            comparison["inconclusive"] = "intervalle trop large"
+
+    base_peak, cand_peak = base.get("peak_rss_mb"), cand.get("peak_rss_mb")
+    if base_peak is not None and cand_peak is not None:
+        delta = cand_peak - base_peak
+        comparison["memory_delta_mb"] = delta
+        if delta > args.memory_min_mb and delta > args.memory_threshold * max(base_peak, 0):
+            comparison["regressions"].append("mémoire")
+        elif -delta > args.memory_min_mb and -delta > args.memory_threshold * max(base_peak, 0):
+            comparison["improvements"].append("mémoire")
+    return comparison
+
+
+def _seconds(value: Optional[float]) -> str:
+    return f"{value:.4f}" if value is not None else "-"
+
+
+def _megabytes(value: Optional[float]) -> str:
+    return f"{value:.1f}" if value is not None else "-"
+
+
+def print_table(comparisons: List[Dict[str, Any]], confidence: float) -> None:
+    ci_label = f"IC {confidence:.0%}"
+    print(f"\n{'mesure':<40} {'réf s':>9} {'cand s':>9} {'écart':>8} {ci_label:>17} "
+          f"{'réf Mo':>8} {'cand Mo':>8} {'Δ Mo':>7}  verdict")
+    for c in comparisons:
+        ratio = f"{(c['time_ratio'] - 1) * 100:+.1f}%" if c["time_ratio"] is not None else "-"
+        ci = (f"[{(c['time_ci'][0] - 1) * 100:+.0f}%, {(c['time_ci'][1] - 1) * 100:+.0f}%]"
+              if c["time_ci"] else "-")
+        if c["regressions"]:
+            verdict = "🔴 régression (" + ", ".join(c["regressions"]) + ")"
+        elif c["improvements"]:
+            verdict = "🟢 amélioration (" + ", ".join(c["improvements"]) + ")"
+        elif c["inconclusive"]:
+            verdict = f"🟡 non concluant ({c['inconclusive']})"
+        else:
+            verdict = "⚪"
+        delta = f"{c['memory_delta_mb']:+.1f}" if c["memory_delta_mb"] is not None else "-"
+        print(f"{c['name']:<40} {_seconds(c['baseline_median_s']):>9} {_seconds(c['candidate_median_s']):>9} "
+              f"{ratio:>8} {ci:>17} {_megabytes(c['baseline_peak_rss_mb']):>8} "
+              f"{_megabytes(c['candidate_peak_rss_mb']):>8} {delta:>7}  {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="résultats de référence (suite.py --output)")
+    parser.add_argument("candidate", help="résultats à contrôler")
+    parser.add_argument("--time-threshold", type=float, default=0.10, help="hausse relative tolérée de la médiane")
+    parser.add_argument("--min-delta-s", type=float, default=0.005, help="écart absolu ignoré (bruit), en secondes")
+    parser.add_argument("--memory-threshold", type=float, default=0.20, help="hausse relative tolérée du pic RSS")
+    parser.add_argument("--memory-min-mb", type=float, default=10.0, help="hausse du pic RSS ignorée, en Mo")
+    parser.add_argument("--confidence", type=float, default=0.95, help="niveau de l'intervalle de confiance")
+    parser.add_argument("--bootstrap", type=int, default=2000, help="rééchantillonnages du bootstrap")
+    parser.add_argument("--filter", help="ne comparer que les mesures contenant l'un de ces mots (virgules)")
+    parser.add_argument("--output", help="fichier JSON pour la comparaison")
+    args = parser.parse_args()
+
+    try:
+        base_run, baseline = load_results(args.baseline)
+        cand_run, candidate = load_results(args.candidate)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    # Mêmes mesures seulement si les jeux de données sont identiques (empreinte des paramètres)
+    base_datasets = {(d["format"], d["rows"]): d.get("fingerprint") for d in base_run.get("datasets", [])}
+    for d in cand_run.get("datasets", []):
+        fingerprint = base_datasets.get((d["format"], d["rows"]))
+        if fingerprint is not None and fingerprint != d.get("fingerprint"):
+            print(f"⚠️  {d['format']}/{d['rows']}: jeux de données différents (colonnes, nulls, graine...)")
+
+    keywords = [word.strip() for word in args.filter.split(",")] if args.filter else None
+    names = [name for name in baseline if name in candidate
+             and (keywords is None or any(word in name for word in keywords))]
+    missing = [name for name in baseline if name not in candidate
+               and (keywords is None or any(word in name for word in keywords))]
+    if not names:
+        print("❌ Aucune mesure commune aux deux fichiers")
+        sys.exit(2)
+
+    rng = random.Random(0)
+    comparisons = [compare_result(name, baseline[name], candidate[name], args, rng) for name in names]
+    print(f"📊 Référence {base_run.get('git_commit') or args.baseline} ↔ candidat {cand_run.get('git_commit') or args.candidate}")
+    print_table(comparisons, args.confidence)
+
+    regressions = [c for c in comparisons if c["regressions"]]
+    inconclusive = [c for c in comparisons if c["inconclusive"] and not c["regressions"]]
+    if missing:
+        print(f"\n⚠️  Absentes du candidat : {', '.join(missing)}")
+    print(f"\n{len(regressions)} régression(s), "
+          f"{sum(1 for c in comparisons if c['improvements'] and not c['regressions'])} amélioration(s), "
+          f"{len(inconclusive)} non concluante(s) sur {len(comparisons)} mesures")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "baseline": {"file": args.baseline, "git_commit": base_run.get("git_commit")},
+                "candidate": {"file": args.candidate, "git_commit": cand_run.get("git_commit")},
+                "thresholds": {"time": args.time_threshold, "min_delta_s": args.min_delta_s,
+                               "memory": args.memory_threshold, "memory_min_mb": args.memory_min_mb,
+                               "confidence": args.confidence},
+                "missing": missing,
+                "comparisons": comparisons,
+            }, f, indent=2)
+        print(f"💾 Comparaison écrite dans {args.output}")
+
+    sys.exit(1 if regressions else 3 if inconclusive else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark des accès à dataframe_data avant/après l'index (data_source_id, row_index)
+
+Remplit une base SQLite avec N lignes réparties sur plusieurs sources, mesure
+les requêtes de l'API (comptage, page triée par row_index, suppression d'une
+source) sans index, crée l'index de la migration 0002 puis mesure à nouveau.
+
+Usage:
+    python benchmarks/dataframe_data_index.py                 # 10M lignes
+    python benchmarks/dataframe_data_index.py --rows 1000000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+# Requêtes émises par get_data_source_data() et delete_dataframe_data()
+COUNT_SQL = "SELECT count(*) FROM dataframe_data WHERE data_source_id = ?"
+PAGE_SQL = (
+    "SELECT id, data_source_id, row_data, row_index FROM dataframe_data "
+    "WHERE data_source_id = ? ORDER BY row_index LIMIT ? OFFSET ?"
+)
+DELETE_SQL = "DELETE FROM dataframe_data WHERE data_source_id = ?"
+CREATE_INDEX_SQL = (
+    "CREATE INDEX ix_dataframe_data_source_row ON dataframe_data (data_source_id, row_index)"
+)
+
+INSERT_BATCH_SIZE = 50_000
+
+
+def create_database(path: str, rows: int, sources: int) -> None:
+    """Crée la table dataframe_data (schéma de référence, sans l'index composite) et la remplit"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute(
+        "CREATE TABLE dataframe_data ("
+        "id INTEGER NOT NULL PRIMARY KEY, "
+        "data_source_id INTEGER NOT NULL, "
+        "row_data TEXT NOT NULL, "
+        "row_index INTEGER NOT NULL)"
+    )
+    conn.execute("CREATE INDEX ix_dataframe_data_id ON dataframe_data (id)")
+
+    # Les sources sont stockées l'une après l'autre, comme à l'upload
+    rows_per_source = rows // sources
+    for source_id in range(1, sources + 1):
+        for start in range(0, rows_per_source, INSERT_BATCH_SIZE):
+            stop = min(start + INSERT_BATCH_SIZE, rows_per_source)
+            conn.executemany(
+                "INSERT INTO dataframe_data (data_source_id, row_data, row_index) VALUES (?, ?, ?)",
+                (
+                    (source_id, json.dumps({"id": str(i), "name": f"item {i}", "value": str(i * 0.5)}), i)
+                    for i in range(start, stop)
+                ),
+            )
+        conn.commit()
+    conn.close()
+
+
+def measure(conn: sqlite3.Connection, sql: str, params: tuple, repeat: int) -> dict:
+    """Exécute une requête `repeat` fois et retourne les durées en millisecondes"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "runs": repeat}
+
+
+def measure_delete(conn: sqlite3.Connection, source_id: int) -> dict:
+    """Mesure la suppression des lignes d'une source puis annule la transaction"""
+    start = time.perf_counter()
+    conn.execute("BEGIN")
+    deleted = conn.execute(DELETE_SQL, (source_id,)).rowcount
+    elapsed = (time.perf_counter() - start) * 1000
+    conn.execute("ROLLBACK")
+    return {"median_ms": elapsed, "min_ms": elapsed, "runs": 1, "rows_deleted": deleted}
+
+
+def run_suite(conn: sqlite3.Connection, sources: int, rows_per_source: int, page_size: int, repeat: int) -> dict:
+    """Mesure comptage, première page, page au milieu des données et suppression"""
+    source_id = sources // 2 + 1
+    return {
+        "count": measure(conn, COUNT_SQL, (source_id,), repeat),
+        "first_page": measure(conn, PAGE_SQL, (source_id, page_size, 0), repeat),
+        "middle_page": measure(conn, PAGE_SQL, (source_id, page_size, rows_per_source // 2), repeat),
+        "delete_source": measure_delete(conn, source_id),
+    }
+
+
+def print_results(before: dict, after: dict) -> None:
+    print(f"\n{'operation':<16} {'before (ms)':>12} {'after (ms)':>12} {'speedup':>9}")
+    for name in before:
+        b, a = before[name]["median_ms"], after[name]["median_ms"]
+        print(f"{name:<16} {b:12.1f} {a:12.1f} {b / a if a else float('inf'):8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="nombre total de lignes")
+    parser.add_argument("--sources", type=int, default=10, help="nombre de sources de données")
+    parser.add_argument("--page-size", type=int, default=100, help="taille de page (limit)")
+    parser.add_argument("--repeat", type=int, default=5, help="répétitions par requête de lecture")
+    parser.add_argument("--db", help="fichier SQLite à réutiliser (créé s'il n'existe pas)")
+    parser.add_argument("--output", help="fichier JSON pour les résultats")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="nexusbi_bench_"), "dataframe_data.db")
+    if not os.path.exists(db_path):
+        print(f"📝 Génération de {args.rows:,} lignes ({args.sources} sources) dans {db_path}")
+        start = time.perf_counter()
+        create_database(db_path, args.rows, args.sources)
+        print(f"   {time.perf_counter() - start:.1f}s")
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("DROP INDEX IF EXISTS ix_dataframe_data_source_row")
+    rows_per_source = args.rows // args.sources
+
+    print("⏱️  Sans index composite...")
+    before = run_suite(conn, args.sources, rows_per_source, args.page_size, args.repeat)
+
+    print("🏗️  Création de ix_dataframe_data_source_row...")
+    start = time.perf_counter()
+    conn.execute(CREATE_INDEX_SQL)
+    index_seconds = time.perf_counter() - start
+    print(f"   {index_seconds:.1f}s")
+
+    print("⏱️  Avec index composite...")
+    after = run_suite(conn, args.sources, rows_per_source, args.page_size, args.repeat)
+    conn.close()
+    if not args.db:
+        shutil.rmtree(os.path.dirname(db_path), ignore_errors=True)
+
+    print_results(before, after)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "benchmark": "dataframe_data_index",
+                "rows": args.rows,
+                "sources": args.sources,
+                "page_size": args.page_size,
+                "index_creation_s": index_seconds,
+                "before": before,
+                "after": after,
+            }, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Jeux de données synthétiques pour les benchmarks (CSV, Excel, JSON, TXT, dump SQL)
+
+Les fichiers sont générés par blocs (mémoire bornée, y compris à 10M lignes)
+à partir d'une graine : mêmes paramètres, mêmes octets. Colonnes :
+- id                  entier croissant
+- m0..mN              numériques (float), avec null_ratio de valeurs manquantes
+- cat0..catN          catégorielles (CATEGORY_LEVELS modalités)
+- created_at          date
+- blob0..blobN        images base64 de BLOB_SIZE caractères, au-delà du seuil
+                      de blob_store (stockées dans data_blobs)
+
+Le nom du fichier contient le nombre de lignes et une empreinte des
+paramètres ; un fichier existant est réutilisé (--fixtures-dir du suite).
+Excel est limité à EXCEL_MAX_ROWS lignes par feuille : les tailles
+supérieures ne sont pas générées dans ce format.
+
+Usage:
+    python benchmarks/datasets.py --rows 10k,1m --output-dir /tmp/nexusbi_fixtures
+    python benchmarks/datasets.py --rows 10m --formats csv,sql --columns 20 --null-ratio 0.1
+    python benchmarks/datasets.py --rows 10k --blob-columns 1 --formats json
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+FORMATS = ("csv", "excel", "json", "txt", "sql")
+EXTENSIONS = {"csv": ".csv", "excel": ".xlsx", "json": ".json", "txt": ".txt", "sql": ".sql"}
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+CHUNK_ROWS = 200_000
+CATEGORY_LEVELS = 50
+BLOB_SIZE = 12 * 1024
+EXCEL_MAX_ROWS = 1_048_575
+SQL_ROWS_PER_INSERT = 1_000
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    rows: int
+    columns: int = 10
+    categoricals: int = 2
+    null_ratio: float = 0.05
+    blob_columns: int = 0
+    seed: int = 0
+
+    @property
+    def fingerprint(self) -> str:
+        return hashlib.sha1(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()[:8]
+
+    def file_name(self, fmt: str) -> str:
+        return f"bench_{format_size(self.rows)}_{self.fingerprint}{EXTENSIONS[fmt]}"
+
+
+def parse_size(value: str) -> int:
+    """10k, 1m, 10m ou un nombre de lignes"""
+    value = value.strip().lower().replace("_", "")
+    if value in SIZES:
+        return SIZES[value]
+    for suffix, factor in (("k", 1_000), ("m", 1_000_000)):
+        if value.endswith(suffix):
+            return int(float(value[:-1]) * factor)
+    return int(value)
+
+
+def format_size(rows: int) -> str:
+    for suffix, factor in (("m", 1_000_000), ("k", 1_000)):
+        if rows >= factor and rows % factor == 0:
+            return f"{rows // factor}{suffix}"
+    return str(rows)
+
+
+def iter_chunks(spec: DatasetSpec, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Blocs de chunk_rows lignes, chacun tiré avec la graine (seed, numéro du bloc)"""
+    categories = np.array([f"c{i:02d}" for i in range(CATEGORY_LEVELS)])
+    start_date = np.datetime64("2020-01-01")
+    for index, start in enumerate(range(0, spec.rows, chunk_rows)):
+        rng = np.random.default_rng([spec.seed, index])
+        size = min(chunk_rows, spec.rows - start)
+        data = {"id": np.arange(start, start + size)}
+        for i in range(spec.columns):
+            values = rng.normal(100, 25, size).round(4)
+            if spec.null_ratio > 0:
+                values[rng.random(size) < spec.null_ratio] = np.nan
+            data[f"m{i}"] = values
+        for i in range(spec.categoricals):
+            values = categories[rng.integers(0, CATEGORY_LEVELS, size)].astype(object)
+            if spec.null_ratio > 0:
+                values[rng.random(size) < spec.null_ratio] = None
+            data[f"cat{i}"] = values
+        data["created_at"] = (start_date + rng.integers(0, 2000, size).astype("timedelta64[D]")).astype(str)
+        for i in range(spec.blob_columns):
+            payload = base64.b64encode(rng.bytes(BLOB_SIZE * 3 // 4)).decode("ascii")
+            # Une même image par bloc, décalée par ligne : le contenu reste unique sans tirer size * 12 Ko
+            data[f"blob{i}"] = [f"data:image/png;base64,{payload[row % 64:]}{payload[:row % 64]}" for row in range(size)]
+        yield pd.DataFrame(data)
+
+
+def _sql_value(value) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return "NULL"
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return str(value)
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_integer_dtype(dtype):
+        return "int(11)"
+    if pd.api.types.is_float_dtype(dtype):
+        return "double"
+    return "text"
+
+
+def write_dataset(spec: DatasetSpec, fmt: str, path: str) -> None:
+    """Écrit le jeu de données au format fmt dans path (fichier temporaire puis renommage)"""
+    if fmt == "excel" and spec.rows > EXCEL_MAX_ROWS:
+        raise ValueError(f"Excel est limité à {EXCEL_MAX_ROWS:,} lignes")
+    partial = path + ".partial"
+    chunks = iter_chunks(spec)
+
+    if fmt in ("csv", "txt"):
+        separator = "," if fmt == "csv" else "\t"
+        for index, chunk in enumerate(chunks):
+            chunk.to_csv(partial, sep=separator, index=False, header=index == 0, mode="w" if index == 0 else "a")
+
+    elif fmt == "json":
+        # Tableau d'objets, comme les exports lus par JSONStrategy
+        with open(partial, "w", encoding="utf-8") as f:
+            f.write("[")
+            for index, chunk in enumerate(chunks):
+                records = chunk.to_json(orient="records", force_ascii=False)[1:-1]
+                if records:
+                    f.write(("," if index else "") + records)
+            f.write("]")
+
+    elif fmt == "sql":
+        with open(partial, "w", encoding="utf-8") as f:
+            f.write("-- NexusBI benchmark dump\n")
+            for index, chunk in enumerate(chunks):
+                if index == 0:
+                    columns = ",\n".join(f"  `{name}` {_sql_type(dtype)}" for name, dtype in chunk.dtypes.items())
+                    f.write(f"CREATE TABLE `bench` (\n{columns}\n);\n\n")
+                rows = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+                batch: List[str] = []
+                for row in rows:
+                    batch.append("(" + ",".join(_sql_value(value) for value in row) + ")")
+                    if len(batch) == SQL_ROWS_PER_INSERT:
+                        f.write("INSERT INTO `bench` VALUES " + ",".join(batch) + ";\n")
+                        batch = []
+                if batch:
+                    f.write("INSERT INTO `bench` VALUES " + ",".join(batch) + ";\n")
+
+    elif fmt == "excel":
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("bench")
+        for index, chunk in enumerate(chunks):
+            if index == 0:
+                sheet.append(list(chunk.columns))
+            for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+                sheet.append(list(row))
+        workbook.save(partial)
+
+    else:
+        raise ValueError(f"Format inconnu: {fmt}")
+
+    os.replace(partial, path)
+
+
+def ensure_dataset(spec: DatasetSpec, fmt: str, directory: str) -> Optional[str]:
+    """Chemin du jeu de données, généré s'il n'existe pas ; None si le format ne supporte pas la taille"""
+    if fmt == "excel" and spec.rows > EXCEL_MAX_ROWS:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, spec.file_name(fmt))
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        write_dataset(spec, fmt, path)
+        print(f"📦 {os.path.basename(path)}: {os.path.getsize(path) / 1e6:.1f} Mo en {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def add_dataset_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--rows", default="10k", help="tailles séparées par des virgules (10k, 1m, 10m, ou un nombre)")
+    parser.add_argument("--formats", default=",".join(FORMATS), help=f"formats parmi {','.join(FORMATS)}")
+    parser.add_argument("--columns", type=int, default=10, help="colonnes numériques")
+    parser.add_argument("--categoricals", type=int, default=2, help="colonnes catégorielles")
+    parser.add_argument("--null-ratio", type=float, default=0.05, help="part de valeurs manquantes")
+    parser.add_argument("--blob-columns", type=int, default=0, help=f"colonnes d'images base64 ({BLOB_SIZE // 1024} Ko)")
+    parser.add_argument("--seed", type=int, default=0, help="graine du générateur")
+
+
+def specs_from_arguments(args: argparse.Namespace) -> List[DatasetSpec]:
+    return [
+        DatasetSpec(rows=parse_size(size), columns=args.columns, categoricals=args.categoricals,
+                    null_ratio=args.null_ratio, blob_columns=args.blob_columns, seed=args.seed)
+        for size in args.rows.split(",")
+    ]
+
+
+def formats_from_arguments(args: argparse.Namespace) -> List[str]:
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise SystemExit(f"Formats inconnus: {', '.join(sorted(unknown))}")
+    return formats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument("--output-dir", default="benchmark_fixtures", help="répertoire des fichiers générés")
+    args = parser.parse_args()
+
+    for spec in specs_from_arguments(args):
+        for fmt in formats_from_arguments(args):
+            path = ensure_dataset(spec, fmt, args.output_dir)
+            if path is None:
+                print(f"⏭️  {fmt} {format_size(spec.rows)}: au-delà de la limite du format")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Latence de /health pendant des requêtes de statistiques volumineuses
+
+Un endpoint `async def` qui exécute du pandas ou des requêtes SQLAlchemy
+bloquantes arrête la boucle d'événements : /health attend alors la fin du
+calcul. Ce benchmark démarre l'API (uvicorn), envoie un CSV de N lignes,
+puis mesure la latence de /health au repos et pendant que des clients
+demandent GET /data-sources/{id}/statistics en boucle.
+
+--backend-dir permet de mesurer une autre copie du backend (par exemple
+un `git worktree` de la révision précédente) avec le même scénario.
+
+Usage:
+    python benchmarks/event_loop_latency.py
+    python benchmarks/event_loop_latency.py --rows 500000 --clients 4 --output results.json
+    python benchmarks/event_loop_latency.py --backend-dir /tmp/nexusbi-before/backend
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+API = "/api/v1/data-sources"
+
+# Intervalle entre deux appels à /health
+PROBE_INTERVAL = 0.01
+
+
+def write_csv(path: str, rows: int, columns: int) -> None:
+    """CSV de test : un identifiant, une catégorie et des colonnes numériques"""
+    rng = random.Random(0)
+    with open(path, "w") as f:
+        f.write("id,category," + ",".join(f"m{i}" for i in range(columns)) + "\n")
+        for i in range(rows):
+            values = ",".join(f"{rng.gauss(0, 1):.5f}" for _ in range(columns))
+            f.write(f"{i},c{i % 50},{values}\n")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(backend_dir: str, workdir: str) -> tuple:
+    """Démarre uvicorn sur une base neuve et attend /health"""
+    port = free_port()
+    env = dict(os.environ)
+    env["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base_url + "/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Le serveur n'a pas démarré")
+
+
+def probe_health(base_url: str, stop: threading.Event, latencies: list) -> None:
+    """Appelle /health toutes les PROBE_INTERVAL secondes jusqu'à stop"""
+    with httpx.Client(base_url=base_url, timeout=300) as client:
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get("/health")
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(PROBE_INTERVAL)
+
+
+def statistics_loop(base_url: str, source_id: int, stop: threading.Event, durations: list, failures: list) -> None:
+    """Demande les statistiques de la source en boucle jusqu'à stop"""
+    with httpx.Client(base_url=base_url, timeout=600) as client:
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = client.get(f"{API}/{source_id}/statistics")
+            elapsed = time.perf_counter() - start
+            (durations if response.status_code == 200 else failures).append(elapsed)
+
+
+def summarize(latencies: list) -> dict:
+    ordered = sorted(latencies)
+    # Boucle bloquée pendant toute la phase : une seule mesure
+    quantiles = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else [ordered[0]] * 99
+    return {
+        "probes": len(ordered),
+        "p50_ms": quantiles[49],
+        "p99_ms": quantiles[98],
+        "max_ms": ordered[-1],
+    }
+
+
+def run_phase(base_url: str, source_id: int, clients: int, duration: float) -> dict:
+    stop = threading.Event()
+    latencies, durations, failures = [], [], []
+    threads = [threading.Thread(target=probe_health, args=(base_url, stop, latencies))]
+    threads += [
+        threading.Thread(target=statistics_loop, args=(base_url, source_id, stop, durations, failures))
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    result = summarize(latencies)
+    if clients:
+        result["statistics_requests"] = len(durations)
+        result["statistics_failed"] = len(failures)
+        result["statistics_median_s"] = statistics.median(durations) if durations else None
+    return result
+
+
+def print_results(results: dict) -> None:
+    print(f"\n{'phase':<12} {'probes':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'stats req':>10} {'median s':>9}")
+    for phase, r in results.items():
+        median = r.get("statistics_median_s")
+        print(f"{phase:<12} {r['probes']:>7} {r['p50_ms']:9.1f} {r['p99_ms']:9.1f} {r['max_ms']:9.1f} "
+              f"{r.get('statistics_requests', '-'):>10} {f'{median:.2f}' if median else '-':>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="lignes du CSV envoyé")
+    parser.add_argument("--columns", type=int, default=10, help="colonnes numériques du CSV")
+    parser.add_argument("--clients", type=int, default=2, help="clients demandant les statistiques")
+    parser.add_argument("--duration", type=float, default=20.0, help="durée de chaque phase (s)")
+    parser.add_argument("--backend-dir", default=BACKEND_DIR, help="répertoire du backend à mesurer")
+    parser.add_argument("--output", help="fichier JSON pour les résultats")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="nexusbi_bench_")
+    process = None
+    try:
+        csv_path = os.path.join(workdir, "large.csv")
+        write_csv(csv_path, args.rows, args.columns)
+
+        print(f"🚀 Démarrage de l'API ({args.backend_dir})")
+        process, base_url = start_server(args.backend_dir, workdir)
+        with httpx.Client(base_url=base_url, timeout=600) as client, open(csv_path, "rb") as f:
+            source_id = client.post(f"{API}/upload", files={"file": ("large.csv", f, "text/csv")}).json()["id"]
+
+        print(f"⏱️  /health au repos ({args.duration:.0f}s)")
+        idle = run_phase(base_url, source_id, 0, args.duration)
+        print(f"⏱️  /health pendant {args.clients} requêtes de statistiques en continu ({args.duration:.0f}s)")
+        loaded = run_phase(base_url, source_id, args.clients, args.duration)
+        results = {"idle": idle, "statistics": loaded}
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "benchmark": "event_loop_latency",
+                "backend_dir": args.backend_dir,
+                "rows": args.rows,
+                "columns": args.columns,
+                "clients": args.clients,
+                "duration_s": args.duration,
+                "results": results,
+            }, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la sérialisation JSON des réponses de statistiques et de graphiques
+
+Compare l'ancien chemin (convert_numpy_types + échantillon par iterrows +
+jsonable_encoder + JSONResponse, aller-retour json.dumps/json.loads avec
+PlotlyJSONEncoder pour les graphiques) à NumpyJSONResponse (orjson).
+
+Usage:
+    python benchmarks/json_serialization.py
+    python benchmarks/json_serialization.py --rows 1000000 --columns 200 --output results.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.v1.endpoints.data_sources import calculate_basic_stats, calculate_column_stats
+from app.core.responses import NumpyJSONResponse, records_from_dataframe
+
+
+def legacy_convert_numpy_types(obj):
+    """Walker supprimé de get_source_statistics / get_column_statistics"""
+    if isinstance(obj, dict):
+        return {k: legacy_convert_numpy_types(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_convert_numpy_types(v) for v in obj]
+    elif isinstance(obj, (np.integer, np.int64, int)):
+        return int(obj)
+    elif isinstance(obj, (np.floating, np.float64, float)):
+        # NaN remplacé ici pour que JSONResponse (allow_nan=False) accepte le contenu
+        return None if np.isnan(obj) else float(obj)
+    elif isinstance(obj, np.bool_):
+        return bool(obj)
+    elif pd.isna(obj):
+        return None
+    else:
+        return obj
+
+
+def legacy_sample_data(df: pd.DataFrame):
+    """Échantillon construit ligne par ligne avec iterrows()"""
+    sample_data = []
+    for _, row in df.iterrows():
+        row_dict = {}
+        for col in df.columns:
+            value = row[col]
+            if pd.isna(value):
+                row_dict[col] = None
+            elif isinstance(value, (np.integer, np.int64, int)):
+                row_dict[col] = int(value)
+            elif isinstance(value, (np.floating, np.float64, float)):
+                row_dict[col] = float(value)
+            elif isinstance(value, (np.datetime64, pd.Timestamp)):
+                row_dict[col] = value.isoformat()
+            elif isinstance(value, np.bool_):
+                row_dict[col] = bool(value)
+            else:
+                row_dict[col] = str(value)
+        sample_data.append(row_dict)
+    return sample_data
+
+
+def make_dataframe(rows: int, columns: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    data = {}
+    for i in range(columns):
+        if i % 4 == 3:
+            data[f"cat_{i}"] = rng.choice(["nord", "sud", "est", "ouest", None], rows)
+        else:
+            values = rng.normal(100, 15, rows)
+            values[rng.random(rows) < 0.01] = np.nan
+            data[f"num_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def time_it(func, repeat: int) -> dict:
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(func())
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "runs": repeat, "bytes": size}
+
+
+def bench_statistics(df: pd.DataFrame, sample_rows: int, repeat: int) -> dict:
+    """Contenu de /statistics enrichi des statistiques de chaque colonne"""
+    payload = {
+        **calculate_basic_stats(df),
+        "column_statistics": [calculate_column_stats(df[col], col) for col in df.columns],
+    }
+    sample = df.head(sample_rows)
+
+    def legacy():
+        content = legacy_convert_numpy_types(payload)
+        content["sample_data"] = legacy_sample_data(sample)
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def new():
+        return NumpyJSONResponse({**payload, "sample_data": records_from_dataframe(sample)}).body
+
+    return {"legacy": time_it(legacy, repeat), "orjson": time_it(new, repeat)}
+
+
+def bench_chart(df: pd.DataFrame, repeat: int) -> dict:
+    """Figure Plotly (nuage de points) de ChartGenerator.generate_plotly_chart"""
+    import plotly.express as px
+    from plotly.utils import PlotlyJSONEncoder
+
+    fig_dict = px.scatter(df, x=df.columns[0], y=df.columns[1]).to_dict()
+
+    def legacy():
+        chart_data = json.loads(json.dumps(fig_dict, cls=PlotlyJSONEncoder))
+        return JSONResponse(jsonable_encoder({"success": True, "chart_data": chart_data})).body
+
+    def new():
+        return NumpyJSONResponse({"success": True, "chart_data": fig_dict}).body
+
+    return {"legacy": time_it(legacy, repeat), "orjson": time_it(new, repeat)}
+
+
+def bench_dataframe(df: pd.DataFrame, repeat: int) -> dict:
+    """DataFrame complet sérialisé par colonnes"""
+
+    def legacy():
+        columns = {col: [None if pd.isna(v) else v for v in df[col].tolist()] for col in df.columns}
+        return json.dumps(columns).encode()
+
+    def new():
+        return NumpyJSONResponse(df).body
+
+    return {"legacy": time_it(legacy, repeat), "orjson": time_it(new, repeat)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="lignes du DataFrame")
+    parser.add_argument("--columns", type=int, default=50, help="colonnes pour les statistiques")
+    parser.add_argument("--chart-points", type=int, default=1_000_000, help="points du graphique")
+    parser.add_argument("--sample-rows", type=int, default=1000, help="lignes de sample_data")
+    parser.add_argument("--repeat", type=int, default=5, help="répétitions par mesure")
+    parser.add_argument("--output", help="fichier JSON pour les résultats")
+    args = parser.parse_args()
+
+    df = make_dataframe(args.rows, args.columns)
+    chart_df = make_dataframe(args.chart_points, 2)
+
+    results = {
+        "statistics": bench_statistics(df, args.sample_rows, args.repeat),
+        "chart": bench_chart(chart_df, args.repeat),
+        "dataframe": bench_dataframe(df, max(1, args.repeat // 2)),
+    }
+
+    print(f"\n{'payload':<12} {'size (MB)':>10} {'legacy (ms)':>12} {'orjson (ms)':>12} {'speedup':>9}")
+    for name, result in results.items():
+        legacy, new = result["legacy"]["median_ms"], result["orjson"]["median_ms"]
+        size = result["orjson"]["bytes"] / 1024 / 1024
+        print(f"{name:<12} {size:10.1f} {legacy:12.1f} {new:12.1f} {legacy / new:8.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "json_serialization", "rows": args.rows, "columns": args.columns,
+                       "chart_points": args.chart_points, "results": results}, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Test de charge SQLite : latence des lectures pendant des ingestions concurrentes
+
+Démarre l'API (uvicorn) sur une base SQLite neuve pour chaque configuration,
+mesure la latence de GET /data-sources/{id}/data au repos, puis pendant que
+plusieurs clients envoient des fichiers CSV en parallèle (POST /upload).
+
+Configurations comparées :
+- baseline : réglages SQLite par défaut (journal rollback), insertion dans la requête
+- tuned    : WAL + PRAGMA des settings, insertion via la file d'écriture unique
+
+Usage:
+    python benchmarks/sqlite_concurrency.py
+    python benchmarks/sqlite_concurrency.py --rows 200000 --writers 4 --duration 30 --output results.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGURATIONS = {
+    "baseline": {"SQLITE_TUNING": "false", "SQLITE_WRITE_QUEUE": "false"},
+    "tuned": {"SQLITE_TUNING": "true", "SQLITE_WRITE_QUEUE": "true"},
+}
+
+API = "/api/v1/data-sources"
+
+
+def write_csv(path: str, rows: int) -> None:
+    """Fichier CSV de test (identifiant, texte, deux mesures, date)"""
+    rng = random.Random(0)
+    with open(path, "w") as f:
+        f.write("id,name,value,amount,day\n")
+        for i in range(rows):
+            f.write(f"{i},item {i % 997},{rng.random():.6f},{rng.randint(0, 10_000)},2024-01-{i % 28 + 1:02d}\n")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir: str, name: str, overrides: dict) -> tuple:
+    """Démarre uvicorn sur une base neuve et attend /health"""
+    port = free_port()
+    env = dict(os.environ)
+    env.update(overrides)
+    env["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(workdir, name + '.db')}"
+    env["UPLOAD_DIR"] = os.path.join(workdir, name + "_uploads")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base_url + "/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Le serveur {name} n'a pas démarré")
+
+
+def upload(client: httpx.Client, path: str, name: str) -> httpx.Response:
+    with open(path, "rb") as f:
+        return client.post(f"{API}/upload", files={"file": (name, f, "text/csv")}, timeout=600)
+
+
+def read_loop(base_url: str, source_id: int, total_rows: int, stop: threading.Event,
+              latencies: list, errors: list) -> None:
+    """Lit des pages au hasard jusqu'à stop"""
+    rng = random.Random()
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        while not stop.is_set():
+            skip = rng.randrange(0, max(total_rows - 100, 1))
+            start = time.perf_counter()
+            try:
+                response = client.get(f"{API}/{source_id}/data", params={"skip": skip, "limit": 100})
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            (latencies if ok else errors).append(elapsed)
+
+
+def write_loop(base_url: str, csv_path: str, stop: threading.Event, results: dict) -> None:
+    """Envoie le fichier CSV en boucle jusqu'à stop"""
+    with httpx.Client(base_url=base_url) as client:
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                ok = upload(client, csv_path, "ingest.csv").status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            results["ok" if ok else "failed"] += 1
+            results["seconds"].append(time.perf_counter() - start)
+
+
+def summarize(latencies: list) -> dict:
+    if not latencies:
+        return {"reads": 0}
+    ordered = sorted(latencies)
+    quantiles = statistics.quantiles(ordered, n=100) if len(ordered) > 1 else [ordered[0]] * 99
+    return {
+        "reads": len(ordered),
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+        "max_ms": ordered[-1],
+    }
+
+
+def run_phase(base_url: str, source_id: int, seed_rows: int, readers: int, writers: int,
+              csv_path: str, duration: float) -> dict:
+    """Lectures concurrentes pendant `duration` secondes, avec `writers` clients d'ingestion"""
+    stop = threading.Event()
+    latencies, errors = [], []
+    uploads = {"ok": 0, "failed": 0, "seconds": []}
+    threads = [
+        threading.Thread(target=read_loop, args=(base_url, source_id, seed_rows, stop, latencies, errors))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(target=write_loop, args=(base_url, csv_path, stop, uploads))
+        for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    result = summarize(latencies)
+    result["read_errors"] = len(errors)
+    if writers:
+        result["uploads_ok"] = uploads["ok"]
+        result["uploads_failed"] = uploads["failed"]
+        result["upload_median_s"] = statistics.median(uploads["seconds"]) if uploads["seconds"] else None
+    return result
+
+
+def run_configuration(workdir: str, name: str, args, seed_csv: str, ingest_csv: str) -> dict:
+    print(f"🚀 {name}: démarrage du serveur")
+    process, base_url = start_server(workdir, name, CONFIGURATIONS[name])
+    try:
+        with httpx.Client(base_url=base_url) as client:
+            source_id = upload(client, seed_csv, "seed.csv").json()["id"]
+        print(f"   lectures seules ({args.duration:.0f}s)")
+        idle = run_phase(base_url, source_id, args.seed_rows, args.readers, 0, ingest_csv, args.duration)
+        print(f"   lectures + {args.writers} ingestions concurrentes ({args.duration:.0f}s)")
+        loaded = run_phase(base_url, source_id, args.seed_rows, args.readers, args.writers, ingest_csv, args.duration)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {"idle": idle, "ingest": loaded}
+
+
+def print_results(results: dict) -> None:
+    print(f"\n{'config':<10} {'phase':<8} {'reads':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9} {'errors':>7} {'uploads':>8} {'failed':>7}")
+    for name, phases in results.items():
+        for phase, r in phases.items():
+            print(f"{name:<10} {phase:<8} {r['reads']:>7} {r.get('p50_ms', 0):9.1f} {r.get('p95_ms', 0):9.1f} "
+                  f"{r.get('p99_ms', 0):9.1f} {r.get('max_ms', 0):9.1f} {r['read_errors']:>7} "
+                  f"{r.get('uploads_ok', '-'):>8} {r.get('uploads_failed', '-'):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="lignes du fichier ingéré")
+    parser.add_argument("--seed-rows", type=int, default=10_000, help="lignes de la source lue")
+    parser.add_argument("--readers", type=int, default=8, help="clients de lecture")
+    parser.add_argument("--writers", type=int, default=2, help="clients d'ingestion")
+    parser.add_argument("--duration", type=float, default=20.0, help="durée de chaque phase (s)")
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGURATIONS), choices=list(CONFIGURATIONS))
+    parser.add_argument("--output", help="fichier JSON pour les résultats")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="nexusbi_bench_")
+    try:
+        seed_csv = os.path.join(workdir, "seed.csv")
+        ingest_csv = os.path.join(workdir, "ingest.csv")
+        write_csv(seed_csv, args.seed_rows)
+        write_csv(ingest_csv, args.rows)
+
+        results = {name: run_configuration(workdir, name, args, seed_csv, ingest_csv) for name in args.configs}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "benchmark": "sqlite_concurrency",
+                "rows": args.rows,
+                "seed_rows": args.seed_rows,
+                "readers": args.readers,
+                "writers": args.writers,
+                "duration_s": args.duration,
+                "results": results,
+            }, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
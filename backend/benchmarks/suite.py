@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks reproductible : stratégies, ingestion et endpoints de lecture
+
+Pour chaque jeu de données généré par benchmarks/datasets.py (taille x
+format), après --warmup essais non mesurés, mesure --repeat fois :
+- strategy.connect / strategy.get_data : la stratégie seule, sur le fichier
+- upload      : POST /data-sources/upload
+- sync        : POST /data-sources/{id}/sync (erreur pour un type sans
+  synchronisation réelle, comme txt : rien n'est relu)
+- statistics  : GET /data-sources/{id}/statistics
+- data.first_page / data.last_page : GET /data-sources/{id}/data (limit 100)
+- chart.histogram / chart.scatter  : GET /data-sources/{id}/charts/... (titre
+  unique à chaque essai : rendu réel, pas le cache d'images)
+
+L'API tourne dans le processus (TestClient) sur une base SQLite et un
+répertoire d'upload temporaires. Chaque mesure garde les durées de tous les
+essais et la hausse maximale du RSS pendant l'essai (/proc/self/statm) ; le
+JSON écrit par --output est comparé d'une révision à l'autre.
+
+--fixtures-dir garde les fichiers générés entre deux exécutions (les
+fichiers 1M/10M prennent du temps à produire).
+
+Usage:
+    python benchmarks/suite.py
+    python benchmarks/suite.py --rows 10k,1m --formats csv,json --repeat 20 --output results.json
+    python benchmarks/suite.py --rows 1m --cases upload,statistics --fixtures-dir /tmp/nexusbi_fixtures
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from datasets import add_dataset_arguments, ensure_dataset, format_size, formats_from_arguments, specs_from_arguments  # noqa: E402
+
+API = "/api/v1/data-sources"
+CASES = ("strategy", "upload", "sync", "statistics", "data", "chart")
+# DataSource.type / stratégie de chaque format
+SOURCE_TYPES = {"csv": "csv", "excel": "excel", "json": "json", "txt": "txt", "sql": "sql_dump"}
+PAGE_SIZE = 100
+RSS_INTERVAL = 0.005
+
+
+class PeakRSS:
+    """Hausse maximale du RSS du processus pendant le bloc, en Mo (None hors Linux)"""
+
+    def __init__(self):
+        self.delta_mb: Optional[float] = None
+        self._stop = threading.Event()
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _rss(self) -> Optional[int]:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page_size
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _watch(self, baseline: int) -> None:
+        peak = baseline
+        while not self._stop.wait(RSS_INTERVAL):
+            peak = max(peak, self._rss() or peak)
+        peak = max(peak, self._rss() or peak)
+        self.delta_mb = (peak - baseline) / 1e6
+
+    def __enter__(self):
+        baseline = self._rss()
+        self._thread = None
+        if baseline is not None:
+            self._thread = threading.Thread(target=self._watch, args=(baseline,), daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+@contextlib.contextmanager
+def quiet_stdout(enabled: bool = True):
+    """Masque les journaux print() de l'API pendant les mesures"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def summarize(timings: List[float]) -> Dict[str, Optional[float]]:
+    if not timings:
+        return {"median_s": None, "min_s": None, "mean_s": None, "stdev_s": None}
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "mean_s": statistics.fmean(timings),
+        "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def measure(name: str, fn: Callable[[int], Any], repeat: int, quiet: bool, warmup: int = 0,
+            **meta: Any) -> Dict[str, Any]:
+    """
+    Exécute fn(essai) warmup + repeat fois, les warmup premiers essais (caches,
+    imports, pools) n'étant pas mesurés ; une erreur arrête la mesure et est enregistrée
+    """
+    timings, peaks, error = [], [], None
+    for attempt in range(warmup + repeat):
+        try:
+            with PeakRSS() as peak:
+                with quiet_stdout(quiet):
+                    start = time.perf_counter()
+                    fn(attempt)
+                    elapsed = time.perf_counter() - start
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            break
+        if attempt < warmup:
+            continue
+        timings.append(elapsed)
+        peaks.append(peak.delta_mb)
+    known_peaks = [value for value in peaks if value is not None]
+    result = {
+        "name": name,
+        **meta,
+        "repeat": len(timings),
+        "timings_s": timings,
+        **summarize(timings),
+        "peak_rss_mb": max(known_peaks) if known_peaks else None,
+        "error": error,
+    }
+    status = f"{result['median_s']:.4f}s" if timings else f"❌ {error}"
+    print(f"   {name:<44} {status}")
+    return result
+
+
+def check(response, expected: int = 200):
+    if response.status_code != expected:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def numeric_columns(client, source: str, headers: dict) -> List[str]:
+    """Colonnes numériques (hors id) des premières lignes : les noms dépendent du format (dump SQL : col_N)"""
+    rows = check(client.get(f"{source}/data?skip=0&limit={PAGE_SIZE}", headers=headers)).json()["rows"]
+    columns = []
+    for name in (rows[0] if rows else {}):
+        values = [row.get(name) for row in rows if row.get(name) not in (None, "", "None", "nan")]
+        try:
+            [float(value) for value in values]
+        except (TypeError, ValueError):
+            continue
+        if name != "id" and values:
+            columns.append(name)
+    return columns
+
+
+def run_dataset(client, headers: dict, path: str, fmt: str, rows: int, cases: List[str],
+                repeat: int, warmup: int, quiet: bool) -> List[Dict[str, Any]]:
+    from app.services.data_sources.factory import DataSourceFactory
+    from app.services.data_sync import SYNCED_TYPES
+
+    results = []
+    label = f"{fmt}/{format_size(rows)}"
+    meta = {"format": fmt, "rows": rows, "file_bytes": os.path.getsize(path)}
+
+    def add(case: str, fn: Callable[[int], Any]) -> None:
+        results.append(measure(f"{case}/{label}", fn, repeat, quiet, warmup, case=case, **meta))
+
+    if "strategy" in cases:
+        strategy_class = DataSourceFactory.get_strategy_class(SOURCE_TYPES[fmt])
+        strategies = []
+
+        def connect(attempt: int) -> None:
+            strategy = strategy_class({"file_path": path})
+            strategy.connect()
+            strategies.append(strategy)
+
+        def get_data(attempt: int) -> None:
+            strategies[attempt].get_data()
+
+        add("strategy.connect", connect)
+        if len(strategies) == warmup + repeat:
+            add("strategy.get_data", get_data)
+        for strategy in strategies:
+            strategy.disconnect()
+        strategies.clear()
+
+    source_ids: List[int] = []
+    source_types: List[str] = []
+
+    def upload(attempt: int) -> None:
+        with open(path, "rb") as f:
+            response = check(client.post(f"{API}/upload", files={"file": (os.path.basename(path), f)},
+                                         data={"name": f"bench {label}", "project_id": "1"}, headers=headers))
+        source_ids.append(response.json()["id"])
+        source_types.append(response.json()["type"])
+
+    if "upload" in cases:
+        add("upload", upload)
+    if set(cases) & {"sync", "statistics", "data", "chart"} and not source_ids:
+        # Source nécessaire aux mesures suivantes, chargée sans être mesurée
+        with quiet_stdout(quiet):
+            upload(0)
+    if not source_ids:
+        return results
+    source = f"{API}/{source_ids[-1]}"
+
+    if "sync" in cases:
+        if source_types[-1] in SYNCED_TYPES:
+            add("sync", lambda attempt: check(client.post(f"{source}/sync", headers=headers)))
+        else:
+            def no_sync(attempt: int) -> None:
+                raise RuntimeError(f"pas de synchronisation réelle pour le type {source_types[-1]}")
+
+            add("sync", no_sync)
+    if "statistics" in cases:
+        add("statistics", lambda attempt: check(client.get(f"{source}/statistics", headers=headers)))
+    if "data" in cases:
+        last_page = max(rows - PAGE_SIZE, 0)
+        add("data.first_page", lambda attempt: check(client.get(f"{source}/data?skip=0&limit={PAGE_SIZE}", headers=headers)))
+        add("data.last_page", lambda attempt: check(client.get(f"{source}/data?skip={last_page}&limit={PAGE_SIZE}", headers=headers)))
+    if "chart" in cases:
+        columns = numeric_columns(client, source, headers)
+        if len(columns) < 2:
+            def missing_columns(attempt: int) -> None:
+                raise RuntimeError(f"il faut deux colonnes numériques stockées, trouvées: {columns or 'aucune'}")
+
+            add("chart.histogram", missing_columns)
+            add("chart.scatter", missing_columns)
+            return results
+        x, y = columns[:2]
+        add("chart.histogram", lambda attempt: check(client.get(
+            f"{source}/charts/histogram", params={"x_column": x, "title": f"bench-{time.time_ns()}"}, headers=headers)))
+        add("chart.scatter", lambda attempt: check(client.get(
+            f"{source}/charts/scatter", params={"x_column": x, "y_column": y, "title": f"bench-{time.time_ns()}"},
+            headers=headers)))
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'mesure':<44} {'médiane s':>10} {'min s':>9} {'écart s':>9} {'RSS Mo':>8}")
+    for r in results:
+        if r["error"]:
+            print(f"{r['name']:<44} {'erreur':>10}  {r['error'][:60]}")
+            continue
+        peak = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "-"
+        print(f"{r['name']:<44} {r['median_s']:10.4f} {r['min_s']:9.4f} {r['stdev_s']:9.4f} {peak:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument("--cases", default=",".join(CASES), help=f"mesures parmi {','.join(CASES)}")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="essais mesurés par mesure (benchmarks/compare.py en demande au moins 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="essais non mesurés avant chaque mesure")
+    parser.add_argument("--fixtures-dir", help="répertoire des jeux de données (conservé) ; temporaire sinon")
+    parser.add_argument("--verbose", action="store_true", help="garder les journaux de l'API")
+    parser.add_argument("--output", help="fichier JSON pour les résultats")
+    args = parser.parse_args()
+
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise SystemExit(f"Mesures inconnues: {', '.join(sorted(unknown))}")
+    specs = specs_from_arguments(args)
+    formats = formats_from_arguments(args)
+
+    workdir = tempfile.mkdtemp(prefix="nexusbi_bench_")
+    fixtures_dir = args.fixtures_dir or os.path.join(workdir, "fixtures")
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    if not args.verbose:
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, BACKEND_DIR)
+
+    results: List[Dict[str, Any]] = []
+    try:
+        datasets = []
+        for spec in specs:
+            for fmt in formats:
+                path = ensure_dataset(spec, fmt, fixtures_dir)
+                if path is None:
+                    print(f"⏭️  {fmt}/{format_size(spec.rows)}: au-delà de la limite du format")
+                else:
+                    datasets.append((spec, fmt, path))
+
+        from fastapi.testclient import TestClient
+
+        from app import models
+        from app.core.logs import configure_logging
+        from app.core.security import create_access_token
+        from app.db.session import SessionLocal, engine
+        from main import app
+
+        # Journaux écrits sur la vraie sortie (le démarrage de l'API ne fait que la réutiliser),
+        # pas sur le /dev/null temporaire de quiet_stdout
+        configure_logging()
+        with quiet_stdout(not args.verbose):
+            client = TestClient(app)
+            client.__enter__()
+        try:
+            db = SessionLocal()
+            user = models.User(email="bench@nexusbi.com", hashed_password="-", is_active=True)
+            db.add(user)
+            db.commit()
+            headers = {"Authorization": f"Bearer {create_access_token(user.id)}"}
+            db.close()
+
+            for spec, fmt, path in datasets:
+                print(f"⏱️  {fmt}/{format_size(spec.rows)} ({os.path.getsize(path) / 1e6:.1f} Mo)")
+                results.extend(run_dataset(client, headers, path, fmt, spec.rows, cases, args.repeat,
+                                           args.warmup, quiet=not args.verbose))
+        finally:
+            with quiet_stdout(not args.verbose):
+                client.__exit__(None, None, None)
+            engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "benchmark": "suite",
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "git_commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "datasets": [{"format": fmt, **asdict(spec), "fingerprint": spec.fingerprint}
+                             for spec, fmt, _ in datasets],
+                "cases": cases,
+                "repeat": args.repeat,
+                "warmup": args.warmup,
+                "results": results,
+            }, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
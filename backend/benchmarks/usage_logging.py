@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Coût par requête du journal d'utilisation des clés API
+
+Compare, sur une base SQLite temporaire avec les réglages de l'API :
+- sync    : une ligne api_key_usage + mise à jour de usage_count/last_used_at
+            et un commit par requête
+- batched : UsageRecorder.record() dans la requête, écriture par lots
+            (temps de record() par appel, puis durée du vidage)
+
+Usage:
+    python benchmarks/usage_logging.py
+    python benchmarks/usage_logging.py --events 50000 --keys 20 --output results.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentiles(timings: list) -> dict:
+    quantiles = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "mean_us": statistics.fmean(timings),
+        "p50_us": quantiles[49],
+        "p99_us": quantiles[98],
+        "max_us": max(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20_000, help="appels simulés")
+    parser.add_argument("--keys", type=int, default=10, help="clés API distinctes")
+    parser.add_argument("--output", help="fichier JSON pour les résultats")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="nexusbi_bench_")
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(workdir, 'usage.db')}"
+    sys.path.insert(0, BACKEND_DIR)
+
+    from app import models
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.services.usage_log import UsageEvent, UsageRecorder
+
+    try:
+        Base.metadata.create_all(engine)
+        db = SessionLocal()
+        user = models.User(email="bench@nexusbi.com", hashed_password="-", is_active=True)
+        db.add(user)
+        db.flush()
+        keys = [
+            models.APIKey(user_id=user.id, key_name=f"key {i}", key_value=f"value-{i}", key_type="gemini", usage_count=0)
+            for i in range(args.keys)
+        ]
+        db.add_all(keys)
+        db.commit()
+        key_ids = [key.id for key in keys]
+
+        # Une écriture synchrone par requête
+        print(f"⏱️  sync: {args.events:,} écritures")
+        sync_timings = []
+        for i in range(args.events):
+            start = time.perf_counter()
+            key_id = key_ids[i % len(key_ids)]
+            db.add(models.APIKeyUsage(api_key_id=key_id, endpoint="/api/v1/user/chatbot/query",
+                                      request_method="POST", response_status=200, tokens_used=100,
+                                      processing_time_ms=1.0))
+            key = db.get(models.APIKey, key_id)
+            key.usage_count = (key.usage_count or 0) + 1
+            key.last_used_at = datetime.now(timezone.utc)
+            db.commit()
+            sync_timings.append((time.perf_counter() - start) * 1e6)
+        db.close()
+
+        # Tampon en mémoire, vidé en un lot
+        print(f"⏱️  batched: {args.events:,} appels à record()")
+        recorder = UsageRecorder(SessionLocal, flush_interval=3600, batch_size=args.events + 1,
+                                 max_buffer=args.events + 1)
+        batched_timings = []
+        for i in range(args.events):
+            start = time.perf_counter()
+            recorder.record(UsageEvent(api_key_id=key_ids[i % len(key_ids)], endpoint="/api/v1/user/chatbot/query",
+                                       request_method="POST", response_status=200, tokens_used=100,
+                                       processing_time_ms=1.0))
+            batched_timings.append((time.perf_counter() - start) * 1e6)
+        start = time.perf_counter()
+        written = recorder.flush()
+        flush_seconds = time.perf_counter() - start
+
+        db = SessionLocal()
+        total_rows = db.query(models.APIKeyUsage).count()
+        total_calls = sum(key.usage_count for key in db.query(models.APIKey))
+        db.close()
+    finally:
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "sync": percentiles(sync_timings),
+        "batched_record": percentiles(batched_timings),
+        "batched_flush": {"seconds": flush_seconds, "rows": written,
+                          "us_per_event": flush_seconds / max(written, 1) * 1e6},
+        "check": {"rows": total_rows, "usage_count_total": total_calls, "expected": 2 * args.events},
+    }
+
+    print(f"\n{'mode':<16} {'mean µs':>10} {'p50 µs':>10} {'p99 µs':>10} {'max µs':>10}")
+    for name in ("sync", "batched_record"):
+        r = results[name]
+        print(f"{name:<16} {r['mean_us']:10.1f} {r['p50_us']:10.1f} {r['p99_us']:10.1f} {r['max_us']:10.1f}")
+    flush = results["batched_flush"]
+    print(f"\nvidage: {flush['rows']:,} lignes en {flush['seconds']:.2f}s ({flush['us_per_event']:.1f} µs/événement)")
+    check = results["check"]
+    print(f"contrôle: {check['rows']:,} lignes, usage_count total {check['usage_count_total']:,} "
+          f"(attendu {check['expected']:,})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "usage_logging", "events": args.events, "keys": args.keys,
+                       "results": results}, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
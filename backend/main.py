@@ -1,29 +1,71 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine
-# from sqlalchemy.orm import sessionmaker  # Not used anymore
+from fastapi.responses import PlainTextResponse
 from app.api.v1.api import api_router
 from app.core.config import settings
-from app.db.base import Base
+from app.core.executor import pandas_executor
+from app.core.logs import configure_logging, shutdown_logging
+from app.core.memory import MemoryMiddleware, memory_budget, monitor as memory_monitor
+from app.core.metrics import MetricsMiddleware, registry as metrics_registry
+from app.core.principal_cache import principal_cache
+from app.core.profiler import ProfilerMiddleware
+from app.core.responses import NumpyJSONResponse
+from app.core.security import password_executor, verified_passwords
+from app.db.async_session import dispose_async_engine
+from app.db.migrations import run_migrations
+from app.db.session import engine
+from app.db.write_queue import write_queue
+from app.services.ai_cache import ai_response_cache
+from app.services.ai_gateway import ai_gateway
+from app.services.chart_renderer import chart_cache, shutdown_render_pool
+from app.services.correlation import correlation_cache
+from app.services.usage_log import usage_recorder
 # Imports pour modèles (maintenus pour compatibilité future)
 # from app.models.user import User
 # from app.models.project import Project, DataSource
 # from app.core.security import get_password_hash
 
-# Créer le moteur de base de données
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Appliquer les migrations Alembic - au démarrage du worker,
+    # pas à l'import du module
+    configure_logging()
+    logger.info("Mise à jour du schéma de la base de données")
+    run_migrations(engine)
+
+    # Base de données initialisée sans données de démonstration
+    logger.info("Schéma à jour, base de données initialisée (sans données de démonstration)")
+    usage_recorder.start()
+    yield
+
+    # Écrire le journal d'utilisation encore en mémoire
+    usage_recorder.stop()
 
-# Créer les tables si elles n'existent pas
-print("🏗️  Vérification des tables de la base de données...")
-Base.metadata.create_all(bind=engine)
-print("✅ Tables vérifiées/créées")
+    # Arrêter le pool de rendu des graphiques s'il a été démarré
+    shutdown_render_pool()
+    # Terminer les écritures en attente et fermer la connexion d'écriture,
+    # hors de la boucle d'événements (attente des écritures en cours)
+    await asyncio.to_thread(write_queue.shutdown)
+    pandas_executor.shutdown()
+    password_executor.shutdown()
+    await dispose_async_engine()
+    await ai_gateway.aclose()
+    # Écrire les derniers messages en file
+    shutdown_logging()
 
-# Base de données initialisée sans données de démonstration
-print("✅ Base de données initialisée (sans données de démonstration)")
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=NumpyJSONResponse,
+    lifespan=lifespan
 )
 
 # Set up CORS - always enable for development
@@ -35,8 +77,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+if settings.MEMORY_TRACKING:
+    app.add_middleware(MemoryMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# stats() exposées par /metrics
+metrics_registry.register_stats("cache", "chart", chart_cache.stats)
+metrics_registry.register_stats("cache", "correlation", correlation_cache.stats)
+metrics_registry.register_stats("cache", "principal", principal_cache.stats)
+metrics_registry.register_stats("cache", "verified_password", verified_passwords.stats)
+metrics_registry.register_stats("cache", "ai_response", ai_response_cache.stats)
+metrics_registry.register_stats("executor", "pandas", pandas_executor.stats)
+metrics_registry.register_stats("executor", "bcrypt", password_executor.stats)
+metrics_registry.register_stats("write_queue", "sqlite", write_queue.stats)
+metrics_registry.register_stats("usage_log", "api_keys", usage_recorder.stats)
+metrics_registry.register_stats("memory", "process", memory_monitor.stats)
+metrics_registry.register_stats("memory_budget", "admission", memory_budget.stats)
+metrics_registry.register_stats("ai_gateway", "llm", ai_gateway.stats)
+
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
\ No newline at end of file
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Test script for the AI gateway (app/services/ai_gateway.py)
+Starts ai_stub_server.py on a free port and checks the per-user limit (429),
+the global queue (503), the request timeout (504), the cancellation of a call
+when the client disconnects, and that a stream abandoned by its client
+releases its slot and still reports the tokens it used
+"""
+
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.ai_gateway import (  # noqa: E402
+    AIGateway, AIGatewayBusy, AIGatewayTimeout, AIUserLimitExceeded, ClientDisconnected, sse_events,
+)
+
+# Stub: first word after STUB_LATENCY seconds, then one word every STUB_TOKEN_INTERVAL
+STUB_LATENCY = 1.0
+STUB_TOKEN_INTERVAL = 0.05
+STUB_WORDS = 40
+
+MESSAGES = [{"role": "user", "content": "Quelles sont les ventes du mois ?"}]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stub(port: int) -> subprocess.Popen:
+    """Start ai_stub_server.py and wait until it answers"""
+    process = subprocess.Popen(
+        [sys.executable, "ai_stub_server.py", "--port", str(port), "--latency", str(STUB_LATENCY),
+         "--token-interval", str(STUB_TOKEN_INTERVAL), "--words", str(STUB_WORDS)],
+        cwd=BACKEND_DIR,
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            stub_stats(port)
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("ai_stub_server.py exited on startup")
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("ai_stub_server.py did not start")
+
+
+def stub_stats(port: int) -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=1) as response:
+        return json.load(response)
+
+
+def make_gateway(port: int, **overrides) -> AIGateway:
+    options = dict(max_concurrency=4, max_per_user=2, queue_timeout=0.2, request_timeout=10.0)
+    options.update(overrides)
+    return AIGateway(base_url=f"http://127.0.0.1:{port}/v1", api_key="", mock_latency=0.0, **options)
+
+
+class DisconnectingRequest:
+    """Starlette request stand-in whose client leaves after `after` seconds"""
+
+    def __init__(self, after: float):
+        self.deadline = time.monotonic() + after
+
+    async def is_disconnected(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+
+async def expect(exception_class, coroutine):
+    try:
+        await coroutine
+    except exception_class as e:
+        return e
+    raise AssertionError(f"{exception_class.__name__} not raised")
+
+
+async def cancel(task: "asyncio.Task") -> None:
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def test_per_user_limit(port: int):
+    """A user over AI_MAX_CONCURRENCY_PER_USER is rejected at once with 429, others still get a slot"""
+    async def run():
+        gateway = make_gateway(port, max_per_user=1)
+        first = asyncio.ensure_future(gateway.complete(MESSAGES, "stub", user_id=1))
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        error = await expect(AIUserLimitExceeded, gateway.complete(MESSAGES, "stub", user_id=1))
+        assert error.status_code == 429
+        assert time.perf_counter() - started < 0.1, "the per-user limit must not wait for a slot"
+        other = asyncio.ensure_future(gateway.complete(MESSAGES, "stub", user_id=2))
+        await asyncio.sleep(0.1)
+        assert gateway.in_flight == 2, gateway.stats()
+        await cancel(first)
+        await cancel(other)
+        assert gateway.stats()["rejected"] == 1 and gateway.in_flight == 0, gateway.stats()
+        await gateway.aclose()
+
+    asyncio.run(run())
+
+
+def test_global_queue(port: int):
+    """With every slot taken, a call waits AI_QUEUE_TIMEOUT seconds then fails with 503"""
+    async def run():
+        gateway = make_gateway(port, max_concurrency=1, queue_timeout=0.3)
+        first = asyncio.ensure_future(gateway.complete(MESSAGES, "stub", user_id=1))
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        error = await expect(AIGatewayBusy, gateway.complete(MESSAGES, "stub", user_id=2))
+        assert not isinstance(error, AIUserLimitExceeded) and error.status_code == 503, error
+        assert time.perf_counter() - started >= 0.3
+        assert gateway._user_calls == {1: 1}, "the rejected user must not keep a slot"
+        await cancel(first)
+        assert gateway.in_flight == 0 and not gateway._user_calls, gateway.stats()
+        await gateway.aclose()
+
+    asyncio.run(run())
+
+
+def test_request_timeout(port: int):
+    """A model slower than AI_REQUEST_TIMEOUT fails with 504, for a call and for a stream"""
+    async def run():
+        gateway = make_gateway(port, request_timeout=0.3)
+        error = await expect(AIGatewayTimeout, gateway.complete(MESSAGES, "stub", user_id=1))
+        assert error.status_code == 504
+
+        stream = await gateway.open_stream(MESSAGES, "stub", user_id=1)
+        events = [event async for event in sse_events(stream, {})]
+        assert b"event: error" in events[-1] and b"504" in events[-1], events
+        assert stream.status == "error" and gateway.stats()["timeouts"] == 2, gateway.stats()
+        assert gateway.in_flight == 0 and not gateway._user_calls, gateway.stats()
+        await gateway.aclose()
+
+    asyncio.run(run())
+
+
+def test_cancel_on_disconnect(port: int):
+    """When the client leaves, the call to the model is cancelled and its slot released"""
+    async def run():
+        gateway = make_gateway(port)
+        cancelled_before = stub_stats(port)["cancelled"]
+        started = time.perf_counter()
+        await expect(ClientDisconnected,
+                     gateway.complete(MESSAGES, "stub", user_id=1, request=DisconnectingRequest(0.3)))
+        assert time.perf_counter() - started < STUB_LATENCY, "the call must not wait for the model"
+        assert gateway.stats()["cancelled"] == 1 and gateway.in_flight == 0 and not gateway._user_calls
+        await asyncio.sleep(0.5)
+        assert stub_stats(port)["cancelled"] > cancelled_before, "the model call is still running"
+        await gateway.aclose()
+
+    asyncio.run(run())
+
+
+def test_cancelled_stream(port: int):
+    """A stream whose client leaves mid-answer releases its slot and reports the tokens sent so far"""
+    async def run():
+        gateway = make_gateway(port, max_per_user=1)
+        cancelled_before = stub_stats(port)["cancelled"]
+        ended = []
+        stream = await gateway.open_stream(MESSAGES, "stub", user_id=1)
+        received = asyncio.Event()
+
+        async def client():
+            # Starlette cancels the response task when the client disconnects
+            chunks = 0
+            async for event in sse_events(stream, {}, on_end=ended.append):
+                chunks += event.startswith(b"event: chunk")
+                if chunks == 3:
+                    received.set()
+
+        task = asyncio.ensure_future(client())
+        await asyncio.wait_for(received.wait(), STUB_LATENCY + 2)
+        await cancel(task)
+
+        assert ended == [stream], "on_end must run when the client leaves"
+        assert stream.status == "cancelled", stream.status
+        assert stream.tokens_used > 0, "tokens sent before the disconnection must be recorded"
+        assert gateway.in_flight == 0 and not gateway._user_calls, gateway.stats()
+        await asyncio.sleep(0.3)
+        assert stub_stats(port)["cancelled"] > cancelled_before, "the model stream is still running"
+
+        # The slot is free again for the same user
+        stream = await gateway.open_stream(MESSAGES, "stub", user_id=1)
+        stream.release()
+        await gateway.aclose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    port = free_port()
+    stub = start_stub(port)
+    try:
+        test_per_user_limit(port)
+        test_global_queue(port)
+        test_request_timeout(port)
+        test_cancel_on_disconnect(port)
+        test_cancelled_stream(port)
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+    print("✅ AI gateway limits, timeouts and cancellations behave as expected")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the bounded executors (app/core/executor.py) and the write
+queue (app/db/write_queue.py)
+Checks that the queue limit is enforced (ExecutorBusy), that cancelling
+callers whose work is still queued gives their slots back, and that a queued
+write still runs when its caller is cancelled
+"""
+
+import asyncio
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from app.core.executor import BoundedExecutor, ExecutorBusy  # noqa: E402
+from app.db.write_queue import WriteQueue  # noqa: E402
+
+
+async def expect_busy(executor: BoundedExecutor) -> None:
+    try:
+        await executor.run(lambda: None)
+    except ExecutorBusy:
+        return
+    raise AssertionError("ExecutorBusy not raised")
+
+
+def test_queue_limit_and_cancelled_callers():
+    """A cancelled caller whose work was still queued releases its slot"""
+    async def run():
+        executor = BoundedExecutor("test", max_workers=1, max_queue=2)
+        release = threading.Event()
+        blocking = asyncio.ensure_future(executor.run(release.wait))
+        queued = [asyncio.ensure_future(executor.run(lambda: None)) for _ in range(2)]
+        await asyncio.sleep(0.1)
+        assert executor.stats()["queued"] == 2, executor.stats()
+        await expect_busy(executor)
+
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        release.set()
+        await blocking
+
+        stats = executor.stats()
+        assert stats["queued"] == 0 and stats["running"] == 0, stats
+        assert stats["completed"] == 1 and stats["rejected"] == 1, stats
+
+        # Toute la capacité est de nouveau disponible
+        release.clear()
+        blocking = asyncio.ensure_future(executor.run(release.wait))
+        queued = [asyncio.ensure_future(executor.run(lambda i=i: i)) for i in range(2)]
+        await asyncio.sleep(0.1)
+        release.set()
+        assert await asyncio.gather(*queued) == [0, 1]
+        await blocking
+        assert executor.stats()["queued"] == 0, executor.stats()
+        executor.shutdown()
+
+    asyncio.run(run())
+
+
+def test_write_queue_finishes_cancelled_writes():
+    """A write queued behind another one is committed even if its caller is cancelled"""
+    release = threading.Event()
+
+    def create_table(db):
+        db.execute(text("CREATE TABLE rows (value INTEGER)"))
+
+    def insert_row(db):
+        db.execute(text("INSERT INTO rows VALUES (1)"))
+
+    async def run(queue: WriteQueue):
+        await queue.run(create_table)
+        blocking = asyncio.ensure_future(queue.run(lambda db: release.wait()))
+        write = asyncio.ensure_future(queue.run(insert_row))
+        await asyncio.sleep(0.1)
+        write.cancel()
+        await asyncio.gather(write, return_exceptions=True)
+        release.set()
+        await blocking
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{tmp}/writes.db"
+        queue = WriteQueue(url)
+        asyncio.run(run(queue))
+        queue.shutdown()
+        assert queue.stats() == {"pending": 0, "completed": 3, "failed": 0}, queue.stats()
+        engine = create_engine(url)
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT COUNT(*) FROM rows")).scalar() == 1
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    test_queue_limit_and_cancelled_callers()
+    test_write_queue_finishes_cancelled_writes()
+    print("✅ Executors keep their capacity and queued writes finish when callers are cancelled")
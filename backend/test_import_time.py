@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the API startup-time budget
+Imports main.py under `python -X importtime`, prints the slowest imports and checks
+that the heavy optional libraries are not loaded when a uvicorn worker boots
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+
+# Total cumulative import time allowed for `import main` (seconds)
+IMPORT_BUDGET_SECONDS = float(os.environ.get("NEXUSBI_IMPORT_BUDGET", "3.0"))
+
+# Modules that must only be imported on first use
+LAZY_MODULES = [
+    "matplotlib",
+    "seaborn",
+    "plotly",
+    "openai",
+    "google.generativeai",
+    "mysql.connector",
+    "psycopg2",
+    "app.services.chart_generator",
+    "app.services.data_analysis",
+    "app.services.data_visualization",
+    "app.services.data_sources.factory",
+]
+
+
+def profile_imports(module: str = "main"):
+    """Run `python -X importtime -c 'import <module>'` and parse the report"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def print_report(entries, top: int = 15):
+    """Print the slowest imports by cumulative time"""
+    print(f"{'cumulative (ms)':>16} {'self (ms)':>10}  module")
+    for name, self_us, cumulative_us in sorted(entries, key=lambda e: e[2], reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:16.1f} {self_us / 1000:10.1f}  {name}")
+
+
+def test_import_time():
+    """Test that `import main` stays lazy and within the startup-time budget"""
+    entries = profile_imports("main")
+    print_report(entries)
+
+    imported = {name for name, _, _ in entries}
+    eager = [module for module in LAZY_MODULES if module in imported]
+    assert not eager, f"Modules imported at startup instead of on first use: {eager}"
+
+    total = next(cumulative for name, _, cumulative in entries if name == "main") / 1_000_000
+    print(f"\n⏱️  import main: {total:.2f}s (budget {IMPORT_BUDGET_SECONDS:.2f}s)")
+    assert total <= IMPORT_BUDGET_SECONDS, f"import main took {total:.2f}s"
+
+
+if __name__ == "__main__":
+    test_import_time()
+    print("✅ Startup import budget respected")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for the Alembic migrations (app/db/migrations.py)
+Builds a database as create_all did before Alembic (no data_blobs, data_versions
+or composite index), runs run_migrations() on it and checks that the schema
+matches the models and that the data of a source can be stored and deleted
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.db.base import Base
+from app.db.migrations import get_alembic_config, run_migrations
+
+# Tables created by Base.metadata.create_all before the migrations were introduced
+PRE_ALEMBIC_TABLES = [
+    "users", "projects", "data_sources", "dataframe_data",
+    "api_keys", "api_key_usage", "user_settings", "user_activity",
+]
+
+
+def head_revision() -> str:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(get_alembic_config()).get_current_head()
+
+
+def schema_differences(engine):
+    """Differences between the database and the models (alembic autogenerate)"""
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+
+    with engine.connect() as connection:
+        return compare_metadata(MigrationContext.configure(connection), Base.metadata)
+
+
+def create_pre_alembic_database(engine):
+    """Schema and data of a database created before Alembic"""
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables[name] for name in PRE_ALEMBIC_TABLES])
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_dataframe_data_source_row"))
+        connection.execute(text(
+            "INSERT INTO users (id, email, hashed_password, is_active) VALUES (1, 'a@b.c', 'x', 1)"
+        ))
+        connection.execute(text("INSERT INTO projects (id, name, owner_id) VALUES (1, 'p', 1)"))
+        connection.execute(text("INSERT INTO data_sources (id, name, type, project_id) VALUES (1, 's', 'csv', 1)"))
+        for i in range(3):
+            connection.execute(text(
+                f"INSERT INTO dataframe_data (data_source_id, row_data, row_index) VALUES (1, '{{}}', {i})"
+            ))
+
+
+def test_upgrade_pre_alembic_database():
+    """A database created by create_all before Alembic is stamped then upgraded to head"""
+    import pandas as pd
+
+    from app.services.blob_store import delete_dataframe_data, store_dataframe_rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/pre_alembic.db")
+        create_pre_alembic_database(engine)
+
+        run_migrations(engine)
+
+        tables = set(inspect(engine).get_table_names())
+        assert {"data_blobs", "data_versions"} <= tables, f"missing tables: {tables}"
+        with engine.connect() as connection:
+            revision = connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+            row_count = connection.execute(
+                text("SELECT row_count FROM data_versions WHERE data_source_id = 1")
+            ).scalar()
+        assert revision == head_revision(), revision
+        assert row_count == 3, row_count
+        differences = schema_differences(engine)
+        assert not differences, f"schema differs from the models: {differences}"
+
+        # Resynchronisation : suppression puis stockage avec une colonne volumineuse
+        db = sessionmaker(bind=engine)()
+        try:
+            delete_dataframe_data(db, 1)
+            store_dataframe_rows(db, 1, pd.DataFrame({"id": [1, 2], "blob": ["x" * 100_000, "y"]}))
+            db.commit()
+            assert db.query(models.DataFrameData).count() == 2
+            delete_dataframe_data(db, 1, drop_version=True)
+            db.commit()
+        finally:
+            db.close()
+        engine.dispose()
+
+
+def test_upgrade_empty_and_current_databases():
+    """An empty database and one created by create_all with the current models reach head"""
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = create_engine(f"sqlite:///{tmp}/empty.db")
+        run_migrations(empty)
+        differences = schema_differences(empty)
+        assert not differences, f"schema differs from the models: {differences}"
+        empty.dispose()
+
+        current = create_engine(f"sqlite:///{tmp}/current.db")
+        Base.metadata.create_all(current)
+        run_migrations(current)
+        with current.connect() as connection:
+            revision = connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        assert revision == head_revision(), revision
+        current.dispose()
+
+
+if __name__ == "__main__":
+    test_upgrade_pre_alembic_database()
+    test_upgrade_empty_and_current_databases()
+    print("✅ Migrations upgrade pre-Alembic, empty and current databases")